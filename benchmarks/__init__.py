@@ -0,0 +1,6 @@
+"""Benchmarks for the moodle-tools command line tools.
+
+The benchmarks are not part of the test suite. Run them from the repository root, e.g.:
+
+    python -m benchmarks.make_questions --size 100 --output results.json
+"""
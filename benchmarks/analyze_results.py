@@ -0,0 +1,200 @@
+"""Benchmark analyze-results on synthetic responses exports.
+
+The benchmark runs `analyze_questions` with one handler per `QuestionAnalysis` subclass on
+exports of different sizes and records the wall time and the peak resident set size (RSS). Each
+export size is measured in a fresh process so that the peak RSS of one size does not hide the
+memory usage of another:
+
+    python -m benchmarks.analyze_results --rows 1000 10000 100000 --output analysis.json
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from moodle_tools.analyze_results import analyze_questions
+
+from .harness import BenchmarkResult, compare_results, measure, print_results, write_results
+from .responses import Language, create_handlers, default_questions, generate_responses
+
+
+def peak_rss_mb() -> float | None:
+    """Return the peak resident set size of the current process in MiB, if available."""
+    try:
+        import resource  # noqa: PLC0415
+    except ImportError:  # pragma: no cover - not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_analysis(path: Path, questions: list[tuple[str, str]], rounds: int) -> dict[str, Any]:
+    """Analyze a responses export repeatedly and measure time and memory.
+
+    This function runs in a separate process.
+
+    Args:
+        path: The responses export.
+        questions: Question number and analysis type of each question.
+        rounds: Number of measured rounds.
+
+    Returns:
+        dict[str, Any]: Timings, baseline RSS before the analysis, and peak RSS.
+    """
+    logger.remove()
+    baseline = peak_rss_mb()
+
+    def analyze() -> None:
+        with (
+            path.open("r", encoding="utf-8-sig") as infile,
+            Path(os.devnull).open("w", encoding="utf-8") as outfile,
+        ):
+            analyze_questions(infile, outfile, create_handlers(questions))
+
+    timings = measure(analyze, rounds=rounds, warmup=0)
+    return {"timings": timings, "baseline_rss_mb": baseline, "peak_rss_mb": peak_rss_mb()}
+
+
+def benchmark_size(
+    directory: Path,
+    rows: int,
+    lang: Language,
+    questions: list[tuple[str, str]],
+    variants: int,
+    rounds: int,
+    seed: int,
+) -> BenchmarkResult:
+    """Generate a responses export of the given size and benchmark its analysis.
+
+    Args:
+        directory: Directory for the generated export.
+        rows: Number of rows of the export.
+        lang: Language of the export.
+        questions: Question number and analysis type of each question.
+        variants: Number of variants per question.
+        rounds: Number of measured rounds.
+        seed: Seed for the random number generator.
+
+    Returns:
+        BenchmarkResult: Wall time and memory usage of the analysis.
+    """
+    path = directory / f"responses-{lang}-{rows}.csv"
+    with path.open("w", encoding="utf-8-sig", newline="") as file:
+        generate_responses(file, rows, questions, lang, variants, seed)
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        measurement = executor.submit(run_analysis, path, questions, rounds).result()
+    path.unlink()
+
+    return BenchmarkResult(
+        f"analyze_questions[{lang}-{rows}]",
+        "analyze_questions",
+        {"rows": rows, "lang": lang, "questions": len(questions), "variants": variants},
+        measurement.pop("timings"),
+        measurement,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n",
+        "--rows",
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        type=int,
+        help="Sizes of the generated exports (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--lang",
+        nargs="+",
+        default=["en", "de"],
+        choices=["en", "de"],
+        help="Languages of the generated exports (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--per-type",
+        default=1,
+        type=int,
+        help="Number of questions per analysis type (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--variants",
+        default=5,
+        type=int,
+        help="Number of variants per question (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-r",
+        "--rounds",
+        default=3,
+        type=int,
+        help="Number of measured rounds per benchmark (default: %(default)s)",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Random seed (default: %(default)s)")
+    parser.add_argument("-o", "--output", type=Path, help="Write results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="Compare results with a previous JSON file")
+    parser.add_argument(
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="Relative slowdown that counts as regression (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run the analyze-results benchmarks.
+
+    Raises:
+        SystemExit: If `--compare` is given and at least one benchmark regressed.
+    """
+    args = parse_args()
+    questions = default_questions(args.per_type)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="moodle-tools-bench-") as directory:
+        for lang in args.lang:
+            for rows in args.rows:
+                print(f"Benchmarking {rows} rows ({lang})...", file=sys.stderr)
+                results.append(
+                    benchmark_size(
+                        Path(directory),
+                        rows,
+                        lang,
+                        questions,
+                        args.variants,
+                        args.rounds,
+                        args.seed,
+                    )
+                )
+
+    print_results(results)
+    if args.output:
+        write_results(
+            args.output,
+            results,
+            per_type=args.per_type,
+            variants=args.variants,
+            rounds=args.rounds,
+            seed=args.seed,
+        )
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
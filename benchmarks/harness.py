@@ -0,0 +1,182 @@
+"""A minimal benchmark harness that records timings as JSON.
+
+Results of different commits can be compared with `compare_results`, which reports benchmarks
+whose median runtime regressed by more than a given threshold.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of a single benchmark.
+
+    Attributes:
+        name: Unique name of the benchmark, e.g., `to_xml[cloze]`.
+        group: The pipeline stage that is measured, e.g., `to_xml`.
+        params: Parameters of the benchmark, e.g., the number of questions.
+        timings: Wall time of each round in seconds.
+        extra: Additional measurements, e.g., peak memory usage.
+    """
+
+    name: str
+    group: str
+    params: dict[str, Any]
+    timings: list[float]
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the timings of the benchmark.
+
+        Returns:
+            dict[str, Any]: The benchmark with aggregated statistics.
+        """
+        return asdict(self) | {
+            "rounds": len(self.timings),
+            "min": min(self.timings),
+            "max": max(self.timings),
+            "mean": statistics.fmean(self.timings),
+            "median": self.median,
+            "stddev": statistics.stdev(self.timings) if len(self.timings) > 1 else 0.0,
+        }
+
+
+def measure(
+    func: Callable[[], object],
+    *,
+    setup: Callable[[], None] | None = None,
+    rounds: int = 5,
+    warmup: int = 1,
+) -> list[float]:
+    """Measure the wall time of a function.
+
+    Args:
+        func: The function to measure.
+        setup: A function that is called before each round and excluded from the timing.
+        rounds: Number of measured rounds.
+        warmup: Number of unmeasured rounds that populate caches before measuring.
+
+    Returns:
+        list[float]: Wall time of each measured round in seconds.
+    """
+    timings = []
+    for i in range(warmup + rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+    return timings
+
+
+def environment_info() -> dict[str, Any]:
+    """Collect information about the environment in which the benchmarks run.
+
+    Returns:
+        dict[str, Any]: Python version, platform, package version, and git commit.
+    """
+    try:
+        package_version = version("moodle-tools")
+    except PackageNotFoundError:
+        package_version = None
+
+    commit = subprocess.run(
+        ["git", "rev-parse", "HEAD"],  # noqa: S607
+        capture_output=True,
+        check=False,
+        text=True,
+    ).stdout.strip()
+
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "moodle_tools": package_version,
+        "commit": commit or None,
+    }
+
+
+def write_results(path: Path, results: list[BenchmarkResult], **params: Any) -> None:  # noqa: ANN401
+    """Write benchmark results to a JSON file.
+
+    Args:
+        path: The output file.
+        results: The benchmark results.
+        params: Parameters of the benchmark run that are stored alongside the results.
+    """
+    data = {
+        "machine_info": environment_info(),
+        "params": params,
+        "benchmarks": [result.summary() for result in results],
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def print_results(results: list[BenchmarkResult]) -> None:
+    """Print a table with the median and minimum runtime of each benchmark.
+
+    Additional measurements are appended to each line.
+    """
+    width = max((len(result.name) for result in results), default=0)
+    print(f"{'benchmark':<{width}}  {'median [ms]':>12}  {'min [ms]':>12}")
+    for result in results:
+        extra = "".join(
+            f"  {key}: {value:.1f}" if isinstance(value, float) else f"  {key}: {value}"
+            for key, value in result.extra.items()
+        )
+        print(
+            f"{result.name:<{width}}  {result.median * 1000:>12.2f}  "
+            f"{min(result.timings) * 1000:>12.2f}{extra}"
+        )
+
+
+def compare_results(
+    results: list[BenchmarkResult], baseline_path: Path, threshold: float = 0.1
+) -> int:
+    """Compare benchmark results with the results of a previous run.
+
+    Args:
+        results: The benchmark results of the current run.
+        baseline_path: A JSON file written by `write_results`.
+        threshold: Relative increase of the median runtime that counts as regression.
+
+    Returns:
+        int: Number of benchmarks that regressed.
+    """
+    baseline = {
+        benchmark["name"]: benchmark["median"]
+        for benchmark in json.loads(baseline_path.read_text(encoding="utf-8"))["benchmarks"]
+    }
+    regressions = 0
+    width = max((len(result.name) for result in results), default=0)
+    print(f"{'benchmark':<{width}}  {'baseline [ms]':>14}  {'current [ms]':>14}  {'ratio':>7}")
+    for result in results:
+        if result.name not in baseline:
+            continue
+        ratio = result.median / baseline[result.name]
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{result.name:<{width}}  {baseline[result.name] * 1000:>14.2f}  "
+            f"{result.median * 1000:>14.2f}  {ratio:>7.2f}{marker}"
+        )
+    return regressions
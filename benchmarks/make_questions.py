@@ -0,0 +1,194 @@
+"""Benchmark the stages of the make-questions pipeline on synthetic question banks.
+
+For each question type, the benchmark measures `load_questions`, `preprocess_text`, `to_xml`, and
+`generate_moodle_questions`. Results are printed and can be written to a JSON file, which can in
+turn be used as baseline for a later run:
+
+    python -m benchmarks.make_questions --size 100 --output before.json
+    python -m benchmarks.make_questions --size 100 --compare before.json
+"""
+
+import argparse
+import contextlib
+import copy
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import yaml
+from jinja2 import Environment, PackageLoader, select_autoescape
+from loguru import logger
+
+from moodle_tools.make_questions import generate_moodle_questions, load_questions
+from moodle_tools.utils import preprocess_text
+
+from .harness import BenchmarkResult, compare_results, measure, print_results, write_results
+from .synthetic import available_question_types, generate_bank
+
+TEXT_FIELDS = ("question", "general_feedback", "correct_feedback", "incorrect_feedback")
+
+
+def benchmark_question_type(
+    question_type: str, path: Path, size: int, rounds: int
+) -> list[BenchmarkResult]:
+    """Benchmark all pipeline stages for the question bank of one question type.
+
+    Args:
+        question_type: The question type.
+        path: The YAML file with the question bank.
+        size: Number of questions in the bank.
+        rounds: Number of measured rounds per stage.
+
+    Returns:
+        list[BenchmarkResult]: One result per pipeline stage.
+    """
+    params = {"question_type": question_type, "size": size}
+    documents: list[dict[str, Any]] = list(yaml.safe_load_all(path.read_text(encoding="utf-8")))
+    texts = [document[key] for document in documents for key in TEXT_FIELDS if key in document]
+    env = Environment(
+        loader=PackageLoader("moodle_tools.questions"),
+        lstrip_blocks=True,
+        trim_blocks=True,
+        autoescape=select_autoescape(),
+    )
+
+    results = []
+    with contextlib.chdir(path.parent):
+        batch: list[dict[str, Any]] = []
+
+        def copy_documents() -> None:
+            nonlocal batch
+            batch = copy.deepcopy(documents)
+
+        timings = measure(
+            lambda: list(load_questions(iter(batch), strict_validation=False)),
+            setup=copy_documents,
+            rounds=rounds,
+        )
+        results.append(
+            BenchmarkResult(f"load_questions[{question_type}]", "load_questions", params, timings)
+        )
+
+        timings = measure(
+            lambda: [preprocess_text(text, markdown=True, table_styling=True) for text in texts],
+            rounds=rounds,
+        )
+        results.append(
+            BenchmarkResult(
+                f"preprocess_text[{question_type}]", "preprocess_text", params, timings
+            )
+        )
+
+        questions = list(load_questions(iter(documents), strict_validation=False))
+        timings = measure(lambda: [question.to_xml(env) for question in questions], rounds=rounds)
+        results.append(BenchmarkResult(f"to_xml[{question_type}]", "to_xml", params, timings))
+
+    timings = measure(
+        lambda: generate_moodle_questions(paths=iter([path]), skip_validation=True),
+        rounds=rounds,
+    )
+    results.append(
+        BenchmarkResult(
+            f"generate_moodle_questions[{question_type}]",
+            "generate_moodle_questions",
+            params,
+            timings,
+        )
+    )
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n",
+        "--size",
+        default=50,
+        type=int,
+        help="Number of questions per question type (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-t",
+        "--types",
+        nargs="+",
+        choices=available_question_types(),
+        default=available_question_types(),
+        help="Question types to benchmark (default: all available types)",
+    )
+    parser.add_argument(
+        "--rows",
+        default=10_000,
+        type=int,
+        help="Number of rows of generated databases and streams (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-r",
+        "--rounds",
+        default=5,
+        type=int,
+        help="Number of measured rounds per benchmark (default: %(default)s)",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Random seed (default: %(default)s)")
+    parser.add_argument("-o", "--output", type=Path, help="Write results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="Compare results with a previous JSON file")
+    parser.add_argument(
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="Relative slowdown that counts as regression (default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run the make-questions benchmarks.
+
+    Raises:
+        SystemExit: If `--compare` is given and at least one benchmark regressed.
+    """
+    args = parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    results: list[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory(prefix="moodle-tools-bench-") as directory:
+        files = generate_bank(Path(directory), args.types, args.size, args.rows, args.seed)
+        for question_type, path in files.items():
+            print(f"Benchmarking {question_type}...", file=sys.stderr)
+            results.extend(benchmark_question_type(question_type, path, args.size, args.rounds))
+
+        timings = measure(
+            lambda: generate_moodle_questions(paths=iter(files.values()), skip_validation=True),
+            rounds=args.rounds,
+        )
+        results.append(
+            BenchmarkResult(
+                "generate_moodle_questions[all]",
+                "generate_moodle_questions",
+                {"question_type": "all", "size": args.size * len(files)},
+                timings,
+            )
+        )
+
+    print_results(results)
+    if args.output:
+        write_results(
+            args.output,
+            results,
+            size=args.size,
+            rows=args.rows,
+            rounds=args.rounds,
+            seed=args.seed,
+        )
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Generate synthetic Moodle "Responses" CSV exports.
+
+The exports mimic the report that Moodle creates for a quiz with the options to include the
+question text and the right answers. Each question number has several variants with different
+difficulty, and the responses of multi-part questions use the formats that Moodle writes for
+Cloze, drop-down, missing words, and multiple true/false questions.
+
+The generator can also be used on its own, e.g., to create a test file:
+
+    python -m benchmarks.responses --rows 1000 --lang de --output responses.csv
+"""
+
+import argparse
+import csv
+import random
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal, TextIO
+
+from moodle_tools.questions import (
+    ClozeQuestionAnalysis,
+    DropDownQuestionAnalysis,
+    MissingWordsQuestionAnalysis,
+    MultipleChoiceQuestionAnalysis,
+    MultipleTrueFalseQuestionAnalysis,
+    NumericalQuestionAnalysis,
+    QuestionAnalysis,
+    TrueFalseQuestionAnalysis,
+)
+
+Language = Literal["en", "de"]
+
+HEADERS: dict[Language, list[str]] = {
+    "en": [
+        "Last name",
+        "First name",
+        "Email address",
+        "State",
+        "Started on",
+        "Completed",
+        "Time taken",
+        "Grade/10.00",
+    ],
+    "de": [
+        "Nachname",
+        "Vorname",
+        "E-Mail-Adresse",
+        "Status",
+        "Begonnen am",
+        "Beendet",
+        "Verbrauchte Zeit",
+        "Bewertung/10,00",
+    ],
+}
+COLUMNS: dict[Language, tuple[str, str, str]] = {
+    "en": ("Question", "Response", "Right answer"),
+    "de": ("Frage", "Antwort", "Richtige Antwort"),
+}
+BOOLEANS: dict[Language, tuple[str, str]] = {"en": ("True", "False"), "de": ("Wahr", "Falsch")}
+KEYWORDS = ["SELECT", "FROM", "WHERE", "GROUP BY", "HAVING", "ORDER BY", "JOIN", "LIMIT"]
+CATEGORIES = ["DQL", "DDL", "DML", "DCL", "TCL"]
+
+ANALYSIS_TYPES: dict[str, Callable[[str], QuestionAnalysis]] = {
+    "n": NumericalQuestionAnalysis,
+    "tf": TrueFalseQuestionAnalysis,
+    "mc": MultipleChoiceQuestionAnalysis,
+    "mtf": MultipleTrueFalseQuestionAnalysis,
+    "dd": DropDownQuestionAnalysis,
+    "mw": MissingWordsQuestionAnalysis,
+    "cloze": ClozeQuestionAnalysis,
+}
+
+
+@dataclass
+class Variant:
+    """A variant of a question in the responses export.
+
+    Attributes:
+        question: The question text as exported by Moodle.
+        parts: Label and options of each part of the question. The first option is correct.
+        render: Formats the answers to all parts like Moodle does in the export.
+        difficulty: Probability that a part is answered correctly.
+    """
+
+    question: str
+    parts: list[tuple[str, list[str]]]
+    render: Callable[[list[tuple[str, str]]], str]
+    difficulty: float
+
+    @property
+    def right_answer(self) -> str:
+        return self.render([(label, options[0]) for label, options in self.parts])
+
+    def response(self, rng: random.Random) -> str:
+        """Draw a random response of a student."""
+        if rng.random() < 0.03:
+            return "-"
+        return self.render(
+            [
+                (label, options[0] if rng.random() < self.difficulty else rng.choice(options[1:]))
+                for label, options in self.parts
+            ]
+        )
+
+
+def single(answers: list[tuple[str, str]]) -> str:
+    return answers[0][1]
+
+
+def labeled(answers: list[tuple[str, str]]) -> str:
+    return "; ".join(f"{label}: {answer}" for label, answer in answers)
+
+
+def dropdown(answers: list[tuple[str, str]]) -> str:
+    return ";".join(f"{label}\n -> {answer}" for label, answer in answers)
+
+
+def braced(answers: list[tuple[str, str]]) -> str:
+    return " ".join(f"{{{answer}}}" for _, answer in answers)
+
+
+def create_variant(kind: str, v: int, lang: Language, rng: random.Random) -> Variant:  # noqa: PLR0911
+    """Create a variant of a question.
+
+    Args:
+        kind: The analysis type of the question, see `ANALYSIS_TYPES`.
+        v: Number of the variant.
+        lang: Language of the export.
+        rng: The random number generator.
+
+    Returns:
+        Variant: The variant.
+    """
+    difficulty = rng.uniform(0.4, 0.95)
+    true, false = BOOLEANS[lang]
+    keywords = rng.sample(KEYWORDS, 4)
+    match kind:
+        case "n":
+            a, b = rng.randint(1, 100), rng.randint(1, 100)
+            right = f"{(a + b) / 2:.1f}"
+            wrong = [f"{(a + b) / 2 + d:.1f}" for d in (-1, 0.5, 1, 10)]
+            if lang == "de":
+                right, wrong = right.replace(".", ","), [w.replace(".", ",") for w in wrong]
+            return Variant(
+                f"Variant {v}: What is the mean of {a} and {b}?",
+                [("", [right, *wrong])],
+                single,
+                difficulty,
+            )
+        case "tf":
+            answer = rng.choice([true, false])
+            return Variant(
+                f"Variant {v}: The clause {keywords[0]} is evaluated before {keywords[1]}.",
+                [("", [answer, false if answer == true else true])],
+                single,
+                difficulty,
+            )
+        case "mc":
+            return Variant(
+                f"Variant {v}: Which clause is evaluated first?: {'; '.join(keywords)}",
+                [("", keywords)],
+                single,
+                difficulty,
+            )
+        case "mtf":
+            statements = [f"{keyword} is evaluated first in variant {v}" for keyword in keywords]
+            return Variant(
+                f"Variant {v}: Decide for each statement. {'; '.join(statements)}",
+                [(statement, rng.sample([true, false], 2)) for statement in statements],
+                labeled,
+                difficulty,
+            )
+        case "dd":
+            return Variant(
+                f"Variant {v}: Match each keyword to its language. "
+                f"{{{', '.join(keywords)}}} -> {{{', '.join(CATEGORIES)}}}",
+                [(keyword, rng.sample(CATEGORIES, len(CATEGORIES))) for keyword in keywords],
+                dropdown,
+                difficulty,
+            )
+        case "mw":
+            return Variant(
+                f"Variant {v}: The clauses of a query are [[1]] [[2]] [[3]].",
+                [(str(i), [keywords[i], *keywords[3:], "PROJECT"]) for i in range(3)],
+                braced,
+                difficulty,
+            )
+        case "cloze":
+            value = rng.randint(1, 1000)
+            return Variant(
+                f"Variant {v}: The price is _____ Euro and the first clause is _____.",
+                [
+                    ("part 1", [str(value), str(value + 1), str(value * 10)]),
+                    ("part 2", keywords),
+                ],
+                labeled,
+                difficulty,
+            )
+    raise ValueError(f"Unsupported analysis type: {kind}")
+
+
+def default_questions(per_type: int = 1) -> list[tuple[str, str]]:
+    """Assign question numbers to analysis types.
+
+    Args:
+        per_type: Number of questions per analysis type.
+
+    Returns:
+        list[tuple[str, str]]: Question number and analysis type of each question.
+    """
+    kinds = [kind for kind in ANALYSIS_TYPES for _ in range(per_type)]
+    return [(str(i), kind) for i, kind in enumerate(kinds, start=1)]
+
+
+def create_handlers(questions: list[tuple[str, str]]) -> list[QuestionAnalysis]:
+    """Create an analysis handler for each question."""
+    return [ANALYSIS_TYPES[kind](question_id) for question_id, kind in questions]
+
+
+def generate_responses(
+    file: TextIO,
+    rows: int,
+    questions: list[tuple[str, str]],
+    lang: Language = "en",
+    variants: int = 5,
+    seed: int = 0,
+) -> None:
+    """Write a synthetic responses export as CSV.
+
+    Args:
+        file: The output file.
+        rows: Number of quiz attempts.
+        questions: Question number and analysis type of each question.
+        lang: Language of the export.
+        variants: Number of variants per question.
+        seed: Seed for the random number generator.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    question_variants = {
+        question_id: [create_variant(kind, v, lang, rng) for v in range(variants)]
+        for question_id, kind in questions
+    }
+    state = "Finished" if lang == "en" else "Beendet"
+
+    writer = csv.writer(file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(
+        HEADERS[lang]
+        + [f"{column} {question_id}" for question_id, _ in questions for column in COLUMNS[lang]]
+    )
+    for i in range(rows):
+        row = [
+            f"Student{i}",
+            f"Test{i}",
+            f"student{i}@example.org",
+            state,
+            "1 January 2025  10:00 AM",
+            "1 January 2025  11:00 AM",
+            f"{rng.randint(10, 59)} mins",
+            f"{rng.uniform(0, 10):.2f}".replace(".", "," if lang == "de" else "."),
+        ]
+        for question_id, _ in questions:
+            variant = rng.choice(question_variants[question_id])
+            row.extend([variant.question, variant.response(rng), variant.right_answer])
+        writer.writerow(row)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n", "--rows", default=1000, type=int, help="Number of rows (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--lang", default="en", choices=["en", "de"], help="Language (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--per-type",
+        default=1,
+        type=int,
+        help="Number of questions per analysis type (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--variants",
+        default=5,
+        type=int,
+        help="Number of variants per question (default: %(default)s)",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Random seed (default: %(default)s)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=sys.stdout,
+        type=argparse.FileType("w", encoding="utf-8-sig"),
+        help="Output file (default: stdout)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Write a synthetic responses export and print the matching analyze-results arguments."""
+    args = parse_args()
+    questions = default_questions(args.per_type)
+    generate_responses(args.output, args.rows, questions, args.lang, args.variants, args.seed)
+    arguments = {
+        kind: [question_id for question_id, other in questions if other == kind]
+        for kind in ANALYSIS_TYPES
+    }
+    print(
+        "analyze-results "
+        + " ".join(f"--{kind} {' '.join(ids)}" for kind, ids in arguments.items() if ids),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
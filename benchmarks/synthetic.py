@@ -0,0 +1,383 @@
+"""Generate synthetic question banks for benchmarks.
+
+Every supported question type has a factory that creates the i-th question of a bank. The
+questions use Markdown tables and inlined images, like the questions of a real course, and
+CodeRunner questions work on DuckDB databases and CSV streams that are generated on the fly.
+"""
+
+import csv
+import random
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from moodle_tools.questions.factory import SUPPORTED_QUESTION_TYPES
+
+ASSETS = "assets"
+IMAGE = f"{ASSETS}/diagram.svg"
+DATABASE = f"{ASSETS}/eshop.db"
+EMPTY_DATABASE = f"{ASSETS}/empty.db"
+STREAM = f"{ASSETS}/stream.csv"
+
+SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="120" height="60">'
+    '<rect width="120" height="60" fill="steelblue"/></svg>\n'
+)
+
+BRANDS = ["Audi", "BMW", "DAF", "Nissan", "Skoda", "Volvo", "VW"]
+
+
+def question_text(i: int, rng: random.Random, suffix: str = "") -> str:
+    """Create a Markdown question text with a table and an image."""
+    rows = "\n".join(f"| {j} | {rng.choice(BRANDS)} | {rng.randint(1, 50000)} |" for j in range(5))
+    return (
+        f"Question {i}: Consider the relation *Produkt* below.\n\n"
+        f"| Id | Name | Preis |\n|---:|------|------:|\n{rows}\n\n"
+        f"![Diagram {i}]({IMAGE})\n\n"
+        f"Which statement about the **cheapest** product is correct?{suffix}"
+    )
+
+
+def true_false(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "correct_answer": rng.random() < 0.5,
+        "general_feedback": "General feedback",
+        "correct_feedback": "Correct feedback",
+        "incorrect_feedback": "Wrong feedback",
+    }
+
+
+def multiple_true_false(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "answers": [
+            {"answer": f"Statement {j}", "choice": rng.random() < 0.5, "feedback": "Feedback"}
+            for j in range(4)
+        ],
+    }
+
+
+def multiple_choice(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "answers": [
+            {"answer": f"Answer {j} with `code`", "points": 100 if j == 0 else 0}
+            for j in range(rng.randint(3, 6))
+        ],
+    }
+
+
+def cloze(i: int, rng: random.Random) -> dict[str, Any]:
+    value = rng.randint(1, 1000)
+    return {
+        "question": question_text(
+            i,
+            rng,
+            f"\n\nThe price is {{1:NUMERICAL:={value}:0.5~%50%{value + 1}:1}} Euro and the"
+            " cheapest brand is {1:MULTICHOICE:=Audi~BMW~VW}.",
+        ),
+        "general_feedback": "General feedback",
+    }
+
+
+def numerical(i: int, rng: random.Random) -> dict[str, Any]:
+    value = rng.randint(1, 1000)
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "answers": [
+            {"answer": value, "tolerance": 0, "points": 100, "feedback": "Correct"},
+            {"answer": value + 1, "tolerance": 0.5, "points": 50, "feedback": "Almost"},
+        ],
+    }
+
+
+def missing_words(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng, "\n\nThe clauses are: [[1]] [[2]] [[3]]"),
+        "general_feedback": "General feedback",
+        "correct_feedback": "Correct feedback",
+        "partial_feedback": "Partial feedback",
+        "incorrect_feedback": "Incorrect feedback",
+        "options": [
+            {"answer": answer, "group": group}
+            for answer, group in [("SELECT", 1), ("FROM", 1), ("WHERE", 2), ("PROJECT", 1)]
+        ],
+    }
+
+
+def description(i: int, rng: random.Random) -> dict[str, Any]:
+    return {"question": question_text(i, rng)}
+
+
+def shortanswer(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "answers": [
+            {"answer": rng.choice(BRANDS), "points": 100, "feedback": "Correct"},
+            {"answer": "*", "points": 0, "feedback": "Wrong"},
+        ],
+    }
+
+
+def matching(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "options": [
+            {"question": "SELECT", "answer": "DQL"},
+            {"question": "ALTER", "answer": "DDL"},
+            {"question": "INSERT", "answer": "DML"},
+            {"answer": "DCL"},
+        ],
+    }
+
+
+def essay(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "response_format": "editor",
+        "text_response": {"required": True, "min_words": 50, "max_words": 500},
+        "grader_info": "Grade generously.",
+    }
+
+
+def ordering(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "General feedback",
+        "answers": ["SELECT", "DISTINCT", "FROM", "WHERE", "GROUP BY", "HAVING"],
+    }
+
+
+def dragdrop_missing_words(i: int, rng: random.Random) -> dict[str, Any]:
+    return missing_words(i, rng)
+
+
+def stack(i: int, rng: random.Random) -> dict[str, Any]:
+    branch = {"score_mode": "set", "score": 1}
+    return {
+        "question": question_text(i, rng, '\n\nSimplify $x + x$: [["ans1"]]'),
+        "general_feedback": "General feedback",
+        "input_variables": ["tans: 2*x"],
+        "correct_feedback": "Correct feedback",
+        "partial_feedback": "Partial feedback",
+        "incorrect_feedback": "Incorrect feedback",
+        "inputs": {"ans1": {"type": "algebraic", "matching_answer_variable": "tans", "width": 15}},
+        "response_trees": {
+            "prt1": {
+                "max_points": 1,
+                "nodes": {
+                    0: {
+                        "test_type": "ALG_EQUIV",
+                        "received_answer": "ans1",
+                        "expected_answer": "tans",
+                        "true_branch": branch,
+                        "false_branch": branch | {"score": 0},
+                    }
+                },
+            }
+        },
+    }
+
+
+def set_equality(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng, "\n\n[[ANSWERBOX]]"),
+        "expected_set": [f"{{{rng.choice(BRANDS)}, {j}}}" for j in range(3)],
+    }
+
+
+def sql_dql(i: int, rng: random.Random) -> dict[str, Any]:
+    threshold = rng.randint(0, 90000)
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "A query was submitted",
+        "database_path": DATABASE,
+        "parser": "sqlparse",
+        "answer": (
+            f"SELECT Name, Preis FROM Produkt WHERE Preis BETWEEN {threshold} AND "  # noqa: S608
+            f"{threshold + 500} ORDER BY Preis DESC, Name;"
+        ),
+        "testcases": [
+            {"code": ""},
+            {"code": f"INSERT INTO Produkt VALUES (-{i + 1}, 'Audi', {threshold + 1});"},  # noqa: S608
+            {"code": f"DELETE FROM Produkt WHERE Preis > {threshold + 50000};"},  # noqa: S608
+        ],
+    }
+
+
+def sql_ddl(i: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        "question": question_text(i, rng),
+        "general_feedback": "A statement was submitted",
+        "database_path": EMPTY_DATABASE,
+        "parser": "sqlparse",
+        "answer": f"CREATE TABLE t{i} (id INTEGER PRIMARY KEY, name TEXT NOT NULL);",
+        "testcases": [
+            {"description": "Runtime errors", "code": "SELECT 1;"},
+            {"description": "Insert", "code": f"INSERT INTO t{i} VALUES (1, 'a');"},  # noqa: S608
+            {"description": "Table", "code": f"MT_testtablecorrectness t{i}"},
+        ],
+    }
+
+
+def isda_streaming(i: int, rng: random.Random) -> dict[str, Any]:
+    stream = Path(STREAM).name
+    testcases = []
+    for _ in range(3):
+        start = rng.randint(0, 500)
+        testcases.append(
+            {
+                "code": (
+                    f'data_stream = TimedStream().from_csv("{stream}", {start}, {start + 50})\n'
+                    "print(pipeline(data_stream))"
+                )
+            }
+        )
+    return {
+        "question": question_text(i, rng),
+        "input_stream": STREAM,
+        "answer": (
+            "def get_velocity(stream_element: tuple) -> int:\n"
+            "    return stream_element[1]\n\n"
+            "def pipeline(input_stream: TimedStream) -> TimedStream:\n"
+            f"    return input_stream.filter(lambda e: e[1] > {rng.randint(60, 160)})"
+            ".map(get_velocity)"
+        ),
+        "testcases": testcases,
+    }
+
+
+QUESTION_FACTORIES: dict[str, Callable[[int, random.Random], dict[str, Any]]] = {
+    "true_false": true_false,
+    "multiple_true_false": multiple_true_false,
+    "multiple_choice": multiple_choice,
+    "cloze": cloze,
+    "numerical": numerical,
+    "missing_words": missing_words,
+    "description": description,
+    "shortanswer": shortanswer,
+    "matching": matching,
+    "essay": essay,
+    "ordering": ordering,
+    "dragdrop_missing_words": dragdrop_missing_words,
+    "stack": stack,
+    "sql_ddl": sql_ddl,
+    "sql_dql": sql_dql,
+    "isda_streaming": isda_streaming,
+    "diff_set_equality": set_equality,
+    "exact_set_equality": set_equality,
+}
+
+
+def available_question_types() -> list[str]:
+    """List all question types that are supported in the current environment."""
+    return [
+        question_type
+        for question_type in QUESTION_FACTORIES
+        if question_type in SUPPORTED_QUESTION_TYPES
+    ]
+
+
+def generate_documents(question_type: str, size: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Generate a list of synthetic YAML documents of one question type.
+
+    Args:
+        question_type: The question type.
+        size: Number of questions.
+        seed: Seed for the random number generator.
+
+    Returns:
+        list[dict[str, Any]]: The generated documents.
+    """
+    rng = random.Random(f"{question_type}-{seed}")  # noqa: S311
+    return [
+        {
+            "type": question_type,
+            "category": f"benchmark/{question_type}",
+            "title": f"{question_type} question {i}",
+        }
+        | QUESTION_FACTORIES[question_type](i, rng)
+        for i in range(size)
+    ]
+
+
+def generate_database(path: Path, rows: int) -> None:
+    """Generate a DuckDB database with a table `Produkt` of the given size."""
+    import duckdb  # noqa: PLC0415
+
+    path.unlink(missing_ok=True)
+    with duckdb.connect(path) as con:
+        con.sql("CREATE TABLE Produkt (Id INTEGER PRIMARY KEY, Name VARCHAR, Preis INTEGER);")
+        con.sql(
+            "INSERT INTO Produkt SELECT i, 'Product ' || i, (i * 7919) % 100000 "  # noqa: S608
+            f"FROM range({rows}) t(i);"
+        )
+
+
+def generate_stream(path: Path, rows: int, seed: int = 0) -> None:
+    """Generate a CSV file in the format of the `autobahn.csv` example stream."""
+    rng = random.Random(seed)  # noqa: S311
+    with path.open("w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_NONNUMERIC)
+        for i in range(rows):
+            writer.writerow(
+                [
+                    i % 3 + 1,
+                    rng.randint(60, 220),
+                    rng.choice(["lkw", "pkw"]),
+                    rng.choice(BRANDS),
+                    1590969600.0 + i,
+                ]
+            )
+
+
+def generate_bank(
+    directory: Path,
+    question_types: list[str],
+    size: int,
+    rows: int = 10_000,
+    seed: int = 0,
+) -> dict[str, Path]:
+    """Write a synthetic question bank with one YAML file per question type.
+
+    Args:
+        directory: The output directory.
+        question_types: The question types to generate.
+        size: Number of questions per question type.
+        rows: Number of rows of generated databases and streams.
+        seed: Seed for the random number generator.
+
+    Returns:
+        dict[str, Path]: The YAML file of each question type.
+    """
+    assets = directory / ASSETS
+    assets.mkdir(parents=True, exist_ok=True)
+    (directory / IMAGE).write_text(SVG, encoding="utf-8")
+    if "sql_dql" in question_types:
+        generate_database(directory / DATABASE, rows)
+    if "sql_ddl" in question_types:
+        generate_database(directory / EMPTY_DATABASE, 0)
+    if "isda_streaming" in question_types:
+        generate_stream(directory / STREAM, rows, seed)
+
+    files = {}
+    for question_type in question_types:
+        path = directory / f"{question_type}.yaml"
+        with path.open("w", encoding="utf-8") as file:
+            yaml.safe_dump_all(
+                generate_documents(question_type, size, seed),
+                file,
+                allow_unicode=True,
+                sort_keys=False,
+            )
+        files[question_type] = path
+    return files
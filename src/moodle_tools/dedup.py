@@ -0,0 +1,285 @@
+"""Detection of duplicate and near-duplicate questions.
+
+The content of a question, i.e., its text, answers, options, subquestions, and testcases, is
+normalized by removing HTML tags, case, and redundant whitespace. Feedback, titles, categories,
+and grades are ignored. Questions with the same question type and the same normalized content
+are exact duplicates. Near-duplicates are found with MinHash signatures of the word shingles of
+the content and locality-sensitive hashing (LSH): only questions that share a band of their
+signatures are compared, so that the cost grows nearly linearly with the number of questions.
+
+Questions that are defined by the same YAML document, i.e., variants and the public and internal
+copy of a question, are similar by design and not compared with each other, if their locations
+are known.
+"""
+
+import hashlib
+import html
+import json
+import re
+import struct
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from loguru import logger
+
+from moodle_tools.questions.question import Question
+
+DedupMode = Literal["report", "drop"]
+
+# Attributes of questions that contain the question text, answers, and testcases
+CONTENT_FIELDS = (
+    "question",
+    "answers",
+    "choices",
+    "options",
+    "subquestions",
+    "testcases",
+    "answer",
+    "answer_preload",
+)
+SHINGLE_SIZE = 3
+BANDS = 16
+ROWS = 4  # Per band; 16 bands of 4 rows find pairs with a similarity of 0.7 with 99% probability
+SIGNATURE = struct.Struct(f"<{BANDS * ROWS}I")
+
+re_image = re.compile(r"<img\b[^>]*?\bsrc=\"([^\"]*)\"[^>]*>", re.IGNORECASE)
+re_tag = re.compile(r"<[^>]*>")
+re_whitespace = re.compile(r"\s+")
+re_token = re.compile(r"\w+|[^\w\s]")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison.
+
+    HTML tags are removed, images are replaced by a hash of their source, entities are
+    unescaped, and the text is lowercased with single spaces between words.
+
+    Args:
+        text: The text, e.g., HTML generated from Markdown.
+
+    Returns:
+        str: The normalized text.
+    """
+    text = re_image.sub(
+        lambda match: f" image:{hashlib.sha256(match.group(1).encode()).hexdigest()[:16]} ", text
+    )
+    text = html.unescape(re_tag.sub(" ", text))
+    return re_whitespace.sub(" ", text).strip().lower()
+
+
+def normalize_content(value: Any) -> Any:  # noqa: ANN401
+    """Normalize all texts of the content of a question and remove feedback."""
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, Mapping):
+        return {
+            str(key): normalize_content(item)
+            for key, item in value.items()
+            if "feedback" not in str(key)
+        }
+    if isinstance(value, list | tuple):
+        return [normalize_content(item) for item in value]
+    if value is None or isinstance(value, bool | int | float):
+        return value
+    return normalize_text(str(value))
+
+
+def flatten_content(value: Any) -> list[str]:  # noqa: ANN401
+    """Get all texts and numbers of normalized content in order."""
+    if isinstance(value, dict):
+        return [text for key in sorted(value) for text in flatten_content(value[key])]
+    if isinstance(value, list):
+        return [text for item in value for text in flatten_content(item)]
+    return [] if value is None or value == "" else [str(value)]
+
+
+def document_of(location: str) -> str:
+    """Get the YAML document of a location, e.g., `quiz.yaml:3` for `quiz.yaml:3.2`."""
+    source, _, document = location.rpartition(":")
+    return f"{source}:{document.partition('.')[0]}"
+
+
+def minhash(shingles: Iterable[str]) -> list[int]:
+    """Compute the MinHash signature of a set of shingles.
+
+    Instead of permuting one hash of each shingle, the independent hash functions are taken
+    from a single SHAKE-128 digest, which is faster in Python.
+    """
+    hashes = [
+        SIGNATURE.unpack(hashlib.shake_128(shingle.encode()).digest(SIGNATURE.size))
+        for shingle in shingles
+    ]
+    return list(map(min, zip(*hashes, strict=True)))
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """The normalized content of a question.
+
+    Attributes:
+        sha256: Hash of the question type and the normalized content.
+        shingles: Word shingles of the normalized content.
+    """
+
+    sha256: str
+    shingles: frozenset[str]
+
+    @classmethod
+    def from_question(cls, question: Question) -> "Fingerprint":
+        """Compute the fingerprint of a question."""
+        content = {
+            name: normalize_content(getattr(question, name))
+            for name in CONTENT_FIELDS
+            if hasattr(question, name)
+        }
+        canonical = json.dumps(
+            [question.QUESTION_TYPE, content], sort_keys=True, ensure_ascii=False, default=str
+        )
+        tokens = re_token.findall(" ".join(flatten_content(content)))
+        shingles = frozenset(
+            " ".join(tokens[i : i + SHINGLE_SIZE])
+            for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+        )
+        return cls(hashlib.sha256(canonical.encode("utf-8")).hexdigest(), shingles - {""})
+
+    def similarity(self, other: "Fingerprint") -> float:
+        """Compute the Jaccard similarity of the shingles of two fingerprints."""
+        if not self.shingles or not other.shingles:
+            return float(self.sha256 == other.sha256)
+        return len(self.shingles & other.shingles) / len(self.shingles | other.shingles)
+
+
+@dataclass(frozen=True)
+class Duplicate:
+    """A question that duplicates an earlier question.
+
+    Attributes:
+        question: The duplicate.
+        original: The earlier question.
+        similarity: Jaccard similarity of their content, 1.0 for exact duplicates.
+        exact: The normalized content of both questions is identical.
+    """
+
+    question: Question
+    original: Question
+    similarity: float
+    exact: bool
+
+
+def find_duplicates(
+    questions: Sequence[Question],
+    *,
+    threshold: float = 0.8,
+    locations: Mapping[Question, str] | None = None,
+) -> list[Duplicate]:
+    """Find questions that duplicate earlier questions.
+
+    Each question is compared with the earlier questions that are not duplicates themselves.
+
+    Args:
+        questions: The questions.
+        threshold: Minimum Jaccard similarity of near-duplicates. With a threshold of 1.0, only
+            exact duplicates are found (default 0.8).
+        locations: The location of each question as `file:document` or
+            `file:document.variant`. Questions of the same document are not compared
+            (default None).
+
+    Returns:
+        list[Duplicate]: The duplicates in the order of the questions.
+
+    Raises:
+        ValueError: If the threshold is not between 0 (exclusive) and 1 (inclusive).
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"The similarity threshold must be between 0 and 1, got {threshold}.")
+    documents = {
+        question: document_of(location) for question, location in (locations or {}).items()
+    }
+    exact: dict[str, list[int]] = defaultdict(list)
+    buckets: dict[tuple[int, tuple[int, ...]], list[int]] = defaultdict(list)
+    fingerprints: list[Fingerprint] = []
+    duplicates = []
+
+    def sibling(i: int, j: int) -> bool:
+        document = documents.get(questions[i])
+        return document is not None and document == documents.get(questions[j])
+
+    for i, question in enumerate(questions):
+        fingerprint = Fingerprint.from_question(question)
+        fingerprints.append(fingerprint)
+        original = next((j for j in exact[fingerprint.sha256] if not sibling(i, j)), None)
+        if original is not None:
+            duplicates.append(Duplicate(question, questions[original], 1.0, True))
+            continue
+
+        bands = []
+        if threshold < 1.0 and fingerprint.shingles:
+            signature = minhash(fingerprint.shingles)
+            bands = [
+                (band, tuple(signature[band * ROWS : (band + 1) * ROWS])) for band in range(BANDS)
+            ]
+            candidates = {j for band in bands for j in buckets.get(band, ())}
+            similarities = [
+                (fingerprint.similarity(fingerprints[j]), j)
+                for j in sorted(candidates)
+                if questions[j].QUESTION_TYPE == question.QUESTION_TYPE and not sibling(i, j)
+            ]
+            if similarities:
+                # The most similar candidate, the earliest one of equally similar candidates
+                similarity, original = max(similarities, key=lambda item: item[0])
+                if similarity >= threshold:
+                    duplicates.append(Duplicate(question, questions[original], similarity, False))
+                    continue
+
+        exact[fingerprint.sha256].append(i)
+        for band in bands:
+            buckets[band].append(i)
+    return duplicates
+
+
+def deduplicate(
+    questions: list[Question],
+    mode: DedupMode = "report",
+    *,
+    threshold: float = 0.8,
+    locations: Mapping[Question, str] | None = None,
+) -> list[Question]:
+    """Log duplicate and near-duplicate questions and optionally drop them.
+
+    Args:
+        questions: The questions.
+        mode: Only `report` duplicates or also `drop` them (default "report").
+        threshold: Minimum similarity of near-duplicates, see `find_duplicates` (default 0.8).
+        locations: The location of each question, see `find_duplicates` (default None).
+
+    Returns:
+        list[Question]: The questions without duplicates if they are dropped, otherwise all
+            questions.
+    """
+    locations = locations or {}
+    duplicates = find_duplicates(questions, threshold=threshold, locations=locations)
+    for duplicate in duplicates:
+        logger.warning(
+            "Question '{}' ({}) is {} of question '{}' ({}).",
+            duplicate.question.title,
+            locations.get(duplicate.question, duplicate.question.category),
+            "a duplicate"
+            if duplicate.exact
+            else f"a near-duplicate (similarity {duplicate.similarity:.2f})",
+            duplicate.original.title,
+            locations.get(duplicate.original, duplicate.original.category),
+        )
+    exact = sum(duplicate.exact for duplicate in duplicates)
+    logger.info(
+        "Found {} duplicates and {} near-duplicates among {} questions.",
+        exact,
+        len(duplicates) - exact,
+        len(questions),
+    )
+    if mode == "report" or not duplicates:
+        return questions
+    dropped = {id(duplicate.question) for duplicate in duplicates}
+    logger.info("Dropped {} duplicate questions.", len(dropped))
+    return [question for question in questions if id(question) not in dropped]
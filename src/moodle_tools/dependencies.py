@@ -0,0 +1,85 @@
+"""Tracking of the files that questions depend on.
+
+The module provides a global `dependency_tracker`. Code that reads a file while loading a
+question, e.g., an included YAML file, an image, or a database, calls
+`dependency_tracker.record(path)`, which does nothing unless a caller tracks dependencies with
+`dependency_tracker.track()`. The watch mode of `make-questions` uses the recorded files to
+decide which input files have to be rebuilt after a change.
+"""
+
+import contextlib
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def modification_time(path: Path) -> int | None:
+    """Get the modification time of a file in nanoseconds, or None if it does not exist."""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class DependencyTracker:
+    """Collect the files that are read while loading questions."""
+
+    def __init__(self) -> None:
+        self.files: set[Path] | None = None
+
+    def record(self, path: str | os.PathLike[str]) -> None:
+        """Record that the current input depends on a file.
+
+        Args:
+            path: The file. Relative paths are resolved against the current working directory.
+        """
+        if self.files is not None:
+            self.files.add(Path(path).absolute())
+
+    @contextlib.contextmanager
+    def track(self) -> Iterator[set[Path]]:
+        """Collect the files that are recorded in the enclosed code.
+
+        Files that are recorded in nested `track` blocks are also added to the outer block.
+
+        Yields:
+            set[Path]: The absolute paths of the recorded files.
+        """
+        previous, self.files = self.files, set()
+        files = self.files
+        try:
+            yield files
+        finally:
+            self.files = previous
+            if previous is not None:
+                previous.update(files)
+
+    def iterate(self, iterable: Iterable[T], files: set[Path]) -> Iterator[T]:
+        """Collect the files that are recorded while producing the items of an iterable.
+
+        In contrast to `track`, the files recorded by the consumer of the items are not
+        collected, e.g., the files read while constructing the questions of parsed documents.
+
+        Args:
+            iterable: The iterable, e.g., a YAML parser.
+            files: The set to add the absolute paths of the recorded files to.
+
+        Yields:
+            Iterator[T]: The same items.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.track() as recorded:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    files.update(recorded)
+            yield item
+
+
+dependency_tracker = DependencyTracker()
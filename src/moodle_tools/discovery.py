@@ -0,0 +1,193 @@
+"""Discovery of YAML question files in input folders.
+
+Folders are scanned concurrently with `os.scandir`. Hidden files and folders, e.g., `.git`, and
+folders of tools, e.g., `node_modules`, are skipped. Further files and folders can be excluded
+with `.moodletoolsignore` files, which use the syntax of `.gitignore` files and apply to the
+folder that contains them and all of its subfolders.
+"""
+
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+IGNORE_FILE = ".moodletoolsignore"
+IGNORED_DIRECTORIES = frozenset({"__pycache__", "node_modules", "site-packages", "venv"})
+QUESTION_SUFFIXES = (".yml", ".yaml")
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate a glob pattern of an ignore file into a regular expression.
+
+    `**` matches any number of folders, `*` and `?` match any characters except `/`.
+
+    Args:
+        pattern: The glob pattern.
+
+    Returns:
+        str: The regular expression.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 2)) != -1:
+            content = pattern[i + 1 : end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            regex += "[" + content.replace("\\", "\\\\") + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+@dataclass(frozen=True)
+class IgnorePattern:
+    """A pattern of an ignore file.
+
+    Attributes:
+        regex: Matches paths relative to the folder of the ignore file.
+        base: The folder of the ignore file.
+        negated: The pattern includes paths that have been excluded by previous patterns.
+        directory_only: The pattern only matches folders.
+    """
+
+    regex: re.Pattern[str]
+    base: Path
+    negated: bool
+    directory_only: bool
+
+    @classmethod
+    def from_line(cls, line: str, base: Path) -> "IgnorePattern | None":
+        """Parse a line of an ignore file.
+
+        Args:
+            line: The line.
+            base: The folder of the ignore file.
+
+        Returns:
+            IgnorePattern | None: The pattern, or None for blank lines and comments.
+        """
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negated = line.startswith("!")
+        line = line.removeprefix("!").removeprefix("\\")
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Patterns without a slash match at any level, other patterns relative to the base
+        anchored = "/" in line
+        regex = translate_pattern(line.removeprefix("/"))
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        return cls(re.compile(f"{regex}(?:/.*)?"), base, negated, directory_only)
+
+    def match(self, path: Path, is_dir: bool) -> bool:
+        """Check whether the pattern matches a path below its base folder."""
+        if self.directory_only and not is_dir:
+            return False
+        return self.regex.fullmatch(path.relative_to(self.base).as_posix()) is not None
+
+
+@dataclass(frozen=True)
+class IgnoreRules:
+    """The ignore patterns that apply to a folder.
+
+    Attributes:
+        patterns: Patterns of the ignore files in the folder and its parent folders. Later
+            patterns take precedence.
+    """
+
+    patterns: tuple[IgnorePattern, ...] = ()
+
+    def extend(self, directory: Path) -> "IgnoreRules":
+        """Add the patterns of the ignore file in a folder, if it exists."""
+        try:
+            lines = (directory / IGNORE_FILE).read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return self
+        patterns = [IgnorePattern.from_line(line, directory) for line in lines]
+        return IgnoreRules(self.patterns + tuple(pattern for pattern in patterns if pattern))
+
+    def ignored(self, path: Path, is_dir: bool) -> bool:
+        """Check whether a path is excluded by the last pattern that matches it."""
+        for pattern in reversed(self.patterns):
+            if pattern.match(path, is_dir):
+                return not pattern.negated
+        return False
+
+
+def scan_directory(
+    directory: Path, rules: IgnoreRules
+) -> tuple[list[Path], list[tuple[Path, IgnoreRules]]]:
+    """Scan a single folder for question files.
+
+    Args:
+        directory: The folder.
+        rules: The ignore rules of the parent folder.
+
+    Returns:
+        tuple[list[Path], list[tuple[Path, IgnoreRules]]]: The question files in the folder and
+            the subfolders to scan, together with the rules that apply to them.
+    """
+    rules = rules.extend(directory)
+    files = []
+    directories = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                path = directory / entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRECTORIES and not rules.ignored(path, True):
+                        directories.append((path, rules))
+                elif entry.name.endswith(QUESTION_SUFFIXES) and not rules.ignored(path, False):
+                    files.append(path)
+    except OSError as e:
+        logger.debug("Cannot scan {}: {}", directory, e)
+    return files, directories
+
+
+def discover_files(directory: Path, max_workers: int | None = None) -> list[Path]:
+    """Find all question files in a folder and its subfolders.
+
+    Args:
+        directory: The folder.
+        max_workers: Number of threads that scan folders concurrently (default: chosen by
+            `ThreadPoolExecutor`).
+
+    Returns:
+        list[Path]: The question files in a deterministic order.
+    """
+    files: list[Path] = []
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending: set[Future[tuple[list[Path], list[tuple[Path, IgnoreRules]]]]] = {
+            executor.submit(scan_directory, directory, IgnoreRules())
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, directories = future.result()
+                files.extend(found)
+                pending.update(
+                    executor.submit(scan_directory, subdirectory, rules)
+                    for subdirectory, rules in directories
+                )
+    return sorted(files)
@@ -34,6 +34,24 @@ class DisplayFormatEnum(StrEnum):
         return cls[value.upper()] if value else cls.NONE
 
 
+class InputStreamMode(StrEnum):
+    CWD = auto()
+    TEMPDIR = auto()
+
+    @classmethod
+    def from_str(cls, value: str) -> "InputStreamMode":
+        return cls[value.upper()] if value else cls.CWD
+
+
+class ConnectionMode(StrEnum):
+    PER_TESTCASE = auto()
+    PER_RUN = auto()
+
+    @classmethod
+    def from_str(cls, value: str) -> "ConnectionMode":
+        return cls[value.upper()] if value else cls.PER_TESTCASE
+
+
 class EditorType(StrEnum):
     NOINLINE = auto()
     PLAIN = auto()
@@ -0,0 +1,522 @@
+"""A persistent SQLite index of built questions.
+
+The module provides a global `question_recorder` that is disabled by default. While it is
+enabled, e.g., with the `--index` flag of `make-questions`, the loader records the location,
+type, dependencies, and build duration of each question, and the rendering records the hash of
+its Moodle XML. `QuestionIndex` stores the recorded questions in an SQLite database, so that
+questions can be looked up by title, category, type, file, hash, or dependency without
+rebuilding the question bank. The `query-index` command prints the results of such lookups.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+import weakref
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
+
+from loguru import logger
+
+from moodle_tools.questions.question import Question
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT,
+    file TEXT NOT NULL,
+    document TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    duration REAL NOT NULL,
+    built_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_title ON questions (title);
+CREATE INDEX IF NOT EXISTS questions_type ON questions (type);
+CREATE INDEX IF NOT EXISTS questions_category ON questions (category);
+CREATE INDEX IF NOT EXISTS questions_file ON questions (file, document);
+CREATE INDEX IF NOT EXISTS questions_sha256 ON questions (sha256);
+CREATE TABLE IF NOT EXISTS dependencies (
+    path TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    PRIMARY KEY (path, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dependencies_question_id ON dependencies (question_id);
+"""
+
+
+@dataclass
+class IndexEntry:
+    """A built question.
+
+    Attributes:
+        title: Title of the question.
+        type: Question type as in the YAML document, e.g., `true_false`.
+        category: Category of the question.
+        file: Absolute path of the YAML file.
+        document: Position of the question in the file, i.e., the index of its YAML document
+            and, for variants, the index of the variant, e.g., `3` or `3.2`.
+        sha256: Hash of the Moodle XML of the question.
+        duration: Time to load and render the question in seconds.
+        dependencies: Absolute paths of the files the question depends on, i.e., included
+            files, images, databases, and input streams.
+    """
+
+    title: str
+    type: str
+    category: str | None
+    file: str
+    document: str
+    sha256: str = ""
+    duration: float = 0.0
+    dependencies: list[str] = field(default_factory=list)
+
+
+def position(entry: IndexEntry) -> tuple[str, list[int]]:
+    """Get the sort key of a question by its file and its position in the file."""
+    return entry.file, [int(part) for part in entry.document.split(".")]
+
+
+class QuestionRecorder:
+    """Collect index entries of the questions that are built."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all recorded questions."""
+        self.pending: weakref.WeakKeyDictionary[Question, IndexEntry] = weakref.WeakKeyDictionary()
+        self.skipped_documents: dict[str, list[str]] = {}
+        self.files: set[str] = set()
+        self.filtered: set[tuple[str, str]] = set()
+        self.entries: list[IndexEntry] = []
+
+    def enable(self) -> None:
+        """Enable recording and discard previously recorded questions."""
+        self.enabled = True
+        self.reset()
+
+    def disable(self) -> None:
+        """Disable recording. Recorded questions are kept until the next `enable`."""
+        self.enabled = False
+
+    def loaded(
+        self,
+        question: Question,
+        location: str,
+        question_type: str,
+        duration: float,
+        dependencies: Iterable[Path],
+    ) -> None:
+        """Record a loaded question.
+
+        Args:
+            question: The question.
+            location: Location of the question as `file:document`.
+            question_type: Question type as in the YAML document.
+            duration: Time to load the question in seconds.
+            dependencies: Files read while constructing the question.
+        """
+        if not self.enabled:
+            return
+        # The file is resolved in `loaded_file`, since questions are loaded in its directory
+        file, _, document = location.rpartition(":")
+        self.pending[question] = IndexEntry(
+            question.title,
+            question_type,
+            question.category,
+            file,
+            document,
+            duration=duration,
+            dependencies=sorted(str(path) for path in dependencies),
+        )
+
+    def skipped(self, location: str) -> None:
+        """Record a question that was not loaded because it does not match the filter.
+
+        Args:
+            location: Location of the question as `file:document`.
+        """
+        if self.enabled:
+            file, _, document = location.rpartition(":")
+            self.skipped_documents.setdefault(file, []).append(document)
+
+    def loaded_file(
+        self, path: Path, questions: Iterable[Question], dependencies: Iterable[Path]
+    ) -> None:
+        """Record that all selected questions of a file have been loaded.
+
+        Args:
+            path: The YAML file.
+            questions: The questions of the file.
+            dependencies: Files read while parsing the file, which are added to all of its
+                questions.
+        """
+        if not self.enabled:
+            return
+        file = str(path.absolute())
+        self.files.add(file)
+        self.filtered.update(
+            (file, document) for document in self.skipped_documents.pop(str(path), [])
+        )
+        included = [str(dependency) for dependency in dependencies]
+        for question in questions:
+            if (entry := self.pending.get(question)) is not None:
+                entry.file = file
+                entry.title = question.title  # The title can be numbered after loading
+                entry.dependencies = sorted({*entry.dependencies, *included})
+
+    def rendered(self, question: Question, sha256: str, duration: float) -> None:
+        """Complete the entry of a loaded question after it has been rendered.
+
+        Args:
+            question: The question.
+            sha256: Hash of the Moodle XML of the question.
+            duration: Time to render the question in seconds.
+        """
+        if not self.enabled or (entry := self.pending.pop(question, None)) is None:
+            return
+        entry.sha256 = sha256
+        entry.duration += duration
+        self.entries.append(entry)
+
+
+question_recorder = QuestionRecorder()
+
+
+class QuestionIndex:
+    """An SQLite database of built questions.
+
+    Each question is stored with its title, type, category, YAML file, document position, hash,
+    build duration, and dependencies. All columns that questions are looked up by are indexed.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        """Open or create an index.
+
+        Args:
+            path: The database file, or `:memory:` for a temporary index.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def update(
+        self,
+        files: Iterable[str],
+        entries: Iterable[IndexEntry],
+        filtered: Iterable[tuple[str, str]] = (),
+    ) -> int:
+        """Replace the questions of rebuilt files.
+
+        The questions of files that were not rebuilt are kept, and so are the questions of
+        rebuilt files that were not selected by a filter. All other questions of rebuilt files
+        are removed, e.g., because they no longer exist or failed validation.
+
+        Args:
+            files: Absolute paths of the rebuilt files, including files without questions.
+            entries: The questions of the rebuilt files.
+            filtered: File and document position of the questions that were not selected.
+
+        Returns:
+            int: The number of added questions.
+        """
+        count = 0
+        built_at = time.time()
+        kept = set(filtered)
+        with self.connection:
+            for file in files:
+                rows = self.connection.execute(
+                    "SELECT id, document FROM questions WHERE file = ?", (file,)
+                ).fetchall()
+                self.connection.executemany(
+                    "DELETE FROM questions WHERE id = ?",
+                    [(row["id"],) for row in rows if (file, row["document"]) not in kept],
+                )
+            for entry in entries:
+                cursor = self.connection.execute(
+                    "INSERT INTO questions (title, type, category, file, document, sha256, "
+                    "duration, built_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.title,
+                        entry.type,
+                        entry.category,
+                        entry.file,
+                        entry.document,
+                        entry.sha256,
+                        entry.duration,
+                        built_at,
+                    ),
+                )
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO dependencies (path, question_id) VALUES (?, ?)",
+                    [(path, cursor.lastrowid) for path in entry.dependencies],
+                )
+                count += 1
+        return count
+
+    def _entries(self, query: str, parameters: Iterable[Any] = ()) -> Iterator[IndexEntry]:
+        for row in self.connection.execute(query, tuple(parameters)).fetchall():
+            dependencies = self.connection.execute(
+                "SELECT path FROM dependencies WHERE question_id = ? ORDER BY path", (row["id"],)
+            )
+            yield IndexEntry(
+                row["title"],
+                row["type"],
+                row["category"],
+                row["file"],
+                row["document"],
+                row["sha256"],
+                row["duration"],
+                [path for (path,) in dependencies],
+            )
+
+    def find(
+        self,
+        *,
+        title: str | None = None,
+        category: str | None = None,
+        question_type: str | None = None,
+        file: Path | str | None = None,
+        sha256: str | None = None,
+    ) -> list[IndexEntry]:
+        """Find questions that match all given criteria.
+
+        Args:
+            title: Title of the question.
+            category: Category of the question, including subcategories.
+            question_type: Question type as in the YAML document.
+            file: The YAML file.
+            sha256: Hash of the Moodle XML of the question.
+
+        Returns:
+            list[IndexEntry]: The questions ordered by file and position.
+        """
+        conditions = []
+        parameters: list[Any] = []
+        if title is not None:
+            conditions.append("title = ?")
+            parameters.append(title)
+        if category is not None:
+            # A range instead of LIKE, so that the index is used: '0' follows '/'
+            conditions.append("(category = ? OR (category > ? AND category < ?))")
+            parameters.extend([category, f"{category}/", f"{category}0"])
+        if question_type is not None:
+            conditions.append("type = ?")
+            parameters.append(question_type)
+        if file is not None:
+            conditions.append("file = ?")
+            parameters.append(str(Path(file).absolute()))
+        if sha256 is not None:
+            conditions.append("sha256 = ?")
+            parameters.append(sha256)
+        # The conditions are constants, only the parameters contain user input
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT * FROM questions {where}"  # noqa: S608
+        return sorted(self._entries(query, parameters), key=position)
+
+    def dependents(self, path: Path | str) -> list[IndexEntry]:
+        """Find the questions that depend on a file, e.g., a database.
+
+        Args:
+            path: The file.
+
+        Returns:
+            list[IndexEntry]: The questions ordered by file and position.
+        """
+        return sorted(
+            self._entries(
+                "SELECT questions.* FROM dependencies JOIN questions ON question_id = id "
+                "WHERE path = ?",
+                [str(Path(path).absolute())],
+            ),
+            key=position,
+        )
+
+    def query(
+        self,
+        *,
+        uses: Path | str | None = None,
+        titles: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+        types: Iterable[str] | None = None,
+    ) -> list[IndexEntry]:
+        """Find questions that match one of the values of each given criterion.
+
+        Args:
+            uses: Only questions that depend on this file (default None).
+            titles: Only questions with one of these titles (default None).
+            categories: Only questions in one of these categories, including subcategories
+                (default None).
+            types: Only questions of one of these question types (default None).
+
+        Returns:
+            list[IndexEntry]: The questions ordered by file and position.
+        """
+        conditions = []
+        parameters: list[Any] = []
+        for column, values in (("title", list(titles or [])), ("type", list(types or []))):
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                parameters.extend(values)
+        if categories := list(categories or []):
+            # Categories overlap with their subcategories, but each row is selected only once
+            alternatives = ["(category = ? OR (category > ? AND category < ?))"] * len(categories)
+            conditions.append(f"({' OR '.join(alternatives)})")
+            for category in categories:
+                parameters.extend([category, f"{category}/", f"{category}0"])
+        if uses is not None:
+            conditions.append("id IN (SELECT question_id FROM dependencies WHERE path = ?)")
+            parameters.append(str(Path(uses).absolute()))
+        # The conditions are constants, only the parameters contain user input
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return sorted(
+            self._entries(f"SELECT * FROM questions {where}", parameters),  # noqa: S608
+            key=position,
+        )
+
+    def duplicates(self) -> list[list[IndexEntry]]:
+        """Find groups of questions with identical Moodle XML.
+
+        Returns:
+            list[list[IndexEntry]]: The groups of at least two questions.
+        """
+        groups: dict[str, list[IndexEntry]] = {}
+        for entry in self._entries(
+            "SELECT * FROM questions WHERE sha256 IN "
+            "(SELECT sha256 FROM questions GROUP BY sha256 HAVING COUNT(*) > 1) "
+            "ORDER BY sha256"
+        ):
+            groups.setdefault(entry.sha256, []).append(entry)
+        return [sorted(group, key=position) for group in groups.values()]
+
+    def hashes(self) -> set[str]:
+        """Get the hashes of all questions, e.g., for a delta export."""
+        return {sha256 for (sha256,) in self.connection.execute("SELECT sha256 FROM questions")}
+
+
+def format_entries(entries: Iterable[IndexEntry]) -> str:
+    """Format questions as tab-separated lines of location, title, type, and category."""
+    return "\n".join(
+        f"{entry.file}:{entry.document}\t{entry.title}\t{entry.type}\t{entry.category or ''}"
+        for entry in entries
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Print the questions of a question index that was written by "
+        "make-questions --index."
+    )
+    parser.add_argument("index", type=Path, help="The question index")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=sys.stdout,
+        type=argparse.FileType("w", encoding="utf-8"),
+        help="Output file (default: stdout)",
+    )
+    parser.add_argument(
+        "--uses",
+        type=Path,
+        help="Only print questions that depend on this file, e.g., a database or an image",
+    )
+    parser.add_argument(
+        "-f",
+        "--filter",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Only print questions with one of these titles",
+    )
+    parser.add_argument(
+        "--filter-category",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Only print questions in one of these categories, including subcategories",
+    )
+    parser.add_argument(
+        "--filter-type",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Only print questions of one of these question types",
+    )
+    parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help="Print groups of questions with identical Moodle XML instead, separated by empty "
+        "lines (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    if args.duplicates and (args.uses or args.filter or args.filter_category or args.filter_type):
+        parser.error("--duplicates cannot be combined with --uses or filters")
+    return args
+
+
+def main() -> None:
+    """Run a query against a question index.
+
+    This function serves as the entry point of the CLI.
+
+    Raises:
+        SystemExit: If the question index cannot be read.
+    """
+    args = parse_args()
+    logger.remove()
+    logger.add(sys.stderr, format="{time:YYYY-MM-DD HH:mm:ss} | <level>{message}</level>")
+
+    if not args.index.is_file():
+        logger.error("Question index not found: {}", args.index)
+        sys.exit(1)
+    try:
+        with QuestionIndex(args.index) as index:
+            if args.duplicates:
+                groups = index.duplicates()
+            else:
+                groups = [
+                    index.query(
+                        uses=args.uses,
+                        titles=args.filter,
+                        categories=args.filter_category,
+                        types=args.filter_type,
+                    )
+                ]
+    except sqlite3.DatabaseError as e:
+        logger.error("Cannot read the question index {}: {}", args.index, e)
+        sys.exit(1)
+
+    output = "\n\n".join(format_entries(group) for group in groups if group)
+    if output:
+        print(output, file=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,37 +3,261 @@
 import argparse
 import contextlib
 import copy
+import cProfile
+import json
 import os
+import sqlite3
 import sys
-from collections.abc import Iterator
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache, partial
 from importlib.util import find_spec
+from itertools import repeat
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 import yaml
 from jinja2 import Environment, PackageLoader, select_autoescape
 from loguru import logger
 
+from moodle_tools.dedup import DedupMode, deduplicate
+from moodle_tools.dependencies import dependency_tracker, modification_time
+from moodle_tools.discovery import discover_files
+from moodle_tools.index import QuestionIndex, question_recorder
+from moodle_tools.output import (
+    Chunk,
+    ChunkedQuizWriter,
+    RenderedQuestion,
+    compression_available,
+    content_hash,
+    manifest_path,
+    read_manifest_hashes,
+    render_quiz,
+    write_manifest,
+    write_quiz,
+)
+from moodle_tools.profiling import profiler
 from moodle_tools.questions import create_question
 from moodle_tools.questions.question import Question
-from moodle_tools.utils import ParsingError
-from moodle_tools.yaml_constructors import construct_include_context, eval_context
+from moodle_tools.questions.schema import check_document, get_schemas
+from moodle_tools.utils import ParsingError, merge_defaults, parse_filesize
+from moodle_tools.variants import expand_variants
+from moodle_tools.yaml_constructors import ExpressionEvaluator, QuestionLoader, create_loader
 
 
-def load_questions(  # noqa: C901
+@dataclass
+class QuestionFilter:
+    """Select the questions to load before they are constructed.
+
+    A question is selected if it matches all given criteria and any of the values of each
+    criterion. Criteria that are None select all questions.
+
+    Attributes:
+        titles: Titles of the questions.
+        categories: Categories of the questions, including their subcategories.
+        types: Types of the questions, e.g., `sql_dql`.
+        files: Glob patterns of the input files, matched from the right like `Path.match`.
+    """
+
+    titles: list[str] | None = None
+    categories: list[str] | None = None
+    types: list[str] | None = None
+    files: list[str] | None = None
+
+    def __bool__(self) -> bool:
+        return any([self.titles, self.categories, self.types, self.files])
+
+    def match_file(self, path: Path) -> bool:
+        """Check whether an input file is selected."""
+        return not self.files or any(path.match(pattern) for pattern in self.files)
+
+    def match_document(self, document: dict[str, Any]) -> bool:
+        """Check whether the document of a question is selected."""
+        if self.titles and document["title"] not in self.titles:
+            return False
+        if self.types and document["type"] not in self.types:
+            return False
+        if self.categories:
+            category = document.get("category") or ""
+            return any(
+                category == selected or category.startswith(f"{selected.rstrip('/')}/")
+                for selected in self.categories
+            )
+        return True
+
+
+def format_validation_errors(document: dict[str, Any], errors: list[str]) -> str:
+    """Format a document and its validation errors for the log."""
+    return f"{yaml.safe_dump(document)}\n" + "\n- ".join(errors)
+
+
+def expand_documents(
+    documents: Iterator[dict[str, Any]],
+    source: str,
+    evaluator: ExpressionEvaluator | None = None,
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Merge defaults into the question documents and expand documents with variants.
+
+    Args:
+        documents: Collection of dictionaries.
+        source: Name of the collection.
+        evaluator: Evaluator for the expressions of variants (default None).
+
+    Yields:
+        Iterator[tuple[str, dict[str, Any]]]: The location of each question as
+            `source:document` or `source:document.variant` and its document.
+
+    Raises:
+        ParsingError: If a defaults document or the variants of a question are invalid.
+    """
+    defaults: dict[str, Any] = {}
+    for index, document in enumerate(documents, start=1):
+        if "defaults" in document:
+            if len(document) > 1 or not isinstance(document["defaults"], dict):
+                raise ParsingError(f"A defaults document must only contain a mapping: {document}")
+            defaults = document["defaults"]
+            continue
+        if defaults:
+            document = merge_defaults(defaults, document)  # noqa: PLW2901
+        if "variants" not in document:
+            yield f"{source}:{index}", document
+            continue
+        with profiler.stage("variants"):
+            variants = expand_variants(document, evaluator)
+        logger.debug("Expanded question {}:{} into {} variants.", source, index, len(variants))
+        for i, variant in enumerate(variants, start=1):
+            yield f"{source}:{index}.{i}", variant
+
+
+@dataclass
+class ValidationReport:
+    """The results of validating questions without rendering them.
+
+    Attributes:
+        questions: Location, title, type, and errors of each validated question. Errors of
+            files that cannot be parsed are reported with the file as location.
+    """
+
+    questions: list[dict[str, Any]] = field(default_factory=list)
+
+    def add(self, location: str, document: dict[str, Any], errors: list[str]) -> None:
+        """Add the result of a question."""
+        self.questions.append(
+            {
+                "location": location,
+                "title": document.get("title"),
+                "type": document.get("type"),
+                "errors": errors,
+            }
+        )
+
+    @property
+    def failures(self) -> list[dict[str, Any]]:
+        """The results with errors."""
+        return [question for question in self.questions if question["errors"]]
+
+    def to_json(self) -> str:
+        """Serialize the number of passed and failed questions and the failures as JSON."""
+        failures = self.failures
+        return json.dumps(
+            {
+                "questions": len(self.questions),
+                "passed": len(self.questions) - len(failures),
+                "failed": len(failures),
+                "failures": failures,
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
+
+
+def construct_questions(
+    question_type: str,
+    document: dict[str, Any],
+    selected: list[dict[str, Any]],
+    strict_validation: bool,
+    check_schema: bool = False,
+) -> tuple[list[Question], list[str]]:
+    """Construct and validate the selected copies of a question.
+
+    Args:
+        question_type: The question type.
+        document: The document of the question.
+        selected: The documents of the copies to construct, i.e., the public and internal copy.
+        strict_validation: Validate the last copy strictly.
+        check_schema: Check the document against the schema of its question type before the
+            copies are constructed (default False).
+
+    Returns:
+        tuple[list[Question], list[str]]: The questions and the validation errors.
+
+    Raises:
+        ParsingError: If the document does not match the schema of its question type.
+    """
+    # Check the fields before the constructor does expensive work, e.g., runs SQL
+    if check_schema and (schema := get_schemas().get(question_type)) is not None:
+        if schema_errors := schema.check(document):
+            raise ParsingError(
+                f"Question '{document['title']}' does not match the schema of "
+                f"{question_type} questions:\n- " + "\n- ".join(schema_errors)
+            )
+        for name in schema.unknown_fields(document):
+            logger.warning("Unknown field '{}' is ignored.", name)
+
+    questions = []
+    for selected_document in selected:
+        questions.append(create_question(question_type, **selected_document))
+        profiler.bind(questions[-1])
+
+    errors = []
+    if strict_validation:
+        with profiler.stage("validate"):
+            errors = questions[-1].validate()
+    return questions, errors
+
+
+def load_questions(  # noqa: C901, PLR0912
     documents: Iterator[dict[str, Any]],
     strict_validation: bool = True,
     parse_markdown: bool = True,
     table_styling: bool = True,
+    source: str = "<documents>",
+    question_filter: QuestionFilter | None = None,
+    *,
+    evaluator: ExpressionEvaluator | None = None,
+    inline_images: bool = True,
+    report: ValidationReport | None = None,
+    locations: dict[Question, str] | None = None,
+    check_schema: bool = False,
 ) -> Iterator[Question]:
     """Load questions from a collection of dictionaries.
 
+    A document that only contains the key `defaults` does not define a question. Instead, its
+    values are merged into all following documents of the collection. A document with a
+    `variants` block defines one question per variant.
+
     Args:
         documents: Collection of dictionaries.
         strict_validation: Validate each question strictly and raise errors for questions that miss
             optional information, such as feedback (default True).
         parse_markdown: Parse question and answer text as Markdown (default True).
         table_styling: Add Bootstrap style classes to table tags (default True).
+        source: Name of the collection that identifies questions in profiles as
+            `source:document` (default "<documents>").
+        question_filter: Only construct questions whose documents match the filter. The
+            public and internal copy of a question are matched separately (default all).
+        evaluator: Evaluator for the expressions of variants (default None, which rejects
+            questions with variants).
+        inline_images: Embed images in the text. If False, only check that the images exist
+            (default True).
+        report: Record the validation result of each question in this report. Questions that
+            cannot be constructed, whatever the error, are then recorded and skipped instead of
+            raising the error (default None).
+        locations: Record the location of each question in this dictionary (default None).
+        check_schema: Check each document against the schema of its question type before the
+            question is constructed (default False).
 
     Yields:
         Iterator[Question]: The loaded questions.
@@ -41,11 +265,13 @@ def load_questions(  # noqa: C901
     Raises:
         ParsingError: If question type or title are not provided.
     """
-    for document in documents:
+    for location, document in expand_documents(documents, source, evaluator):
         if "table_styling" not in document:
             document.update({"table_styling": table_styling})
         if "markdown" not in document:
             document.update({"markdown": parse_markdown})
+        if "inline_images" not in document:
+            document.update({"inline_images": inline_images})
         if "skip_validation" in document:
             strict_validation = not document["skip_validation"]
         if "type" in document:
@@ -54,9 +280,8 @@ def load_questions(  # noqa: C901
             raise ParsingError(f"Question type not provided: {document}")
         if "title" not in document:
             raise ParsingError(f"Question title not provided: {document}")
-        # TODO: Add further validation for required fields here
 
-        internal_question = None
+        internal_document = None
         if document.get("internal_copy"):
             internal_document = copy.deepcopy(document)
             internal_document["title"] += " (internal \U0001f92b)"
@@ -65,25 +290,399 @@ def load_questions(  # noqa: C901
                 internal_document["category"] += "/internal"
             del document["internal_copy"]
 
-            internal_question = create_question(question_type, **internal_document)
+        selected = [
+            selected_document
+            for selected_document in (internal_document, document)
+            if selected_document is not None
+            and (question_filter is None or question_filter.match_document(selected_document))
+        ]
+        if not selected:
+            logger.trace(
+                "Skipping question '{}' that does not match the filter.", document["title"]
+            )
+            question_recorder.skipped(location)
+            continue
+
+        start = time.perf_counter()
+        with (
+            profiler.question(location, document["title"]),
+            logger.contextualize(question=location, title=document["title"]),
+            dependency_tracker.track() as dependencies,
+        ):
+            try:
+                questions, errors = construct_questions(
+                    question_type, document, selected, strict_validation, check_schema
+                )
+            except Exception as e:
+                # Any error of a question, e.g., of a query or a library, is a failure in reports
+                if report is None:
+                    raise
+                logger.error("The question could not be loaded and has been skipped: {}", e)
+                report.add(location, document, [str(e) or type(e).__name__])
+                continue
 
-        question = create_question(question_type, **document)
-        if strict_validation:
-            errors = question.validate()
+            duration = time.perf_counter() - start
+            logger.bind(duration=duration).debug("Loaded question in {:.3f} s.", duration)
+            if report is not None:
+                report.add(location, document, errors)
             if errors:
-                logger.error(
-                    "The following question did not pass strict validation and has been skipped:"
-                    "\n{}",
-                    f"{yaml.safe_dump(document)}\n" + "\n- ".join(errors),
+                logger.opt(lazy=True).error(
+                    "The following question did not pass strict validation and has been "
+                    "skipped:\n{}",
+                    partial(format_validation_errors, document, errors),
                 )
                 continue
 
-        if internal_question:
-            internal_question.cleanup()
-            yield internal_question
+        for question in questions:
+            question.cleanup()
+            question_recorder.loaded(question, location, question_type, duration, dependencies)
+            if locations is not None:
+                locations[question] = location
+            yield question
 
-        question.cleanup()
-        yield question
+
+def load_file(
+    path: Path,
+    loader: type[QuestionLoader],
+    *,
+    strict_validation: bool = True,
+    parse_markdown: bool = True,
+    table_styling: bool = True,
+    add_question_index: bool = False,
+    question_filter: QuestionFilter | None = None,
+    inline_images: bool = True,
+    report: ValidationReport | None = None,
+    locations: dict[Question, str] | None = None,
+    check_schema: bool = False,
+) -> list[Question]:
+    """Load the questions of a YAML file.
+
+    The documents are parsed in the directory of the file, so that relative paths to included
+    files, images, and databases are resolved against it.
+
+    Args:
+        path: The YAML file.
+        loader: The YAML loader class, see `create_loader`.
+        strict_validation: Validate each question strictly (default True).
+        parse_markdown: Parse question and answer text as Markdown (default True).
+        table_styling: Add Bootstrap style classes to table tags (default True).
+        add_question_index: Extend each question title with an increasing number (default False).
+        question_filter: Only construct questions whose documents match the filter.
+        inline_images: Embed images in the text (default True).
+        report: Record the validation result of each question in this report (default None).
+        locations: Record the location of each question in this dictionary (default None).
+        check_schema: Check each document against the schema of its question type before the
+            question is constructed (default False).
+
+    Returns:
+        list[Question]: The loaded questions.
+    """
+    loader.path_dict["base_path"] = path.parent.absolute()
+    loader.path_dict["path"] = path.resolve()
+
+    questions = []
+    parsed_dependencies: set[Path] = set()
+    with path.open("r", encoding="utf-8") as file, contextlib.chdir(path.parent):
+        documents = profiler.iterate("yaml", yaml.load_all(file, loader))
+        for i, question in enumerate(
+            load_questions(
+                dependency_tracker.iterate(documents, parsed_dependencies),
+                strict_validation=strict_validation,
+                parse_markdown=parse_markdown,
+                table_styling=table_styling,
+                source=str(path),
+                question_filter=question_filter,
+                evaluator=loader.evaluator,
+                inline_images=inline_images,
+                report=report,
+                locations=locations,
+                check_schema=check_schema,
+            ),
+            start=1,
+        ):
+            if add_question_index:
+                question.title = f"{question.title} ({i})"
+            questions.append(question)
+    question_recorder.loaded_file(path, questions, parsed_dependencies)
+    return questions
+
+
+def create_environment() -> Environment:
+    """Create the Jinja environment for rendering questions."""
+    return Environment(
+        loader=PackageLoader("moodle_tools.questions"),
+        lstrip_blocks=True,
+        trim_blocks=True,
+        autoescape=select_autoescape(),
+    )
+
+
+@dataclass
+class CheckResult:
+    """The result of checking the question documents of a file.
+
+    Attributes:
+        path: The YAML file.
+        questions: Number of checked question documents.
+        errors: Errors, prefixed with the location of the question.
+        warnings: Warnings, prefixed with the location of the question.
+    """
+
+    path: Path
+    questions: int = 0
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+
+@cache
+def check_loader(allow_eval: bool) -> type[QuestionLoader]:
+    """Create the loader of a check process once, so that included files are cached."""
+    return create_loader(allow_eval)
+
+
+def check_file(
+    path: Path, allow_eval: bool = False, question_filter: QuestionFilter | None = None
+) -> CheckResult:
+    """Check the question documents of a YAML file against the schemas of their types.
+
+    The file is parsed, including `!include` and `!eval` tags, and defaults and variants are
+    applied. The questions are not constructed, i.e., SQL and streaming code is not executed.
+
+    Args:
+        path: The YAML file.
+        allow_eval: Allows to evaluate math expressions (default False).
+        question_filter: Only check questions whose documents match the filter.
+
+    Returns:
+        CheckResult: All errors and warnings of the file.
+    """
+    loader = check_loader(allow_eval)
+    loader.path_dict["base_path"] = path.parent.absolute()
+    loader.path_dict["path"] = path.resolve()
+
+    result = CheckResult(path)
+    try:
+        with path.open("r", encoding="utf-8") as file, contextlib.chdir(path.parent):
+            for location, document in expand_documents(
+                yaml.load_all(file, loader), str(path), loader.evaluator
+            ):
+                if (
+                    question_filter is not None
+                    and {"type", "title"} <= document.keys()
+                    and not question_filter.match_document(document)
+                ):
+                    continue
+                result.questions += 1
+                errors, warnings = check_document(document)
+                result.errors.extend(f"{location}: {error}" for error in errors)
+                result.warnings.extend(f"{location}: {warning}" for warning in warnings)
+    except (OSError, ParsingError, yaml.YAMLError) as e:
+        result.errors.append(f"{path}: {e}")
+    return result
+
+
+def check_questions(
+    paths: Iterator[Path],
+    *,
+    allow_eval: bool = False,
+    question_filter: QuestionFilter | None = None,
+    max_workers: int | None = None,
+) -> list[CheckResult]:
+    """Check the question documents of many YAML files in parallel.
+
+    The files are distributed over processes, because parsing YAML is CPU-bound and each file is
+    parsed in its own working directory.
+
+    Args:
+        paths: Input YAML files as paths.
+        allow_eval: Allows to evaluate math expressions (default False).
+        question_filter: Only check files and questions that match the filter.
+        max_workers: Number of processes (default: number of CPUs). With 1, the files are
+            checked in the current process.
+
+    Returns:
+        list[CheckResult]: The result of each file in the order of the paths.
+    """
+    selected = [
+        path for path in paths if question_filter is None or question_filter.match_file(path)
+    ]
+    if max_workers == 1 or len(selected) <= 1:
+        return [check_file(path, allow_eval, question_filter) for path in selected]
+    # Workers report their findings in the result, the main process logs them
+    with ProcessPoolExecutor(max_workers, initializer=logger.remove) as executor:
+        return list(
+            executor.map(check_file, selected, repeat(allow_eval), repeat(question_filter))
+        )
+
+
+def iterate_moodle_questions(
+    *,
+    paths: Iterator[Path],
+    skip_validation: bool = False,
+    parse_markdown: bool = True,
+    add_question_index: bool = False,
+    question_filter: list[str] | None = None,
+    category_filter: list[str] | None = None,
+    type_filter: list[str] | None = None,
+    file_filter: list[str] | None = None,
+    table_styling: bool = True,
+    allow_eval: bool = False,
+    locations: dict[Question, str] | None = None,
+) -> Iterator[Question]:
+    """Load and filter the questions of a list of paths to YAML documents lazily.
+
+    The files are loaded one after another while the questions are consumed, so that only the
+    questions of one file are kept in memory if the consumer releases them.
+
+    Args:
+        paths: Input YAML files as paths.
+        skip_validation: Skip strict validation (default False).
+        parse_markdown: Parse question and answer text as Markdown (default True).
+        add_question_index: Extend each question title with an increasing number (default False).
+        question_filter: Filter questions to export by name.
+        category_filter: Filter questions to export by category, including subcategories.
+        type_filter: Filter questions to export by question type.
+        file_filter: Filter input files by glob patterns.
+        table_styling: Add Bootstrap style classes to table tags (default True).
+        allow_eval: Allows to evaluate math expressions (default False).
+        locations: Record the location of each question in this dictionary (default None).
+
+    Yields:
+        Iterator[Question]: The selected questions.
+
+    Raises:
+        SystemExit: If the filters select no questions.
+    """
+    loader = create_loader(allow_eval)
+
+    # Question numbers depend on all questions of a file, so titles are only filtered late then
+    early_filter = QuestionFilter(
+        titles=None if add_question_index else question_filter,
+        categories=category_filter,
+        types=type_filter,
+        files=file_filter,
+    )
+
+    loaded = selected = 0
+    for path in paths:
+        if not early_filter.match_file(path):
+            logger.debug("Skipping {} that does not match the filter.", path)
+            continue
+        questions = load_file(
+            path,
+            loader,
+            strict_validation=not skip_validation,
+            parse_markdown=parse_markdown,
+            table_styling=table_styling,
+            add_question_index=add_question_index,
+            question_filter=early_filter,
+            locations=locations,
+        )
+        loaded += len(questions)
+        if question_filter:
+            questions = [question for question in questions if question.title in question_filter]
+        selected += len(questions)
+        yield from questions
+
+    logger.debug("Loaded {} questions from YAML.", loaded)
+    if question_filter:
+        logger.debug("{} questions remained after running filter.", selected)
+
+    if (question_filter or early_filter) and not selected:
+        logger.warning("Filter returned 0 questions. Exiting.")
+        sys.exit(1)
+
+
+def load_moodle_questions(
+    *,
+    paths: Iterator[Path],
+    skip_validation: bool = False,
+    parse_markdown: bool = True,
+    add_question_index: bool = False,
+    question_filter: list[str] | None = None,
+    category_filter: list[str] | None = None,
+    type_filter: list[str] | None = None,
+    file_filter: list[str] | None = None,
+    table_styling: bool = True,
+    allow_eval: bool = False,
+    dedup: DedupMode | None = None,
+    dedup_threshold: float = 0.8,
+) -> list[Question]:
+    """Load and filter the questions of a list of paths to YAML documents.
+
+    Args:
+        paths: Input YAML files as paths.
+        skip_validation: Skip strict validation (default False).
+        parse_markdown: Parse question and answer text as Markdown (default True).
+        add_question_index: Extend each question title with an increasing number (default False).
+        question_filter: Filter questions to export by name.
+        category_filter: Filter questions to export by category, including subcategories.
+        type_filter: Filter questions to export by question type.
+        file_filter: Filter input files by glob patterns.
+        table_styling: Add Bootstrap style classes to table tags (default True).
+        allow_eval: Allows to evaluate math expressions (default False).
+        dedup: Only `report` duplicate and near-duplicate questions or also `drop` them, see
+            `moodle_tools.dedup` (default None, which skips the detection).
+        dedup_threshold: Minimum similarity of near-duplicates (default 0.8).
+
+    Returns:
+        list[Question]: The selected questions.
+
+    Raises:
+        SystemExit: If the filters select no or fewer questions than expected.
+    """
+    locations: dict[Question, str] | None = {} if dedup else None
+    questions = list(
+        iterate_moodle_questions(
+            paths=paths,
+            skip_validation=skip_validation,
+            parse_markdown=parse_markdown,
+            add_question_index=add_question_index,
+            question_filter=question_filter,
+            category_filter=category_filter,
+            type_filter=type_filter,
+            file_filter=file_filter,
+            table_styling=table_styling,
+            allow_eval=allow_eval,
+            locations=locations,
+        )
+    )
+
+    if question_filter and len(questions) < len(question_filter):
+        logger.warning("Filter returned fewer questions than expected. Exiting.")
+        sys.exit(1)
+
+    if dedup:
+        with profiler.stage("dedup"):
+            questions = deduplicate(
+                questions, dedup, threshold=dedup_threshold, locations=locations
+            )
+    return questions
+
+
+def stream_moodle_questions(
+    *,
+    dedup: DedupMode | None = None,
+    dedup_threshold: float = 0.8,
+    **options: Any,  # noqa: ANN401
+) -> Iterable[Question]:
+    """Load the questions for writing them, lazily unless all questions are needed first.
+
+    Duplicate detection and the check that the title filter selected all questions need all
+    questions before any output is written, so the questions are loaded at once with
+    `load_moodle_questions` then. Otherwise, they are loaded with `iterate_moodle_questions`.
+
+    Args:
+        dedup: Only `report` duplicate questions or also `drop` them (default None).
+        dedup_threshold: Minimum similarity of near-duplicates (default 0.8).
+        **options: Further arguments of `load_moodle_questions`.
+
+    Returns:
+        Iterable[Question]: The selected questions.
+    """
+    if dedup or options.get("question_filter"):
+        return load_moodle_questions(**options, dedup=dedup, dedup_threshold=dedup_threshold)
+    return iterate_moodle_questions(**options)
 
 
 def generate_moodle_questions(
@@ -93,8 +692,14 @@ def generate_moodle_questions(
     parse_markdown: bool = True,
     add_question_index: bool = False,
     question_filter: list[str] | None = None,
+    category_filter: list[str] | None = None,
+    type_filter: list[str] | None = None,
+    file_filter: list[str] | None = None,
     table_styling: bool = True,
     allow_eval: bool = False,
+    dedup: DedupMode | None = None,
+    dedup_threshold: float = 0.8,
+    previous_hashes: set[str] | None = None,
 ) -> str:
     """Generate Moodle XML from a list of paths to YAML documents.
 
@@ -104,58 +709,377 @@ def generate_moodle_questions(
         parse_markdown: Parse question and answer text as Markdown (default True).
         add_question_index: Extend each question title with an increasing number (default False).
         question_filter: Filter questions to export by name.
+        category_filter: Filter questions to export by category, including subcategories.
+        type_filter: Filter questions to export by question type.
+        file_filter: Filter input files by glob patterns.
         table_styling: Add Bootstrap style classes to table tags (default True).
         allow_eval: Allows to evaluate math expressions (default False).
+        dedup: Only `report` duplicate questions or also `drop` them (default None).
+        dedup_threshold: Minimum similarity of near-duplicates (default 0.8).
+        previous_hashes: Hashes of the questions of a previous build, see `render_questions`.
 
     Returns:
         str: Moodle XML for all questions in the YAML file.
     """
-    path_dict = {"base_path": Path()}
-    yaml.SafeLoader.add_constructor("!eval", eval_context(allow_eval))
-    yaml.SafeLoader.add_constructor("!include", construct_include_context(path_dict))
+    start = time.perf_counter()
+    questions = stream_moodle_questions(
+        paths=paths,
+        skip_validation=skip_validation,
+        parse_markdown=parse_markdown,
+        add_question_index=add_question_index,
+        question_filter=question_filter,
+        category_filter=category_filter,
+        type_filter=type_filter,
+        file_filter=file_filter,
+        table_styling=table_styling,
+        allow_eval=allow_eval,
+        dedup=dedup,
+        dedup_threshold=dedup_threshold,
+    )
+
+    env = create_environment()
+    rendered_questions = [
+        rendered.xml
+        for rendered in render_questions(questions, env, previous_hashes, release=True)
+    ]
+    xml = render_quiz(env, rendered_questions)
+    logger.bind(duration=time.perf_counter() - start).info(
+        "Generated {} Moodle XML questions.", len(rendered_questions)
+    )
+    return xml
+
+
+def render_questions(
+    questions: Iterable[Question],
+    env: Environment,
+    previous_hashes: set[str] | None = None,
+    *,
+    release: bool = False,
+) -> Iterator[RenderedQuestion]:
+    """Render questions into Moodle XML one after another.
+
+    Args:
+        questions: The questions.
+        env: The Jinja environment.
+        previous_hashes: Hashes of the Moodle XML of the questions of a previous build, see
+            `read_manifest_hashes`. Questions with one of these hashes did not change and are
+            skipped (default None).
+        release: Release the content of each question right after rendering it, so that the
+            memory of large question banks does not grow while they are written. The questions
+            cannot be rendered again (default False).
+
+    Yields:
+        Iterator[RenderedQuestion]: Each question that is new or changed.
+    """
+    unchanged = 0
+    for question in questions:
+        start = time.perf_counter()
+        with profiler.question(profiler.location(question)):
+            xml = question.to_xml(env)
+        sha256 = ""
+        if previous_hashes is not None or question_recorder.enabled:
+            sha256 = content_hash(xml)
+            question_recorder.rendered(question, sha256, time.perf_counter() - start)
+        rendered = RenderedQuestion.from_question(question, xml)
+        if release:
+            question.release()
+        if previous_hashes is not None and sha256 in previous_hashes:
+            unchanged += 1
+            continue
+        yield rendered
+    if previous_hashes is not None:
+        logger.info(
+            "Skipped {} questions that did not change since the previous build.", unchanged
+        )
 
-    questions: list[Question] = []
+
+def write_moodle_questions(
+    questions: Iterable[Question],
+    output: Path,
+    *,
+    manifest: bool = False,
+    previous_hashes: set[str] | None = None,
+    release: bool = False,
+) -> Chunk:
+    """Render questions into a Moodle XML file while writing it.
+
+    Args:
+        questions: The questions.
+        output: The output file. Files ending on `.gz` or `.zst` are compressed.
+        manifest: Also write a manifest with the hash of the file and of each question, see
+            `moodle_tools.output` (default False).
+        previous_hashes: Hashes of the questions of a previous build, see `render_questions`.
+        release: Release the content of each question after rendering it (default False).
+
+    Returns:
+        Chunk: The written file.
+    """
+    start = time.perf_counter()
+    env = create_environment()
+    chunk = write_quiz(
+        output, env, render_questions(questions, env, previous_hashes, release=release)
+    )
+    if manifest:
+        write_manifest(manifest_path(output), [chunk])
+    logger.bind(duration=time.perf_counter() - start).info(
+        "Generated {} Moodle XML questions.", len(chunk.questions)
+    )
+    return chunk
+
+
+def write_moodle_question_chunks(
+    questions: Iterable[Question],
+    output: Path,
+    *,
+    by_category: bool = False,
+    max_questions: int | None = None,
+    max_bytes: int | None = None,
+    previous_hashes: set[str] | None = None,
+    release: bool = False,
+) -> list[Chunk]:
+    """Render questions into several Moodle XML files and write a manifest.
+
+    Each file is written as soon as it is complete, so that only the Moodle XML of one file is
+    kept in memory.
+
+    Args:
+        questions: The questions.
+        output: The output file whose name is used for the files and the manifest, see
+            `ChunkedQuizWriter`.
+        by_category: Write one file per category (default False). The questions are grouped by
+            category in the order in which the categories first appear, so all questions are
+            loaded before the first file is written.
+        max_questions: Maximum number of questions per file (default unlimited).
+        max_bytes: Maximum size of a file in bytes (default unlimited).
+        previous_hashes: Hashes of the questions of a previous build, see `render_questions`.
+        release: Release the content of each question after rendering it (default False).
+
+    Returns:
+        list[Chunk]: The written files.
+    """
+    start = time.perf_counter()
+    if by_category:
+        questions = list(questions)
+        order = {
+            category: i for i, category in enumerate(dict.fromkeys(q.category for q in questions))
+        }
+        questions = sorted(questions, key=lambda question: order[question.category])
+
+    env = create_environment()
+    writer = ChunkedQuizWriter(
+        output, env, by_category=by_category, max_questions=max_questions, max_bytes=max_bytes
+    )
+    for rendered in render_questions(questions, env, previous_hashes, release=release):
+        writer.add(rendered)
+    chunks = writer.close()
+    logger.bind(duration=time.perf_counter() - start).info(
+        "Generated {} Moodle XML questions in {} files, see {}.",
+        sum(len(chunk.questions) for chunk in chunks),
+        len(chunks),
+        writer.manifest_path,
+    )
+    return chunks
+
+
+def validate_moodle_questions(
+    *,
+    paths: Iterator[Path],
+    question_filter: list[str] | None = None,
+    category_filter: list[str] | None = None,
+    type_filter: list[str] | None = None,
+    file_filter: list[str] | None = None,
+    allow_eval: bool = False,
+) -> ValidationReport:
+    """Construct and strictly validate questions without rendering them.
+
+    Each document is checked against the schema of its question type before it is constructed.
+    Images are not embedded, i.e., only their existence is checked, and neither XML nor the
+    files of CodeRunner questions are generated.
+
+    Args:
+        paths: Input YAML files as paths.
+        question_filter: Filter questions to validate by name.
+        category_filter: Filter questions to validate by category, including subcategories.
+        type_filter: Filter questions to validate by question type.
+        file_filter: Filter input files by glob patterns.
+        allow_eval: Allows to evaluate math expressions (default False).
+
+    Returns:
+        ValidationReport: The validation result of each question.
+    """
+    start = time.perf_counter()
+    loader = create_loader(allow_eval)
+    selection = QuestionFilter(question_filter, category_filter, type_filter, file_filter)
+
+    report = ValidationReport()
     for path in paths:
-        path_dict["base_path"] = path.parent.absolute()
+        if not selection.match_file(path):
+            continue
+        try:
+            load_file(
+                path,
+                loader,
+                question_filter=selection,
+                inline_images=False,
+                report=report,
+                check_schema=True,
+            )
+        except Exception as e:  # A failure of one file must not abort the report
+            logger.error("{} could not be loaded: {}", path, e)
+            report.add(str(path), {}, [str(e) or type(e).__name__])
 
-        with path.open("r", encoding="utf-8") as file, contextlib.chdir(path.parent):
-            for i, question in enumerate(
-                load_questions(
-                    yaml.safe_load_all(file),
-                    strict_validation=not skip_validation,
-                    parse_markdown=parse_markdown,
-                    table_styling=table_styling,
-                ),
-                start=1,
-            ):
-                if add_question_index:
-                    question.title = f"{question.title} ({i})"
-                questions.append(question)
+    logger.bind(duration=time.perf_counter() - start).info(
+        "Validated {} questions, {} failed.", len(report.questions), len(report.failures)
+    )
+    return report
 
-    logger.debug("Loaded {} questions from YAML.", len(questions))
 
-    if question_filter:
-        questions = [question for question in questions if question.title in question_filter]
-        logger.debug("{} questions remained after running filter.", len(questions))
+@dataclass
+class WatchedFile:
+    """The rendered questions of an input file and the files they depend on.
+
+    Attributes:
+        questions: The rendered questions.
+        dependencies: Modification time of each file the questions depend on, including the
+            input file itself.
+    """
+
+    questions: list[RenderedQuestion]
+    dependencies: dict[Path, int | None]
+
+    def changed(self) -> bool:
+        """Check whether any of the files has been modified, created, or deleted."""
+        return any(modification_time(path) != mtime for path, mtime in self.dependencies.items())
+
+
+class QuestionWatcher:
+    """Rebuild the questions of input files whenever the files they depend on change.
+
+    The watcher keeps the rendered questions of each input file in memory. On each update, it
+    only rebuilds input files that are new or whose dependencies, i.e., the file itself,
+    included files, images, databases, and input streams, have been modified. Afterwards, the
+    complete quiz is rewritten.
+    """
 
+    def __init__(
+        self,
+        inputs: list[str],
+        output: Path,
+        *,
+        skip_validation: bool = False,
+        add_question_index: bool = False,
+        question_filter: list[str] | None = None,
+        category_filter: list[str] | None = None,
+        type_filter: list[str] | None = None,
+        file_filter: list[str] | None = None,
+        allow_eval: bool = False,
+    ) -> None:
+        """Create a watcher.
+
+        Args:
+            inputs: Input files or folders. Files that are added to the folders are picked up.
+            output: Output file that is rewritten after each change.
+            skip_validation: Skip strict validation (default False).
+            add_question_index: Extend each question title with an increasing number
+                (default False).
+            question_filter: Filter questions to export by name.
+            category_filter: Filter questions to export by category, including subcategories.
+            type_filter: Filter questions to export by question type.
+            file_filter: Filter input files by glob patterns.
+            allow_eval: Allows to evaluate math expressions (default False).
+        """
+        self.inputs = inputs
+        self.output = output
+        self.question_filter = question_filter
+        self.early_filter = QuestionFilter(
+            titles=None if add_question_index else question_filter,
+            categories=category_filter,
+            types=type_filter,
+            files=file_filter,
+        )
+        self.strict_validation = not skip_validation
+        self.add_question_index = add_question_index
+        self.loader = create_loader(allow_eval)
+        self.env = create_environment()
+        self.paths: list[Path] = []
+        self.files: dict[Path, WatchedFile] = {}
+
+    def build(self, path: Path) -> WatchedFile:
+        """Load and render the questions of an input file and record its dependencies."""
+        with dependency_tracker.track() as dependencies:
+            dependencies.add(path.absolute())
+            try:
+                questions = list(
+                    render_questions(
+                        load_file(
+                            path,
+                            self.loader,
+                            strict_validation=self.strict_validation,
+                            add_question_index=self.add_question_index,
+                            question_filter=self.early_filter,
+                        ),
+                        self.env,
+                        release=True,
+                    )
+                )
+            except Exception as e:  # Keep watching until the error is fixed
+                logger.error("Building {} failed because of the following error: {}", path, e)
+                questions = []
+        return WatchedFile(questions, {file: modification_time(file) for file in dependencies})
+
+    def update(self) -> bool:
+        """Rebuild changed input files and rewrite the output file.
+
+        Returns:
+            bool: True if the output file has been rewritten.
+        """
+        paths = [
+            path
+            for path in iterate_inputs(iter(self.inputs))
+            if self.early_filter.match_file(path)
+        ]
+        changed = paths != self.paths
+        for path in paths:
+            watched = self.files.get(path)
+            if watched is None or watched.changed():
+                logger.info("Building {}.", path)
+                self.files[path] = self.build(path)
+                changed = True
+        for path in self.files.keys() - set(paths):
+            del self.files[path]
+        self.paths = paths
+
+        if changed:
+            self.write()
+        return changed
+
+    def write(self) -> None:
+        """Write all questions to the output file."""
+        questions = [question for path in self.paths for question in self.files[path].questions]
+        if self.question_filter:
+            questions = [
+                question for question in questions if question.title in self.question_filter
+            ]
         if not questions:
-            logger.warning("Filter returned 0 questions. Exiting.")
-            sys.exit(1)
+            logger.warning("No questions to export.")
 
-        if len(questions) < len(question_filter):
-            logger.warning("Filter returned fewer questions than expected. Exiting.")
-            sys.exit(1)
+        xml = render_quiz(self.env, [question.xml for question in questions])
+        self.output.write_text(xml + "\n", encoding="utf-8")
+        logger.info("Wrote {} Moodle XML questions to {}.", len(questions), self.output)
 
-    env = Environment(
-        loader=PackageLoader("moodle_tools.questions"),
-        lstrip_blocks=True,
-        trim_blocks=True,
-        autoescape=select_autoescape(),
-    )
-    template = env.get_template("quiz.xml.j2")
-    xml = template.render(questions=[question.to_xml(env) for question in questions])
-    logger.info("Generated {} Moodle XML questions.", len(questions))
-    return xml
+    def run(self, interval: float = 1.0) -> None:
+        """Poll the files for changes until the process is interrupted.
+
+        Args:
+            interval: Seconds between two checks for changes (default 1.0).
+        """
+        logger.info("Watching for changes. Press Ctrl+C to stop.")
+        try:
+            while True:
+                self.update()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
 
 
 def iterate_inputs(
@@ -177,19 +1101,184 @@ def iterate_inputs(
         if path.is_file():
             yield path
         elif path.is_dir():
-            # TODO: Refactor this to use path.walk() once we drop Python 3.11 support
-            for dirpath, _, filenames in os.walk(path):
-                for filename in filenames:
-                    # Only process YAML files in folders, to exclude resources, like images.
-                    if filename.endswith((".yml", ".yaml")):
-                        yield Path(dirpath) / filename
+            # Only process YAML files in folders, to exclude resources, like images.
+            yield from discover_files(path)
         elif strict:
             raise OSError(f"Not a file or folder: {file}")
         else:
             logger.debug("{} is neither a file nor a folder - ignoring.", file)
 
 
-def parse_args() -> argparse.Namespace:
+def read_previous_hashes(paths: list[Path]) -> set[str]:
+    """Read the hashes of the questions of previous builds from manifests or indexes.
+
+    Args:
+        paths: Manifests (`.json`) or question indexes (any other suffix).
+
+    Returns:
+        set[str]: The hashes of the Moodle XML of the questions.
+
+    Raises:
+        ParsingError: If a file cannot be read.
+    """
+    hashes = read_manifest_hashes(path for path in paths if path.suffix == ".json")
+    for path in paths:
+        if path.suffix == ".json":
+            continue
+        if not path.is_file():
+            raise ParsingError(f"Question index not found: {path}")
+        try:
+            with QuestionIndex(path) as index:
+                hashes.update(index.hashes())
+        except sqlite3.DatabaseError as e:
+            raise ParsingError(f"Cannot read the question index {path}: {e}") from e
+    return hashes
+
+
+def write_index(path: Path) -> None:
+    """Store the recorded questions in a question index.
+
+    Args:
+        path: The database file.
+    """
+    with QuestionIndex(path) as index:
+        count = index.update(
+            question_recorder.files, question_recorder.entries, question_recorder.filtered
+        )
+    logger.info(
+        "Indexed {} questions of {} files in {}.", count, len(question_recorder.files), path
+    )
+
+
+def write_output(args: argparse.Namespace, options: dict[str, Any]) -> None:
+    """Generate the questions and write them to stdout, an output file, or several files.
+
+    Args:
+        args: The parsed command line arguments.
+        options: Arguments of `stream_moodle_questions`.
+    """
+    previous_hashes = read_previous_hashes(args.since) if args.since else None
+    if args.output is sys.stdout:
+        print(
+            generate_moodle_questions(**options, previous_hashes=previous_hashes),
+            file=args.output,
+        )
+    elif args.split_by_category or args.split_count or args.split_size:
+        write_moodle_question_chunks(
+            stream_moodle_questions(**options),
+            args.output,
+            by_category=args.split_by_category,
+            max_questions=args.split_count,
+            max_bytes=args.split_size,
+            previous_hashes=previous_hashes,
+            release=True,
+        )
+    else:
+        write_moodle_questions(
+            stream_moodle_questions(**options),
+            args.output,
+            manifest=args.manifest,
+            previous_hashes=previous_hashes,
+            release=True,
+        )
+
+
+def run_check(args: argparse.Namespace) -> None:
+    """Check all input questions and log the errors and warnings.
+
+    Args:
+        args: The parsed command line arguments.
+
+    Raises:
+        SystemExit: If any question has errors.
+    """
+    results = check_questions(
+        iterate_inputs(args.input, strict=True),
+        allow_eval=args.allow_eval,
+        question_filter=QuestionFilter(
+            args.filter, args.filter_category, args.filter_type, args.filter_file
+        ),
+        max_workers=args.jobs,
+    )
+    for result in results:
+        for warning in result.warnings:
+            logger.warning(warning)
+        for error in result.errors:
+            logger.error(error)
+    errors = sum(len(result.errors) for result in results)
+    logger.info(
+        "Checked {} questions in {} files: {} errors, {} warnings.",
+        sum(result.questions for result in results),
+        len(results),
+        errors,
+        sum(len(result.warnings) for result in results),
+    )
+    if errors:
+        sys.exit(1)
+
+
+def run_validation(args: argparse.Namespace) -> None:
+    """Validate all input questions and write the report as JSON.
+
+    Args:
+        args: The parsed command line arguments.
+
+    Raises:
+        SystemExit: If any question fails validation.
+    """
+    report = validate_moodle_questions(
+        paths=iterate_inputs(args.input, strict=True),
+        question_filter=args.filter,
+        category_filter=args.filter_category,
+        type_filter=args.filter_type,
+        file_filter=args.filter_file,
+        allow_eval=args.allow_eval,
+    )
+    if args.output is sys.stdout:
+        print(report.to_json(), flush=True)
+    else:
+        args.output.write_text(report.to_json() + "\n", encoding="utf-8")
+    if report.failures:
+        sys.exit(1)
+
+
+def parse_output(value: str) -> Path | TextIO:
+    """Parse the output file, where `-` stands for stdout.
+
+    The file is not opened, so that the output of a previous build is kept until the new output
+    is complete.
+
+    Args:
+        value: The output file as given on the command line.
+
+    Returns:
+        Path | TextIO: The path of the output file or stdout.
+    """
+    return sys.stdout if value == "-" else Path(value)
+
+
+def parse_threshold(value: str) -> float:
+    """Parse a similarity threshold between 0 (exclusive) and 1 (inclusive).
+
+    Args:
+        value: The threshold as given on the command line.
+
+    Returns:
+        float: The threshold.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a number between 0 and 1.
+    """
+    try:
+        threshold = float(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid threshold: '{value}'") from e
+    if not 0 < threshold <= 1:
+        raise argparse.ArgumentTypeError(f"threshold must be between 0 and 1, got {value}")
+    return threshold
+
+
+def parse_args() -> argparse.Namespace:  # noqa: C901, PLR0915
     """Parse command line arguments.
 
     Returns:
@@ -209,7 +1298,7 @@ def parse_args() -> argparse.Namespace:
         "-o",
         "--output",
         default=sys.stdout,
-        type=argparse.FileType("w", encoding="utf-8"),
+        type=parse_output,
         help="Output file (default: stdout)",
     )
     parser.add_argument(
@@ -232,24 +1321,174 @@ def parse_args() -> argparse.Namespace:
         type=str,
         help="Filter questions to export by name",
     )
+    parser.add_argument(
+        "--filter-category",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Filter questions to export by category, including subcategories",
+    )
+    parser.add_argument(
+        "--filter-type",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Filter questions to export by question type",
+    )
+    parser.add_argument(
+        "--filter-file",
+        action="extend",
+        nargs="+",
+        type=str,
+        help="Filter input files by glob patterns, e.g., 'sql_*.yaml'",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         type=str,
-        choices=["DEBUG", "INFO", "ERROR"],
+        choices=["TRACE", "DEBUG", "INFO", "ERROR"],
         help="Set the log level (default: %(default)s)",
     )
+    parser.add_argument(
+        "--log-json",
+        type=Path,
+        help="Additionally write the log as JSON lines, including the location of the question "
+        "and durations",
+    )
     parser.add_argument(
         "--allow-eval",
         action="store_true",
         help="Allows to evaluate math expressions (default: %(default)s)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent per stage and the slowest questions to stderr "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        default=10,
+        type=int,
+        help="Number of slowest questions to report (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-json",
+        type=Path,
+        help="Write the profile as JSON file",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        type=Path,
+        help="Write a cProfile dump that can be inspected with pstats or snakeviz",
+    )
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help="Write a manifest with a hash of the output file and of each question next to the "
+        "output file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=["report", "drop"],
+        help="Report duplicate and near-duplicate questions, or drop them from the output",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        default=0.8,
+        type=parse_threshold,
+        help="Minimum similarity of near-duplicate questions between 0 and 1, where 1 only "
+        "detects exact duplicates (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--since",
+        action="extend",
+        nargs="+",
+        type=Path,
+        help="Only write questions that are new or changed compared to the manifests or "
+        "question indexes of previous builds",
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        help="Record the built questions in an SQLite question index",
+    )
+    parser.add_argument(
+        "--split-by-category",
+        action="store_true",
+        help="Write one output file per category, together with a manifest (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--split-count",
+        type=int,
+        help="Write at most this number of questions per output file, together with a manifest",
+    )
+    parser.add_argument(
+        "--split-size",
+        type=parse_filesize,
+        help="Write output files of at most this size, e.g., 20MB or 8MiB, together with a "
+        "manifest",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check all questions against the schemas of their types in parallel and "
+        "report all errors, without running code or writing XML (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only construct and strictly validate all questions and write a JSON report "
+        "instead of XML, without embedding images (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of processes for --check (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild the output file whenever an input file or a file it "
+        "depends on changes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        default=1.0,
+        type=float,
+        help="Seconds between two checks for changes in watch mode (default: %(default)s)",
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.watch and args.output is sys.stdout:
+        parser.error("--watch requires an output file")
+    if args.check and (args.watch or args.output is not sys.stdout):
+        parser.error("--check cannot be combined with --watch or an output file")
+    if args.validate_only and (args.watch or args.check or args.skip_validation):
+        parser.error("--validate-only cannot be combined with --watch, --check, or -s")
+    if args.output is not sys.stdout and not args.output.parent.is_dir():
+        parser.error(f"The directory of the output file {args.output} does not exist")
+    if args.output is not sys.stdout and not compression_available(args.output):
+        parser.error("Writing .zst files requires the zstandard package")
+    if args.manifest and args.output is sys.stdout:
+        parser.error("--manifest requires an output file")
+    if args.index and (args.watch or args.check or args.validate_only):
+        parser.error("--index cannot be combined with --watch, --check, or --validate-only")
+    if args.since and (args.watch or args.check or args.validate_only):
+        parser.error("--since cannot be combined with --watch, --check, or --validate-only")
+    if args.dedup and (args.watch or args.check or args.validate_only):
+        parser.error("--dedup cannot be combined with --watch, --check, or --validate-only")
+    if args.split_by_category or args.split_count or args.split_size:
+        if args.output is sys.stdout:
+            parser.error("Splitting the output requires an output file")
+        if args.watch or args.check or args.validate_only:
+            parser.error("Splitting the output cannot be combined with other modes")
+    return args
 
 
 @logger.catch(reraise=False, onerror=lambda _: sys.exit(1))
-def main() -> None:
+def main() -> None:  # noqa: C901
     """Run the question generator.
 
     This function serves as the entry point of the CLI.
@@ -270,27 +1509,71 @@ def main() -> None:
         format="{time:YYYY-MM-DD HH:mm:ss} | <level>{message}</level>",
         level="ERROR",
     )
+    if args.log_json:
+        logger.add(args.log_json, level=args.log_level, serialize=True)
 
     if find_spec("isda_streaming") is None or find_spec("duckdb") is None:
         logger.debug(
             "ISDA questions are not available. If you need them, install the `isda` extra."
         )
 
-    try:
-        inputs = iterate_inputs(args.input, not args.skip_validation)
-        question_xml = generate_moodle_questions(
-            paths=inputs,
+    if args.check:
+        run_check(args)
+        return
+    if args.validate_only:
+        run_validation(args)
+        return
+
+    if args.watch:
+        watcher = QuestionWatcher(
+            args.input,
+            args.output,
             skip_validation=args.skip_validation,
             add_question_index=args.add_question_index,
             question_filter=args.filter,
+            category_filter=args.filter_category,
+            type_filter=args.filter_type,
+            file_filter=args.filter_file,
             allow_eval=args.allow_eval,
         )
-        print(question_xml, file=args.output)
+        watcher.run(args.watch_interval)
+        return
+
+    if args.profile or args.profile_json or args.profile_pstats:
+        profiler.enable()
+    if args.index:
+        question_recorder.enable()
+    cprofile = cProfile.Profile() if args.profile_pstats else None
+
+    try:
+        with cprofile or contextlib.nullcontext():
+            options: dict[str, Any] = {
+                "paths": iterate_inputs(args.input, not args.skip_validation),
+                "skip_validation": args.skip_validation,
+                "add_question_index": args.add_question_index,
+                "question_filter": args.filter,
+                "category_filter": args.filter_category,
+                "type_filter": args.filter_type,
+                "file_filter": args.filter_file,
+                "allow_eval": args.allow_eval,
+                "dedup": args.dedup,
+                "dedup_threshold": args.dedup_threshold,
+            }
+            write_output(args, options)
+        if args.index:
+            write_index(args.index)
     except ParsingError as e:
         logger.error("Parsing failed because of the following error:")
         logger.error(e)
         sys.exit(1)
 
+    if args.profile:
+        print(profiler.report(args.profile_top), file=sys.stderr)
+    if args.profile_json:
+        args.profile_json.write_text(profiler.to_json(args.profile_top), encoding="utf-8")
+    if cprofile is not None:
+        cprofile.dump_stats(args.profile_pstats)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,342 @@
+"""Writing of Moodle XML quizzes, either as a single file or split into chunks.
+
+Moodle imports large XML files slowly and rejects files above the upload limit of the server.
+`ChunkedQuizWriter` therefore splits a quiz into several self-contained files by category,
+number of questions, or size. Each file is written as soon as it is complete, and a manifest
+lists the questions of each file.
+
+Files ending on `.gz` or `.zst` are compressed while they are written. The manifest contains a
+SHA-256 hash of each file and of the Moodle XML of each question, so that identical builds can
+be verified and changed questions can be found without comparing the files.
+
+The writers only receive `RenderedQuestion`s, i.e., the Moodle XML and metadata of each
+question, so that the content of a question can be released as soon as it has been rendered.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from jinja2 import Environment
+from loguru import logger
+
+from moodle_tools.profiling import profiler
+from moodle_tools.questions.question import Question
+from moodle_tools.utils import ParsingError
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+
+def split_name(path: Path) -> tuple[str, str]:
+    """Split a file name into its base name and its suffixes, e.g., `quiz` and `.xml.gz`."""
+    if path.suffix in COMPRESSION_SUFFIXES:
+        inner = Path(path.stem)
+        return inner.stem, inner.suffix + path.suffix
+    return path.stem, path.suffix
+
+
+def manifest_path(output: Path) -> Path:
+    """Get the path of the manifest of an output file, e.g., `quiz.manifest.json`."""
+    return output.with_name(f"{split_name(output)[0]}.manifest.json")
+
+
+def content_hash(text: str) -> str:
+    """Compute the SHA-256 hash of a text in UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compression_available(path: Path) -> bool:
+    """Check whether the compression of an output file is available."""
+    return path.suffix != ".zst" or zstandard is not None
+
+
+@contextlib.contextmanager
+def open_output(path: Path) -> Iterator[IO[str]]:
+    """Open an output file for writing text, compressed according to its suffix.
+
+    Files ending on `.gz` are compressed with gzip, without time stamp and file name in the
+    header, so that identical content results in identical files. Files ending on `.zst` are
+    compressed with Zstandard, which requires the `zstandard` package.
+
+    The text is written to a temporary file in the same directory, which only replaces the
+    output file once it is complete. If writing fails, e.g., because a question cannot be
+    parsed, the temporary file is removed and a previous output file is kept.
+
+    Args:
+        path: The output file.
+
+    Yields:
+        IO[str]: The text stream.
+
+    Raises:
+        ImportError: If the file ends on `.zst` and `zstandard` is not installed.
+    """
+    if not compression_available(path):
+        raise ImportError("zstandard is not installed. Please install it to write .zst files.")
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with temporary.open("wb") as raw:
+            stream: Any = raw
+            if path.suffix == ".gz":
+                stream = gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+            elif path.suffix == ".zst":
+                stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+            with io.TextIOWrapper(stream, encoding="utf-8") as text:
+                yield text
+        temporary.replace(path)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def render_quiz(env: Environment, rendered_questions: list[str]) -> str:
+    """Combine rendered questions into a Moodle XML quiz."""
+    with profiler.stage("jinja"):
+        template = env.get_template("quiz.xml.j2")
+        return template.render(questions=rendered_questions)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedQuestion:
+    """The Moodle XML of a question and the metadata that is needed to write it.
+
+    Once a question has been rendered, only this compact model is kept, so that the content of
+    the question, e.g., its testcases, can be released.
+
+    Attributes:
+        title: Title of the question.
+        category: Category of the question.
+        question_type: Moodle question type, e.g., `truefalse`.
+        xml: Moodle XML of the question, including its category.
+    """
+
+    title: str
+    category: str | None
+    question_type: str
+    xml: str
+
+    @classmethod
+    def from_question(cls, question: Question, xml: str) -> "RenderedQuestion":
+        """Create the model of a rendered question."""
+        return cls(question.title, question.category, question.QUESTION_TYPE, xml)
+
+
+@dataclass
+class Chunk:
+    """A file of a quiz.
+
+    Attributes:
+        file: Name of the file, relative to the manifest.
+        size: Size of the uncompressed file in bytes.
+        sha256: Hash of the uncompressed file.
+        questions: Title, category, Moodle question type, and hash of the Moodle XML of each
+            question in the file.
+    """
+
+    file: str
+    size: int = 0
+    sha256: str = ""
+    questions: list[dict[str, str | None]] = field(default_factory=list)
+
+    def add(self, question: RenderedQuestion) -> None:
+        """Add a question to the list of questions."""
+        self.questions.append(
+            {
+                "title": question.title,
+                "category": question.category,
+                "type": question.question_type,
+                "sha256": content_hash(question.xml),
+            }
+        )
+
+
+def write_manifest(path: Path, chunks: list[Chunk]) -> None:
+    """Write the manifest of the files of a quiz as JSON."""
+    manifest = {"chunks": [asdict(chunk) for chunk in chunks]}
+    path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def read_manifest_hashes(paths: Iterable[Path]) -> set[str]:
+    """Read the hashes of all questions in the manifests of previous builds.
+
+    Args:
+        paths: The manifests.
+
+    Returns:
+        set[str]: The hashes of the Moodle XML of the questions.
+
+    Raises:
+        ParsingError: If a manifest cannot be read.
+    """
+    hashes: set[str] = set()
+    for path in paths:
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+            hashes.update(
+                question["sha256"]
+                for chunk in manifest["chunks"]
+                for question in chunk["questions"]
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise ParsingError(f"Cannot read the hashes of the manifest {path}: {e!r}") from e
+    return hashes
+
+
+def write_quiz(output: Path, env: Environment, questions: Iterable[RenderedQuestion]) -> Chunk:
+    """Stream rendered questions into a quiz file.
+
+    The quiz is written while the questions are rendered, so that only the Moodle XML of one
+    question is kept in memory. The file is identical to the quiz of `render_quiz`, followed by
+    a newline.
+
+    Args:
+        output: The output file, which is compressed according to its suffix.
+        env: The Jinja environment for rendering the quiz.
+        questions: The rendered questions.
+
+    Returns:
+        Chunk: The written file.
+    """
+    chunk = Chunk(output.name)
+    digest = hashlib.sha256()
+
+    def fragments() -> Iterator[str]:
+        for question in questions:
+            chunk.add(question)
+            yield question.xml
+
+    with open_output(output) as file:
+        template = env.get_template("quiz.xml.j2")
+        for part in itertools.chain(template.generate(questions=fragments()), ["\n"]):
+            data = part.encode("utf-8")
+            digest.update(data)
+            chunk.size += len(data)
+            file.write(part)
+    chunk.sha256 = digest.hexdigest()
+    return chunk
+
+
+class ChunkedQuizWriter:
+    """Write the questions of a quiz into several files.
+
+    The files are named after the output file with an increasing number, e.g., `quiz-001.xml`
+    and `quiz-002.xml` for `quiz.xml`, and the manifest is written to `quiz.manifest.json`.
+    Every question template contains its category, so each file can be imported on its own.
+    Compressed files are split by their uncompressed size.
+    """
+
+    def __init__(
+        self,
+        output: Path,
+        env: Environment,
+        *,
+        by_category: bool = False,
+        max_questions: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Create a writer.
+
+        Args:
+            output: The output file whose name is used for the chunks and the manifest.
+            env: The Jinja environment for rendering the quiz.
+            by_category: Start a new file whenever the category changes (default False).
+            max_questions: Maximum number of questions per file (default unlimited).
+            max_bytes: Maximum size of a file in bytes (default unlimited). A question that
+                alone exceeds the size is written into its own file.
+        """
+        self.output = output
+        self.env = env
+        self.by_category = by_category
+        self.max_questions = max_questions
+        self.max_bytes = max_bytes
+        self.chunks: list[Chunk] = []
+
+        # The quiz template adds a fixed header and footer and indents each question
+        self.base_size = self._size(render_quiz(env, [])) + 1
+        self.question_overhead = self._size(render_quiz(env, [""])) + 1 - self.base_size
+
+        self.questions: list[str] = []
+        self.current = self._new_chunk()
+        self.category: str | None = None
+
+    @property
+    def manifest_path(self) -> Path:
+        """The path of the manifest."""
+        return manifest_path(self.output)
+
+    @staticmethod
+    def _size(text: str) -> int:
+        return len(text.encode("utf-8"))
+
+    def _new_chunk(self) -> Chunk:
+        base, suffix = split_name(self.output)
+        return Chunk(f"{base}-{len(self.chunks) + 1:03d}{suffix}", self.base_size)
+
+    def _is_full(self, question: RenderedQuestion, size: int) -> bool:
+        if not self.questions:
+            return False
+        if self.by_category and question.category != self.category:
+            return True
+        if self.max_questions is not None and len(self.questions) >= self.max_questions:
+            return True
+        return self.max_bytes is not None and self.current.size + size > self.max_bytes
+
+    def add(self, question: RenderedQuestion) -> None:
+        """Add a rendered question.
+
+        If the question does not fit into the current file, the current file is written first.
+
+        Args:
+            question: The rendered question.
+        """
+        size = self._size(question.xml) + self.question_overhead
+        if self._is_full(question, size):
+            self.flush()
+        if self.max_bytes is not None and self.base_size + size > self.max_bytes:
+            logger.warning(
+                "Question '{}' alone exceeds the maximum file size of {} bytes.",
+                question.title,
+                self.max_bytes,
+            )
+        self.questions.append(question.xml)
+        self.category = question.category
+        self.current.size += size
+        self.current.add(question)
+
+    def flush(self) -> None:
+        """Write the current file, if it contains questions."""
+        if not self.questions:
+            return
+        path = self.output.with_name(self.current.file)
+        text = render_quiz(self.env, self.questions) + "\n"
+        with open_output(path) as file:
+            file.write(text)
+        self.current.sha256 = content_hash(text)
+        logger.debug(
+            "Wrote {} questions ({} bytes) to {}.", len(self.questions), self.current.size, path
+        )
+        self.chunks.append(self.current)
+        self.questions = []
+        self.current = self._new_chunk()
+
+    def close(self) -> list[Chunk]:
+        """Write the last file and the manifest.
+
+        Returns:
+            list[Chunk]: The written files.
+        """
+        self.flush()
+        write_manifest(self.manifest_path, self.chunks)
+        return self.chunks
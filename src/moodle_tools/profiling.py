@@ -0,0 +1,227 @@
+"""Lightweight timing of the stages of the question generation.
+
+The module provides a global `profiler` that is disabled by default. Instrumented code wraps
+its work in `profiler.stage(name)`, which does nothing unless profiling has been enabled, e.g.,
+with the `--profile` flag of `make-questions`.
+
+Stages can be nested. Each stage is only charged with its own time, i.e., the time spent in
+nested stages is subtracted, so that the stage times of a run add up to the profiled time. The
+time of each stage is also attributed to the question that is currently processed, which is
+identified by its location `file:document`.
+"""
+
+import contextlib
+import json
+import time
+import weakref
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+NULL_CONTEXT = contextlib.nullcontext()
+
+
+@dataclass
+class StageStats:
+    """Accumulated timings of a stage.
+
+    Attributes:
+        calls: Number of times the stage was entered.
+        seconds: Time spent in the stage, excluding nested stages.
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class Profiler:
+    """Collect timings per stage and per question."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all collected timings."""
+        self.start = time.perf_counter()
+        self.stages: defaultdict[str, StageStats] = defaultdict(StageStats)
+        self.questions: defaultdict[str, defaultdict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.titles: dict[str, str] = {}
+        self.current: str | None = None
+        self.pending: defaultdict[str, float] = defaultdict(float)
+        self.locations: weakref.WeakKeyDictionary[object, str] = weakref.WeakKeyDictionary()
+        self._children: list[float] = []
+
+    def enable(self) -> None:
+        """Enable profiling and start a new measurement."""
+        self.enabled = True
+        self.reset()
+
+    def disable(self) -> None:
+        """Disable profiling. Collected timings are kept until the next `enable`."""
+        self.enabled = False
+
+    def stage(self, name: str) -> contextlib.AbstractContextManager[None]:
+        """Measure the time spent in a stage.
+
+        Args:
+            name: Name of the stage, e.g., `markdown`.
+
+        Returns:
+            A context manager that measures the enclosed code if profiling is enabled.
+        """
+        if not self.enabled:
+            return NULL_CONTEXT
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            self.record(name, own)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add time to a stage and to the current question.
+
+        Time that is recorded while no question is current, e.g., parsing the YAML document of
+        the next question, is attributed to the next question.
+        """
+        stats = self.stages[name]
+        stats.calls += 1
+        stats.seconds += seconds
+        if self.current is None:
+            self.pending[name] += seconds
+        else:
+            self.questions[self.current][name] += seconds
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Measure the time spent producing each item of an iterable, e.g., a YAML parser.
+
+        Args:
+            name: Name of the stage.
+            iterable: The iterable to measure.
+
+        Returns:
+            Iterator[T]: An iterator over the same items.
+        """
+        if not self.enabled:
+            return iter(iterable)
+        return self._iterate(name, iter(iterable))
+
+    def _iterate(self, name: str, iterator: Iterator[T]) -> Iterator[T]:
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextlib.contextmanager
+    def question(self, location: str | None, title: str | None = None) -> Iterator[None]:
+        """Attribute the time of all stages in the enclosed code to a question.
+
+        Args:
+            location: Location of the question, e.g., `questions.yaml:3`. Time is not
+                attributed to any question if the location is None.
+            title: Title of the question.
+        """
+        if not self.enabled or location is None:
+            yield
+            return
+
+        previous, self.current = self.current, location
+        if title is not None:
+            self.titles[location] = title
+        for name, seconds in self.pending.items():
+            self.questions[location][name] += seconds
+        self.pending.clear()
+        try:
+            yield
+        finally:
+            self.current = previous
+
+    def bind(self, obj: object) -> None:
+        """Remember that an object, e.g., a `Question`, belongs to the current question."""
+        if self.enabled and self.current is not None:
+            self.locations[obj] = self.current
+
+    def location(self, obj: object) -> str | None:
+        """Get the location of the question an object was bound to."""
+        return self.locations.get(obj)
+
+    def to_dict(self, top: int | None = None) -> dict[str, Any]:
+        """Summarize the collected timings.
+
+        Args:
+            top: Only include the slowest questions (default: all questions).
+
+        Returns:
+            dict[str, Any]: Total time, timings per stage, and timings of the slowest questions.
+        """
+        questions: list[dict[str, Any]] = [
+            {
+                "location": location,
+                "title": self.titles.get(location),
+                "seconds": sum(stages.values()),
+                "stages": dict(stages),
+            }
+            for location, stages in self.questions.items()
+        ]
+        questions.sort(key=lambda question: question["seconds"], reverse=True)
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "stages": {
+                name: {"calls": stats.calls, "seconds": stats.seconds}
+                for name, stats in sorted(
+                    self.stages.items(), key=lambda item: item[1].seconds, reverse=True
+                )
+            },
+            "questions": questions[:top],
+        }
+
+    def to_json(self, top: int | None = None) -> str:
+        """Summarize the collected timings as JSON string."""
+        return json.dumps(self.to_dict(top), indent=2)
+
+    def report(self, top: int = 10) -> str:
+        """Format the collected timings as human-readable tables.
+
+        Args:
+            top: Number of slowest questions to list.
+
+        Returns:
+            str: A table of stages and a table of the slowest questions.
+        """
+        summary = self.to_dict(top)
+        total = summary["seconds"]
+        lines = [f"{'Stage':<20} {'Calls':>8} {'Time [s]':>10} {'Share':>7}"]
+        for name, stats in summary["stages"].items():
+            share = stats["seconds"] / total if total else 0.0
+            lines.append(f"{name:<20} {stats['calls']:>8} {stats['seconds']:>10.3f} {share:>7.1%}")
+        lines.append(f"{'total':<20} {'':>8} {total:>10.3f}")
+
+        if summary["questions"]:
+            lines.extend(["", f"Slowest {len(summary['questions'])} questions:"])
+            for question in summary["questions"]:
+                slowest = max(question["stages"], key=question["stages"].get)
+                lines.append(
+                    f"{question['seconds']:>10.3f} s  {question['location']}  "
+                    f"{question['title'] or ''} (mostly {slowest})"
+                )
+        return "\n".join(lines)
+
+
+profiler = Profiler()
@@ -6,7 +6,7 @@ from loguru import logger
 from moodle_tools.enums import ClozeTypeEnum, DisplayFormatEnum, ShuffleAnswersEnum
 from moodle_tools.questions.multiple_response import MultipleResponseQuestionAnalysis
 from moodle_tools.questions.question import Question
-from moodle_tools.utils import ParsingError
+from moodle_tools.utils import ParsingError, substitute_placeholders
 
 T = TypeVar("T", str, int, float, bool)
 re_id = re.compile(r"""\[\[\"([^\"]*)\"\]\]""")
@@ -41,14 +41,11 @@ class ClozeQuestion(Question):
         return {qid: self.__build_subquestion(qid, sq) for qid, sq in subquestions.items()}
 
     def fill_in_cloze(self) -> None:
-        for match in re.finditer(re_id, self.question):
-            cloze = self.subquestions.get(match.group(1), "")
-            if cloze:
-                self.question = self.question.replace(match.group(0), cloze)
-            else:
-                logger.warning(
-                    "Unable to find matching subquestion for placeholder {}.", match.group(0)
-                )
+        self.question, unresolved = substitute_placeholders(
+            self.question, re_id, {qid: cloze for qid, cloze in self.subquestions.items() if cloze}
+        )
+        for placeholder in unresolved:
+            logger.warning("Unable to find matching subquestion for placeholder {}.", placeholder)
 
     @staticmethod
     def __build_subquestion(subquestion_id: str, question: dict[str, Any]) -> str:
@@ -1,9 +1,12 @@
 """This module implements the abstract base for questions in Moodle CodeRunner."""
 
 import abc
+import json
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Required, TypedDict
 
+import dacite
 from jinja2 import Environment
 from loguru import logger
 
@@ -38,6 +41,42 @@ class Testcase(TypedDict, total=False):
     additional_info: dict[str, Any] | None
 
 
+@dataclass
+class ResourceLimits:
+    """Resource limits of the CodeRunner sandbox that grades a question.
+
+    Args:
+        cpu_time_limit: CPU time limit in seconds (default: the limit configured in CodeRunner).
+        memory_limit: Memory limit in MB (default 1000).
+        num_procs: Maximum number of processes in the sandbox (default 100).
+        threads: Number of threads used by DuckDB in SQL questions (default 1).
+        sandbox_params: Additional parameters that are passed to the sandbox.
+    """
+
+    cpu_time_limit: int | None = None
+    memory_limit: int = 1000
+    num_procs: int = 100
+    threads: int = 1
+    sandbox_params: dict[str, Any] = field(default_factory=dict)
+
+    def validate(self, reserved_memory: int = 0) -> None:
+        """Check that all limits are positive.
+
+        Args:
+            reserved_memory: Memory in MB that the test logic needs in addition to the code under
+                test.
+
+        Raises:
+            ParsingError: If a limit is not positive.
+        """
+        if self.cpu_time_limit is not None and self.cpu_time_limit <= 0:
+            raise ParsingError("The CPU time limit must be a positive number of seconds.")
+        if self.memory_limit <= reserved_memory:
+            raise ParsingError(f"The memory limit must be larger than {reserved_memory} MB.")
+        if self.num_procs <= 0 or self.threads <= 0:
+            raise ParsingError("The number of processes and threads must be positive.")
+
+
 class CoderunnerQuestion(Question):
     """Template for a generic question in Moodle CodeRunner."""
 
@@ -48,6 +87,7 @@ class CoderunnerQuestion(Question):
     RESULT_COLUMNS_DEFAULT: str
     RESULT_COLUMNS_DEBUG: str
     TEST_TEMPLATE: str
+    RESERVED_MEMORY = 0
 
     def __init__(
         self,
@@ -65,6 +105,7 @@ class CoderunnerQuestion(Question):
         parser: str | None = None,
         extra: dict[str, str | dict[str, Any]] | None = None,
         internal_copy: bool = False,
+        resource_limits: dict[str, Any] | None = None,
         **flags: bool,
     ) -> None:
         """Create a new CodeRunner question.
@@ -85,6 +126,7 @@ class CoderunnerQuestion(Question):
             parser: Code parser for formatting the correct answer and testcases.
             extra: Extra information for parsing the question.
             internal_copy: Flag to create an internal copy for debugging purposes.
+            resource_limits: Resource limits of the CodeRunner sandbox (see `ResourceLimits`).
             flags: Additional flags that can be used to control the behavior of the
                 question.
         """
@@ -98,11 +140,20 @@ class CoderunnerQuestion(Question):
         )
 
         self.extra = extra
+        try:
+            self.resource_limits = dacite.from_dict(
+                data_class=ResourceLimits,
+                data=resource_limits or {},
+                config=dacite.Config(strict=True),
+            )
+        except dacite.DaciteError as e:
+            raise ParsingError(f"Invalid resource limits of question '{title}': {e}") from e
+        self.resource_limits.validate(self.RESERVED_MEMORY)
 
         # Apply consistent formatting to the answer code
         self.answer = format_code(self.answer, formatter=self.parser)
 
-        with (Path(__file__).parent / "templates" / self.TEST_TEMPLATE).open(
+        with (Path(__file__).parent / "templates" / self.test_template).open(
             "r", encoding="utf-8"
         ) as file:
             self.test_logic = file.read()
@@ -131,8 +182,8 @@ class CoderunnerQuestion(Question):
                     )
                 testcase["result"] = self.fetch_expected_result(testcase)
 
-                logger.debug("Test code:\n{}", testcase["code"])
-                logger.debug("Test result:\n{}", testcase["result"])
+                logger.trace("Test code:\n{}", testcase["code"])
+                logger.trace("Test result:\n{}", testcase["result"])
 
                 self.validate_query(testcase)
 
@@ -152,6 +203,23 @@ class CoderunnerQuestion(Question):
 
             self.testcases.append(testcase)
 
+    @property
+    def sandbox_params(self) -> str:
+        """Parameters of the CodeRunner sandbox as JSON string."""
+        return json.dumps(
+            {"numprocs": self.resource_limits.num_procs} | self.resource_limits.sandbox_params
+        )
+
+    @property
+    def template_params(self) -> str:
+        """Template parameters that are available to the test logic as JSON string."""
+        return ""
+
+    @property
+    def test_template(self) -> str:
+        """Name of the template file that contains the CodeRunner test logic."""
+        return self.TEST_TEMPLATE
+
     @property
     @abc.abstractmethod
     def files(self) -> list[dict[str, str]]:
@@ -198,11 +266,11 @@ class CoderunnerQuestion(Question):
         """Generate a Moodle XML export of the question."""
         template = env.get_template(self.XML_TEMPLATE)
         return template.render(
-            self.__dict__
-            | {
-                "type": self.QUESTION_TYPE,
-                "ace_lang": self.ACE_LANG,
-                "coderunner_type": self.CODERUNNER_TYPE,
-                "files": self.files,
-            }
+            self.__dict__,
+            type=self.QUESTION_TYPE,
+            ace_lang=self.ACE_LANG,
+            coderunner_type=self.CODERUNNER_TYPE,
+            files=self.files,
+            sandbox_params=self.sandbox_params,
+            template_params=self.template_params,
         )
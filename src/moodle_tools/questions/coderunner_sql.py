@@ -2,10 +2,8 @@
 
 import io
 import json
-import random
 import re
 import shutil
-import string
 import tempfile
 from base64 import b64encode
 from collections.abc import Generator, Iterable
@@ -17,6 +15,9 @@ import duckdb
 from jinja2 import Environment, PackageLoader, select_autoescape
 from loguru import logger
 
+from moodle_tools.dependencies import dependency_tracker
+from moodle_tools.enums import ConnectionMode
+from moodle_tools.profiling import profiler
 from moodle_tools.questions.coderunner import CoderunnerQuestion, Testcase
 from moodle_tools.utils import ParsingError, preprocess_text
 
@@ -67,6 +68,8 @@ class CoderunnerSQLQuestion(CoderunnerQuestion):
     ACE_LANG = "sql"
     MAX_ROWS = 50
     MAX_WIDTH = 500
+    RESERVED_MEMORY = 50  # The test logic leaves this much memory to Python, DuckDB gets the rest
+    TEST_TEMPLATE_PER_RUN: str | None = None
 
     def __init__(
         self,
@@ -85,7 +88,9 @@ class CoderunnerSQLQuestion(CoderunnerQuestion):
         parser: str | None = None,
         extra: dict[str, str | dict[str, Any]] | None = None,
         internal_copy: bool = False,
+        resource_limits: dict[str, Any] | None = None,
         database_connection: bool = True,
+        connection_mode: str = "per_testcase",
         **flags: bool,
     ) -> None:
         """Create a new SQL question.
@@ -107,27 +112,30 @@ class CoderunnerSQLQuestion(CoderunnerQuestion):
             parser: Code parser for formatting the correct answer and testcases.
             extra: Extra information for parsing the question.
             internal_copy: Flag to create an internal copy for debugging purposes.
+            resource_limits: Resource limits of the CodeRunner sandbox.
             database_connection: If True, connect to the provided database to fetch the expected
                 result. If False, use the provided result.
+            connection_mode: How the generated test logic isolates testcases inside the CodeRunner
+                sandbox. `per_testcase` copies the database and connects to it for every
+                testcase, `per_run` opens the database only once per run (DQL questions only).
             flags: Additional flags that can be used to control the behavior of the
                 question.
         """
         self.inmemory_db = database_path == ":memory:"
+        self.database_path = Path(database_path).absolute()
+        self.inmemory_connection: duckdb.DuckDBPyConnection | None = None
+        if not self.inmemory_db:
+            dependency_tracker.record(self.database_path)
 
-        if self.inmemory_db:
-            self.database_path = Path(
-                f"db-{''.join(random.choices(string.digits, k=12))}.db"  # noqa: S311
-            ).absolute()
-            duckdb.connect(self.database_path, config={"threads": 1}).close()
-
-        else:
-            self.database_path = Path(database_path).absolute()
-            if not self.database_path.exists():
-                raise FileNotFoundError(
-                    f"Provided database path does not exist: {self.database_path}"
-                )
+        if not self.inmemory_db and not self.database_path.exists():
+            raise FileNotFoundError(f"Provided database path does not exist: {self.database_path}")
 
         self.database_connection = database_connection
+        self.connection_mode = ConnectionMode.from_str(connection_mode)
+        if self.connection_mode == ConnectionMode.PER_RUN and self.TEST_TEMPLATE_PER_RUN is None:
+            raise ParsingError(
+                f"The connection mode '{connection_mode}' is only supported by DQL questions."
+            )
 
         answer = answer.strip()
 
@@ -150,6 +158,7 @@ class CoderunnerSQLQuestion(CoderunnerQuestion):
             parser=parser,
             extra=extra,
             internal_copy=internal_copy,
+            resource_limits=resource_limits,
             **flags,
         )
 
@@ -166,12 +175,66 @@ class CoderunnerSQLQuestion(CoderunnerQuestion):
 
         return [files]
 
+    @property
+    def template_params(self) -> str:
+        return json.dumps({"threads": self.resource_limits.threads})
+
+    @property
+    def test_template(self) -> str:
+        if self.connection_mode == ConnectionMode.PER_RUN and self.TEST_TEMPLATE_PER_RUN:
+            return self.TEST_TEMPLATE_PER_RUN
+        return self.TEST_TEMPLATE
+
+    @contextmanager
+    def open_connection(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """Open a connection to a fresh, isolated instance of the question's database.
+
+        File databases are copied to a temporary file. In-memory databases share a single DuckDB
+        instance per question, and each connection works on its own freshly attached in-memory
+        catalog that is detached again afterwards.
+
+        Yields:
+            duckdb.DuckDBPyConnection: A connection to the database.
+        """
+        with profiler.stage("duckdb"):
+            if not self.inmemory_db:
+                with open_tmp_db_connection(self.database_path) as con:
+                    yield con
+                return
+
+            if self.inmemory_connection is None:
+                self.inmemory_connection = duckdb.connect(":memory:", config={"threads": 1})
+
+            # A cursor has its own client context, so temporary objects and the selected catalog
+            # do not leak from one connection to the next.
+            con = self.inmemory_connection.cursor()
+            try:
+                con.execute("ATTACH ':memory:' AS isolated; USE isolated;")
+                yield con
+            finally:
+                con.close()
+                self.inmemory_connection.execute("DETACH DATABASE IF EXISTS isolated;")
+
+    def validate(self) -> list[str]:
+        errors = super().validate()
+        if not self.inmemory_db:
+            database_size_mb = self.database_path.stat().st_size / 1024**2
+            duckdb_memory_mb = self.resource_limits.memory_limit - self.RESERVED_MEMORY
+            if database_size_mb >= duckdb_memory_mb:
+                errors.append(
+                    f"The database ({database_size_mb:.0f} MB) does not fit into the DuckDB "
+                    f"memory limit of {duckdb_memory_mb} MB. Increase "
+                    "`resource_limits.memory_limit`."
+                )
+        return errors
+
     def cleanup(self) -> None:
         logger.debug("Cleaning up {}.", self.__class__.__name__)
 
-        if self.inmemory_db:
-            logger.debug("Removing temporary DB file.")
-            self.database_path.unlink()
+        if self.inmemory_connection is not None:
+            logger.debug("Closing in-memory DB connection.")
+            self.inmemory_connection.close()
+            self.inmemory_connection = None
 
 
 class CoderunnerDDLQuestion(CoderunnerSQLQuestion):
@@ -203,7 +266,9 @@ class CoderunnerDDLQuestion(CoderunnerSQLQuestion):
         parser: str | None = None,
         extra: dict[str, str | dict[str, Any]] | None = None,
         internal_copy: bool = False,
+        resource_limits: dict[str, Any] | None = None,
         database_connection: bool = True,
+        connection_mode: str = "per_testcase",
         **flags: bool,
     ) -> None:
         super().__init__(
@@ -221,7 +286,9 @@ class CoderunnerDDLQuestion(CoderunnerSQLQuestion):
             parser=parser,
             extra=extra,
             internal_copy=internal_copy,
+            resource_limits=resource_limits,
             database_connection=database_connection,
+            connection_mode=connection_mode,
             **flags,
         )
 
@@ -358,7 +425,7 @@ class CoderunnerDDLQuestion(CoderunnerSQLQuestion):
         # A DDL/DML test might include multiple statements, so we need to split them
         statements = [code for code in testcase["code"].split(";") if code.strip()]
         stdout_capture = io.StringIO()
-        with redirect_stdout(stdout_capture), open_tmp_db_connection(self.database_path) as con:
+        with redirect_stdout(stdout_capture), self.open_connection() as con:
             con.sql(self.answer)
             for statement in statements:
                 try:
@@ -437,6 +504,7 @@ class CoderunnerDQLQuestion(CoderunnerSQLQuestion):
     RESULT_COLUMNS_DEFAULT = ""  # TODO
     RESULT_COLUMNS_DEBUG = ""  # TODO
     TEST_TEMPLATE = "testlogic_dql.py.j2"
+    TEST_TEMPLATE_PER_RUN = "testlogic_dql_per_run.py.j2"
 
     def __init__(
         self,
@@ -455,7 +523,9 @@ class CoderunnerDQLQuestion(CoderunnerSQLQuestion):
         parser: str | None = None,
         extra: dict[str, str | dict[str, Any]] | None = None,
         internal_copy: bool = False,
+        resource_limits: dict[str, Any] | None = None,
         database_connection: bool = True,
+        connection_mode: str = "per_testcase",
         **flags: bool,
     ) -> None:
         super().__init__(
@@ -473,7 +543,9 @@ class CoderunnerDQLQuestion(CoderunnerSQLQuestion):
             parser=parser,
             extra=extra,
             internal_copy=internal_copy,
+            resource_limits=resource_limits,
             database_connection=database_connection,
+            connection_mode=connection_mode,
             **flags,
         )
 
@@ -494,7 +566,7 @@ class CoderunnerDQLQuestion(CoderunnerSQLQuestion):
             raise ParsingError(DB_CONNECTION_ERROR)
 
         stdout_capture = io.StringIO()
-        with redirect_stdout(stdout_capture), open_tmp_db_connection(self.database_path) as con:
+        with redirect_stdout(stdout_capture), self.open_connection() as con:
             con.sql(testcase["code"])
             res = con.sql(self.answer)
             if res:
@@ -516,7 +588,7 @@ class CoderunnerDQLQuestion(CoderunnerSQLQuestion):
         if not self.database_connection:
             raise ParsingError(DB_CONNECTION_ERROR)
 
-        with open_tmp_db_connection(self.database_path) as con:
+        with self.open_connection() as con:
             # Run the query, so that we can then get the schema output
             result = con.sql(query)
             result_schema = result.description
@@ -3,13 +3,23 @@
 import inspect
 import io
 import shutil
+import subprocess
+import sys
+import tempfile
 from base64 import b64encode
-from contextlib import redirect_stdout
+from collections.abc import Generator
+from contextlib import contextmanager, redirect_stdout
+from functools import cache, lru_cache
 from pathlib import Path
+from types import CodeType
 from typing import Any
 
 from isda_streaming import data_stream, synopsis
+from loguru import logger
 
+from moodle_tools.dependencies import dependency_tracker
+from moodle_tools.enums import InputStreamMode
+from moodle_tools.profiling import profiler
 from moodle_tools.questions.coderunner import CoderunnerQuestion, Testcase
 
 ISDA_STREAMING_IMPORTS = """
@@ -20,6 +30,64 @@ from isda_streaming.synopsis import CountMinSketch, BloomFilter, ReservoirSample
 """
 
 
+@lru_cache(maxsize=1024)
+def compile_code(source: str) -> CodeType:
+    """Compile a piece of Python code once and reuse the code object for identical sources.
+
+    Args:
+        source: The Python source code.
+
+    Returns:
+        CodeType: The compiled code object.
+    """
+    return compile(source, "<string>", "exec")
+
+
+@cache
+def streaming_namespace() -> dict[str, Any]:
+    """Execute the ISDA Streaming imports once and return the resulting global namespace.
+
+    Callers must copy the namespace before executing code in it.
+
+    Returns:
+        dict[str, Any]: The global namespace containing the ISDA Streaming imports.
+    """
+    namespace: dict[str, Any] = {}
+    exec(compile_code(ISDA_STREAMING_IMPORTS), namespace)  # noqa: S102
+    return namespace
+
+
+def execute_in_directory(source: str, directory: Path) -> str:
+    """Execute a piece of Python code in a separate interpreter with its own working directory.
+
+    Like in the CodeRunner sandbox, all relative paths used by the code, e.g., by `open`,
+    `pathlib`, or `pandas`, are resolved against the given directory.
+
+    Args:
+        source: The Python source code.
+        directory: The working directory of the interpreter.
+
+    Returns:
+        str: The standard output of the code.
+
+    Raises:
+        RuntimeError: If the code exits with an error.
+    """
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", source],
+        cwd=directory,
+        capture_output=True,
+        check=False,
+        text=True,
+    )
+    if process.returncode != 0:
+        stderr = process.stderr.strip()
+        raise RuntimeError(
+            stderr.splitlines()[-1] if stderr else f"Exit code {process.returncode}"
+        )
+    return process.stdout
+
+
 class CoderunnerStreamingQuestion(CoderunnerQuestion):
     """Template for a question using ISDA Streaming in Moodle CodeRunner."""
 
@@ -39,6 +107,7 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
         answer: str,
         testcases: list[Testcase],
         input_stream: str | Path,
+        input_stream_mode: str = "cwd",
         category: str | None = None,
         grade: float = 1,
         general_feedback: str = "",
@@ -48,6 +117,7 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
         parser: str | None = None,
         extra: dict[str, Any] | None = None,
         internal_copy: bool = False,
+        resource_limits: dict[str, Any] | None = None,
         **flags: bool,
     ) -> None:
         """Create a new ISDA Streaming question.
@@ -58,6 +128,10 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
             answer: The piece of code that, when executed, leads to the correct result.
             testcases: List of testcases for checking the student answer.
             input_stream: Path to a CSV file that simulates the input data stream.
+            input_stream_mode: How the input stream is provided to the executed code. `cwd`
+                copies it into the current working directory for each testcase, `tempdir` links
+                it into a temporary directory that is created once per question and executes
+                each testcase in a separate interpreter with this working directory.
             category: The category of the question.
             grade: The total number of points of the question.
             general_feedback: Feedback that is displayed once the quiz has closed.
@@ -69,9 +143,13 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
             parser: Code parser for formatting the correct answer and testcases.
             extra: Extra information for parsing the question.
             internal_copy: Flag to create an internal copy for debugging purposes.
+            resource_limits: Resource limits of the CodeRunner sandbox.
             **flags: Additional flags for the question.
         """
         self.input_stream = Path(input_stream).absolute()
+        dependency_tracker.record(self.input_stream)
+        self.input_stream_mode = InputStreamMode.from_str(input_stream_mode)
+        self.stream_dir: tempfile.TemporaryDirectory[str] | None = None
 
         # pylint: disable=duplicate-code
         super().__init__(
@@ -88,6 +166,7 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
             parser=parser,
             extra=extra,
             internal_copy=internal_copy,
+            resource_limits=resource_limits,
             **flags,
         )
 
@@ -115,16 +194,47 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
             )
         return files
 
-    def fetch_expected_result(self, testcase: Testcase) -> str:
-        # TODO: Add test
-        shutil.copy(self.input_stream, self.input_stream.name)
+    @contextmanager
+    def staged_input_stream(self) -> Generator[Path, None, None]:
+        """Make the input stream available to the executed code under its file name.
+
+        Yields:
+            Path: The directory that contains the input stream.
+        """
+        if self.input_stream_mode == InputStreamMode.CWD:
+            shutil.copy(self.input_stream, self.input_stream.name)
+            try:
+                yield Path.cwd()
+            finally:
+                Path(self.input_stream.name).unlink()
+            return
 
+        if self.stream_dir is None:
+            self.stream_dir = tempfile.TemporaryDirectory(prefix="moodle-tools-")
+        staged_stream = Path(self.stream_dir.name) / self.input_stream.name
+        if not staged_stream.is_symlink() and not staged_stream.exists():
+            try:
+                staged_stream.symlink_to(self.input_stream)
+            except OSError:
+                shutil.copy(self.input_stream, staged_stream)
+
+        yield Path(self.stream_dir.name)
+
+    def fetch_expected_result(self, testcase: Testcase) -> str:
         stdout_capture = io.StringIO()
         combined_code = f"{ISDA_STREAMING_IMPORTS}\n\n{self.answer}\n\n{testcase['code']}"
 
+        # The answer is executed per testcase in a copy of the pre-imported namespace so that its
+        # functions resolve globals defined by the testcase, but nothing is compiled twice.
         try:
-            with redirect_stdout(stdout_capture):
-                exec(combined_code, {})  # noqa: S102
+            with profiler.stage("streaming"), self.staged_input_stream() as directory:
+                if self.input_stream_mode == InputStreamMode.TEMPDIR:
+                    return execute_in_directory(combined_code, directory)
+
+                with redirect_stdout(stdout_capture):
+                    namespace = streaming_namespace().copy()
+                    exec(compile_code(self.answer), namespace)  # noqa: S102
+                    exec(compile_code(testcase["code"]), namespace)  # noqa: S102
         except Exception as e:
             # Error occurred during execution of the test code
             error_type = type(e).__name__
@@ -142,7 +252,13 @@ class CoderunnerStreamingQuestion(CoderunnerQuestion):
 
                 ------------------------------"""
             ) from e
-        finally:
-            Path(self.input_stream.name).unlink()
 
         return stdout_capture.getvalue()
+
+    def cleanup(self) -> None:
+        logger.debug("Cleaning up {}.", self.__class__.__name__)
+
+        if self.stream_dir is not None:
+            logger.debug("Removing temporary input stream directory.")
+            self.stream_dir.cleanup()
+            self.stream_dir = None
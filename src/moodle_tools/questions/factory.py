@@ -1,5 +1,6 @@
 from typing import Any
 
+from moodle_tools.profiling import profiler
 from moodle_tools.utils import ParsingError
 
 from .cloze import ClozeQuestion
@@ -54,5 +55,6 @@ except ImportError:
 
 def create_question(question_type: str, **properties: Any) -> Question:  # noqa: ANN401
     if question_type in SUPPORTED_QUESTION_TYPES:
-        return SUPPORTED_QUESTION_TYPES[question_type](**properties)
+        with profiler.stage("question"):
+            return SUPPORTED_QUESTION_TYPES[question_type](**properties)
     raise ParsingError(f"Unsupported Question Type: {question_type}.")
@@ -7,7 +7,7 @@ from loguru import logger
 from moodle_tools.enums import ShuffleAnswersEnum
 from moodle_tools.questions.multiple_response import MultipleResponseQuestionAnalysis
 from moodle_tools.questions.question import Question
-from moodle_tools.utils import ParsingError, preprocess_text
+from moodle_tools.utils import ParsingError, preprocess_text, substitute_placeholders
 
 re_solution_ref_number = re.compile(r"\[\[(\d+)\]\]")
 re_id = re.compile(r"""\[\[\"([^\"]*)\"\]\]""")
@@ -87,12 +87,11 @@ class MissingWordsQuestion(Question):
 
     def resolve_ids(self) -> None:
         """Resolve IDs in the question text to solution reference numbers as required by moodle."""
-        for match in re.finditer(re_id, self.question):
-            for option in self.options:
-                if option["answer"] == match.group(1):
-                    self.question = self.question.replace(
-                        match.group(0), f"[[{option['ordinal']}]]"
-                    )
+        ordinals: dict[str, str] = {}
+        for option in self.options:
+            if isinstance(option["answer"], str):
+                ordinals.setdefault(option["answer"], f"[[{option['ordinal']}]]")
+        self.question, _ = substitute_placeholders(self.question, re_id, ordinals)
 
     def sort_options(self) -> None:
         """Sort options within groups based on shuffling algorithm."""
@@ -108,16 +107,14 @@ class MissingWordsQuestion(Question):
 
             options = sorted(self.options, key=lambda x: (x["group"], x["answer"]))
 
-            for _, option in enumerate(options):
-                old_ord = option["ordinal"]
+            new_ordinals: dict[str, str] = {}
+            for option in options:
                 new_ord = int(next(ordinals_in_group[option["group"]]))
-
+                new_ordinals.setdefault(str(option["ordinal"]), f"[[{new_ord}]]")
                 option["ordinal"] = new_ord
-                self.question = re.sub(
-                    rf"\[\[{old_ord}\]\]", f"[[!!NEWORD!!{new_ord}]]", self.question
-                )
-
-            self.question = self.question.replace("!!NEWORD!!", "")
+            self.question, _ = substitute_placeholders(
+                self.question, re_solution_ref_number, new_ordinals
+            )
 
             self.options = sorted(options, key=lambda x: x["ordinal"])
 
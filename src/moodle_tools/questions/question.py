@@ -6,6 +6,7 @@ from typing import Any, NamedTuple
 from jinja2 import Environment
 from loguru import logger
 
+from moodle_tools.profiling import profiler
 from moodle_tools.utils import preprocess_text
 
 
@@ -25,7 +26,8 @@ class Question(ABC):
         **flags: bool,
     ) -> None:
         """General template for a question."""
-        logger.debug("Parsing {} '{}'", self.__class__.__name__, question)
+        logger.debug("Parsing {} '{}'", self.__class__.__name__, title)
+        logger.trace("Question text:\n{}", question)
 
         self.question = preprocess_text(question, **flags)
         self.title = title
@@ -49,13 +51,22 @@ class Question(ABC):
 
     def to_xml(self, env: Environment) -> str:
         """Generate a Moodle XML export of the question."""
-        template = env.get_template(self.XML_TEMPLATE)
-        return template.render(self.__dict__ | {"type": self.QUESTION_TYPE})
+        with profiler.stage("jinja"):
+            template = env.get_template(self.XML_TEMPLATE)
+            # Jinja copies the attributes into its context, so they are not merged beforehand
+            return template.render(self.__dict__, type=self.QUESTION_TYPE)
 
     def cleanup(self) -> None:  # noqa: B027
         """Cleanup any resources used by the question."""
         pass  # noqa: PIE790
 
+    def release(self) -> None:
+        """Release the content of the question, e.g., texts and testcases, after rendering it.
+
+        Only the title and the category are kept, so the question cannot be rendered again.
+        """
+        self.__dict__ = {"title": self.title, "category": self.category}
+
 
 class AnalysisItem(NamedTuple):
     question_id: str
@@ -0,0 +1,194 @@
+"""Schemas of question documents derived from the signatures of the question constructors.
+
+A schema checks the fields of a YAML document before the question is constructed, i.e., before
+Markdown is parsed, images are inlined, or SQL and streaming code is executed. It reports
+missing fields, fields of the wrong type, and unknown fields. The checks follow the type hints
+of the constructor parameters, with two relaxations: text fields also accept numbers, because
+YAML parses `42` as a number and the constructors convert it to text, and only the kind of
+lists and mappings is checked, because many constructors accept more item shapes than their
+hints state, e.g., answers as text or as mapping.
+"""
+
+import enum
+import functools
+import inspect
+import pathlib
+import types
+import typing
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from .factory import SUPPORTED_QUESTION_TYPES
+from .question import Question
+
+Check = Callable[[Any], bool]
+
+# Keys of a question document that are consumed by the loader, not by the constructor
+LOADER_FIELDS = frozenset({"type"})
+
+
+def describe(annotation: Any) -> str:  # noqa: ANN401
+    """Describe a type hint in an error message, e.g., `list[str] | None`."""
+    if isinstance(annotation, type) and not typing.get_args(annotation):
+        return annotation.__name__
+    return str(annotation).replace("typing.", "").replace("collections.abc.", "")
+
+
+def compile_check(annotation: Any) -> Check:  # noqa: ANN401, C901, PLR0911
+    """Compile a type hint into a function that checks whether a parsed YAML value matches it.
+
+    Args:
+        annotation: The type hint of a constructor parameter.
+
+    Returns:
+        Check: A function that returns True if a value matches the type hint.
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if annotation is Any:
+        return lambda _: True
+    if annotation is None or annotation is type(None):
+        return lambda value: value is None
+    if origin in (typing.Union, types.UnionType):
+        checks = [compile_check(arg) for arg in args]
+        return lambda value: any(check(value) for check in checks)
+    if origin is typing.Literal:
+        return lambda value: value in args
+    if origin in (list, Sequence):
+        return lambda value: isinstance(value, list)
+    if origin in (dict, Mapping) or typing.is_typeddict(annotation):
+        return lambda value: isinstance(value, dict)
+    if isinstance(annotation, type) and issubclass(annotation, enum.StrEnum):
+        names = {member.name for member in annotation}
+        return lambda value: isinstance(value, str) and (not value or value.upper() in names)
+    if annotation is str:
+        return lambda value: isinstance(value, str | int | float)
+    if annotation is float:
+        return lambda value: isinstance(value, int | float) and not isinstance(value, bool)
+    if annotation is int:
+        return lambda value: isinstance(value, int) and not isinstance(value, bool)
+    if annotation is pathlib.Path:
+        return lambda value: isinstance(value, str | pathlib.Path)
+    if isinstance(annotation, type):
+        return lambda value: isinstance(value, annotation)
+    return compile_check(Any)
+
+
+@dataclass(frozen=True)
+class QuestionSchema:
+    """The schema of the documents of a question type.
+
+    Attributes:
+        question_type: The question type, e.g., `numerical`.
+        fields: A check and a description of the expected type of each field.
+        required: Fields without a default value.
+        flags: The constructor accepts further boolean fields as flags, e.g., `markdown`.
+    """
+
+    question_type: str
+    fields: dict[str, tuple[Check, str]]
+    required: frozenset[str]
+    flags: bool
+
+    @classmethod
+    def from_constructor(
+        cls, question_type: str, question_class: type[Question]
+    ) -> "QuestionSchema":
+        """Derive the schema of a question type from the signature of its constructor.
+
+        Args:
+            question_type: The question type.
+            question_class: The class of the question type.
+
+        Returns:
+            QuestionSchema: The schema.
+        """
+        hints = typing.get_type_hints(question_class.__init__)
+        fields = {}
+        required = set()
+        flags = False
+        for name, parameter in inspect.signature(question_class.__init__).parameters.items():
+            if name == "self" or parameter.kind is inspect.Parameter.VAR_POSITIONAL:
+                continue
+            if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+                flags = True
+                continue
+            annotation = hints.get(name, Any)
+            fields[name] = (compile_check(annotation), describe(annotation))
+            if parameter.default is inspect.Parameter.empty:
+                required.add(name)
+        return cls(question_type, fields, frozenset(required), flags)
+
+    def check(self, document: dict[str, Any]) -> list[str]:
+        """Check a question document for missing fields and fields of the wrong type.
+
+        Args:
+            document: The question document, including the loader field `type`.
+
+        Returns:
+            list[str]: All errors of the document.
+        """
+        errors = [
+            f"Missing field '{name}' of type {self.fields[name][1]}."
+            for name in sorted(self.required - document.keys())
+        ]
+        for name, value in document.items():
+            if name in self.fields and not self.fields[name][0](value):
+                errors.append(
+                    f"Field '{name}' must be of type {self.fields[name][1]}, got "
+                    f"{type(value).__name__}: {value!r:.60}"
+                )
+        return errors
+
+    def unknown_fields(self, document: dict[str, Any]) -> list[str]:
+        """Get the fields of a document that the constructor ignores.
+
+        Boolean fields are passed to the constructor as flags, if it accepts flags.
+
+        Args:
+            document: The question document, including the loader field `type`.
+
+        Returns:
+            list[str]: The names of the unknown fields.
+        """
+        return [
+            name
+            for name, value in document.items()
+            if name not in self.fields
+            and name not in LOADER_FIELDS
+            and not (self.flags and isinstance(value, bool))
+        ]
+
+
+@functools.cache
+def get_schemas() -> dict[str, QuestionSchema]:
+    """Compile the schemas of all supported question types once."""
+    return {
+        question_type: QuestionSchema.from_constructor(question_type, question_class)
+        for question_type, question_class in SUPPORTED_QUESTION_TYPES.items()
+    }
+
+
+def check_document(document: dict[str, Any]) -> tuple[list[str], list[str]]:
+    """Check a question document against the schema of its question type.
+
+    Args:
+        document: The question document after defaults and variants have been applied.
+
+    Returns:
+        tuple[list[str], list[str]]: The errors of the document and warnings about unknown
+            fields, which are ignored by the constructor.
+    """
+    question_type = document.get("type")
+    if question_type is None:
+        return ["Missing field 'type'."], []
+    schema = get_schemas().get(question_type)
+    if schema is None:
+        return [f"Unsupported Question Type: {question_type}."], []
+    if document.get("internal_copy") and "internal_copy" not in schema.fields:
+        # The loader replaces the flag by a second question
+        document = {key: value for key, value in document.items() if key != "internal_copy"}
+    warnings = [f"Unknown field '{name}' is ignored." for name in schema.unknown_fields(document)]
+    return schema.check(document), warnings
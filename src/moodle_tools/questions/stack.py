@@ -7,7 +7,7 @@ from dacite import Config
 
 from moodle_tools.enums import ScoreMode, STACKMatchType
 from moodle_tools.questions.question import Question
-from moodle_tools.utils import preprocess_text
+from moodle_tools.utils import preprocess_text, substitute_placeholders
 
 
 @dataclass
@@ -170,14 +170,15 @@ class STACKQuestion(Question):
         self.replace_input_placeholder()
 
     def replace_input_placeholder(self) -> None:
-        input_matches = list(re_id.finditer(self.question))
-        inputs = {match.group(1): match.group(0) for match in input_matches}
-
-        if len(inputs) != len(input_matches):
+        input_names = re_id.findall(self.question)
+        if len(set(input_names)) != len(input_names):
             raise ValueError("Duplicate input variables found in the question text.")
 
-        for i in inputs.items():
-            self.question = self.question.replace(i[1], f"[[input:{i[0]}]] [[validation:{i[0]}]]")
+        self.question, _ = substitute_placeholders(
+            self.question,
+            re_id,
+            {name: f"[[input:{name}]] [[validation:{name}]]" for name in input_names},
+        )
 
     def validate(self) -> list[str]:
         """Validate the STACK question.
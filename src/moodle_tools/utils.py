@@ -1,10 +1,16 @@
 import base64
+import copy
 import re
+from collections.abc import Mapping
 from pathlib import Path
+from typing import Any
 
 import markdown
 from loguru import logger
 
+from moodle_tools.dependencies import dependency_tracker
+from moodle_tools.profiling import profiler
+
 try:
     import sqlparse  # type: ignore
 except ImportError:
@@ -21,8 +27,19 @@ def parse_markdown(text: str) -> str:
     return markdown.markdown(text, extensions=["tables", "attr_list", "md_in_html"])
 
 
-def inline_images(text: str) -> str:
-    """Detect SVG or PNG images in a question text and inline them with base64 encoding."""
+def inline_images(text: str, embed: bool = True) -> str:
+    """Detect SVG or PNG images in a question text and inline them with base64 encoding.
+
+    Args:
+        text: The question text.
+        embed: Embed the images. If False, only check that the images exist (default True).
+
+    Returns:
+        str: The text with inlined images.
+
+    Raises:
+        FileNotFoundError: If an image does not exist.
+    """
     re_img = re.compile(
         r"""(?:<img alt="[^"]*" src="|"""  # opening tag for html img
         r"""background-image:\s*url\(')"""  # opening css background-image property
@@ -32,6 +49,11 @@ def inline_images(text: str) -> str:
     )
     for match in re_img.finditer(text):
         filename = Path(match.group(1))
+        dependency_tracker.record(filename)
+        if not embed:
+            if not filename.is_file():
+                raise FileNotFoundError(f"Image not found: {filename}")
+            continue
         with filename.open("rb") as file:
             base64_str = base64.b64encode(file.read()).decode("utf-8")
             img_type = "svg+xml" if filename.suffix == ".svg" else filename.suffix.replace(".", "")
@@ -48,14 +70,21 @@ def preprocess_text(text: str | None, **flags: bool) -> str:
     Flags:
     - markdown: Bool
     - table_styling: Bool
+    - inline_images: Bool, only check that images exist if False (optional, default True)
     """
     if not text:
-        logger.debug("Received empty text, doing nothing.")
+        logger.trace("Received empty text, doing nothing.")
         return ""
 
-    text = parse_markdown(text) if flags["markdown"] else text
-    text = inline_images(text)
-    return format_tables(text) if flags["table_styling"] else text
+    if flags["markdown"]:
+        with profiler.stage("markdown"):
+            text = parse_markdown(text)
+    with profiler.stage("images"):
+        text = inline_images(text, flags.get("inline_images", True))
+    if flags["table_styling"]:
+        with profiler.stage("table_styling"):
+            text = format_tables(text)
+    return text
 
 
 def format_code(code: str, formatter: str | None = None) -> str:
@@ -68,6 +97,11 @@ def format_code(code: str, formatter: str | None = None) -> str:
     Returns:
         str: Code that has been parsed with the selected formatter.
     """
+    with profiler.stage("format_code"):
+        return _format_code(code, formatter)
+
+
+def _format_code(code: str, formatter: str | None) -> str:
     match formatter:
         case None:
             return code
@@ -85,6 +119,51 @@ def format_code(code: str, formatter: str | None = None) -> str:
             raise ParsingError(f"Formatter not supported: {formatter}")
 
 
+def substitute_placeholders(
+    text: str, pattern: re.Pattern[str], replacements: Mapping[str, str]
+) -> tuple[str, list[str]]:
+    """Replace all placeholders in a text in a single pass.
+
+    Args:
+        text: The text with placeholders, e.g., `[["id"]]` or `[[1]]`.
+        pattern: Matches a placeholder. Its first group is the key of the placeholder.
+        replacements: The replacement of each key.
+
+    Returns:
+        tuple[str, list[str]]: The text and the placeholders without replacement, which are
+            kept in the text.
+    """
+    unresolved = []
+
+    def replace(match: re.Match[str]) -> str:
+        replacement = replacements.get(match.group(1))
+        if replacement is None:
+            unresolved.append(match.group(0))
+            return match.group(0)
+        return replacement
+
+    return pattern.sub(replace, text), unresolved
+
+
+def merge_defaults(defaults: dict[str, Any], document: dict[str, Any]) -> dict[str, Any]:
+    """Recursively merge a document into a copy of default values.
+
+    Args:
+        defaults: Default values.
+        document: Values that take precedence over the defaults.
+
+    Returns:
+        dict[str, Any]: The merged document.
+    """
+    merged = copy.deepcopy(defaults)
+    for key, value in document.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_defaults(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 def parse_filesize(size: str | int) -> int:
     """Parse a human-readable filesize into bytes.
 
@@ -0,0 +1,134 @@
+"""Expansion of parametrized questions into variants.
+
+A question document with a `variants` block declares parameters and their values. The document
+is expanded into one question per combination of parameter values. Strings in the document can
+contain expressions in double braces, e.g., `{{ a * b }}`, which are evaluated with the values
+of each variant.
+"""
+
+import itertools
+import math
+import re
+from typing import Any
+
+from moodle_tools.utils import ParsingError, substitute_placeholders
+from moodle_tools.yaml_constructors import ExpressionEvaluator
+
+re_expression = re.compile(r"\{\{\s*(.+?)\s*\}\}", re.DOTALL)
+
+
+def parameter_values(name: str, spec: Any) -> list[Any]:  # noqa: ANN401
+    """Get the values of a parameter.
+
+    Args:
+        name: Name of the parameter.
+        spec: A list of values or a range as mapping with the keys `start`, `stop`, and the
+            optional `step` (default 1). Like Python's `range`, `stop` is not included.
+
+    Returns:
+        list[Any]: The values of the parameter.
+
+    Raises:
+        ParsingError: If the specification is invalid.
+    """
+    if isinstance(spec, list) and spec:
+        return spec
+    if isinstance(spec, dict) and {"start", "stop"} <= spec.keys() <= {"start", "stop", "step"}:
+        start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+        if all(isinstance(value, int) for value in (start, stop, step)) and step:
+            return list(range(start, stop, step))
+        if all(isinstance(value, int | float) for value in (start, stop, step)) and step:
+            # Round to avoid values like 0.30000000000000004
+            return [
+                round(start + i * step, 12)
+                for i in range(max(0, math.ceil((stop - start) / step)))
+            ]
+    raise ParsingError(
+        f"Invalid values of variant parameter '{name}': {spec}. Provide a non-empty list or a "
+        "mapping with start, stop, and optional step."
+    )
+
+
+def collect_expressions(value: Any, expressions: dict[str, None]) -> None:  # noqa: ANN401
+    """Collect the expressions in all strings of a document in order of appearance."""
+    if isinstance(value, str):
+        expressions.update((match.group(1), None) for match in re_expression.finditer(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            collect_expressions(item, expressions)
+    elif isinstance(value, list):
+        for item in value:
+            collect_expressions(item, expressions)
+
+
+def render(value: Any, results: dict[str, Any], texts: dict[str, str]) -> Any:  # noqa: ANN401
+    """Replace the expressions in a document with their results.
+
+    A string that consists of a single expression is replaced by the result itself, e.g., a
+    number. Otherwise, the results are inserted into the string.
+
+    Args:
+        value: The document or a value in it.
+        results: The result of each expression.
+        texts: The result of each expression as string.
+
+    Returns:
+        Any: The value with results instead of expressions.
+    """
+    if isinstance(value, str):
+        if (match := re_expression.fullmatch(value)) is not None:
+            return results[match.group(1)]
+        return substitute_placeholders(value, re_expression, texts)[0]
+    if isinstance(value, dict):
+        return {key: render(item, results, texts) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render(item, results, texts) for item in value]
+    return value
+
+
+def expand_variants(
+    document: dict[str, Any], evaluator: ExpressionEvaluator | None
+) -> list[dict[str, Any]]:
+    """Expand a question document with a `variants` block into one document per variant.
+
+    The variants are all combinations of the parameter values. All expressions of the document
+    are parsed once and evaluated for all variants in one batch. If the title does not contain
+    an expression, the number of the variant is appended to it.
+
+    Args:
+        document: The question document.
+        evaluator: Evaluator for the expressions, or None if evaluation is not allowed.
+
+    Returns:
+        list[dict[str, Any]]: The documents of the variants.
+
+    Raises:
+        ParsingError: If the variants are invalid or evaluation is not allowed.
+    """
+    template = {key: value for key, value in document.items() if key != "variants"}
+    spec = document["variants"]
+    if not isinstance(spec, dict) or not spec:
+        raise ParsingError(f"Variants must be a mapping of parameters to values: {spec}")
+    if evaluator is None:
+        raise ParsingError(
+            f"Question '{document.get('title')}' has variants, but evaluation is not allowed. "
+            "Check the question first! Then set `--allow-eval` to enable evaluation."
+        )
+
+    parameters = {name: parameter_values(name, values) for name, values in spec.items()}
+    variants = [
+        dict(zip(parameters, values, strict=True))
+        for values in itertools.product(*parameters.values())
+    ]
+    expressions: dict[str, None] = {}
+    collect_expressions(template, expressions)
+    results = evaluator.evaluate_batch(list(expressions), variants)
+
+    documents = []
+    for i, variant_results in enumerate(results, start=1):
+        texts = {expression: str(result) for expression, result in variant_results.items()}
+        variant = render(template, variant_results, texts)
+        if isinstance(template.get("title"), str) and not re_expression.search(template["title"]):
+            variant["title"] = f"{template['title']} (variant {i})"
+        documents.append(variant)
+    return documents
@@ -1,3 +1,5 @@
+import copy
+from collections import defaultdict
 from collections.abc import Callable
 from pathlib import Path
 from typing import Any
@@ -6,32 +8,267 @@ import yaml
 from asteval import Interpreter  # type: ignore
 from loguru import logger
 
+from moodle_tools.dependencies import dependency_tracker, modification_time
+from moodle_tools.profiling import profiler
 from moodle_tools.utils import ParsingError
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML was built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
 
-def eval_context(allow_eval: bool) -> Callable[[yaml.SafeLoader, yaml.ScalarNode], Any]:
+
+class IncludeCache:
+    """Content of included files, keyed on their resolved path and modification time.
+
+    Shared files, such as feedback snippets or subquestions, are only read and parsed once per
+    run. Each include returns a deep copy of the cached content, so that questions can modify
+    it. A cached file is read again if it or one of the files it includes has been modified.
+
+    Attributes:
+        graph: The include graph, i.e., the files that are directly included by each file.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[Path, tuple[int | None, Any]] = {}
+        self.graph: defaultdict[Path, set[Path]] = defaultdict(set)
+        self._stack: list[Path] = []
+
+    def load(self, filename: Path, parent: Path | None, read: Callable[[], Any]) -> Any:  # noqa: ANN401
+        """Get the content of an included file.
+
+        Args:
+            filename: The resolved path of the included file.
+            parent: The file that includes the file, if known. Nested includes are always
+                attributed to the including file.
+            read: Reads and parses the file if it is not cached.
+
+        Returns:
+            Any: A copy of the content of the file.
+        """
+        parent = self._stack[-1] if self._stack else parent
+        if parent is not None:
+            self.graph[parent].add(filename)
+
+        if self.is_valid(filename):
+            for dependency in self.dependencies(filename):
+                dependency_tracker.record(dependency)
+        else:
+            self.graph.pop(filename, None)
+            mtime = modification_time(filename)
+            self._stack.append(filename)
+            try:
+                self.entries[filename] = (mtime, read())
+            finally:
+                self._stack.pop()
+        return copy.deepcopy(self.entries[filename][1])
+
+    def is_valid(self, filename: Path) -> bool:
+        """Check whether a file and all files it includes are unmodified since caching it."""
+        entry = self.entries.get(filename)
+        return (
+            entry is not None
+            and entry[0] == modification_time(filename)
+            and all(self.is_valid(child) for child in self.graph.get(filename, ()))
+        )
+
+    def dependencies(self, path: Path) -> set[Path]:
+        """Get all files that are directly or indirectly included by a file."""
+        dependencies: set[Path] = set()
+        pending = [path]
+        while pending:
+            for child in self.graph.get(pending.pop(), ()):
+                if child not in dependencies:
+                    dependencies.add(child)
+                    pending.append(child)
+        return dependencies
+
+
+class QuestionLoader(SafeLoader):
+    """Safe YAML loader for question files.
+
+    The loader is based on the fast libyaml parser if PyYAML was built with it. Use
+    `create_loader` to get a loader with the `!eval` and `!include` constructors.
+
+    Attributes:
+        path_dict: Dictionary containing the base path for file inclusion and the path of the
+            file that is parsed.
+        include_cache: Content of the included files.
+        evaluator: Evaluator for expressions, or None if evaluation is not allowed.
+        variables: Variables that have been assigned in evaluated expressions of the current
+            document.
+    """
+
+    path_dict: dict[str, Path]
+    include_cache: IncludeCache
+    evaluator: "ExpressionEvaluator | None"
+    variables: dict[str, Any]
+
+    def construct_document(self, node: yaml.Node) -> Any:  # noqa: ANN401
+        self.variables = {}
+        # Construct nested nodes right away, so that expressions are evaluated in document order
+        self.deep_construct = True
+        return super().construct_document(node)
+
+
+def create_loader(allow_eval: bool) -> type[QuestionLoader]:
+    """Create a loader class with the `!eval` and `!include` constructors.
+
+    The constructors are registered on a new subclass, so that loaders with different settings
+    can be used side by side and the global `yaml.SafeLoader` remains unchanged.
+
+    Args:
+        allow_eval: Allow evaluation of expressions.
+
+    Returns:
+        type[QuestionLoader]: The loader class.
+    """
+
+    class Loader(QuestionLoader):
+        pass
+
+    Loader.path_dict = {"base_path": Path()}
+    Loader.include_cache = IncludeCache()
+    Loader.evaluator = ExpressionEvaluator() if allow_eval else None
+    Loader.add_constructor("!eval", eval_context(allow_eval, Loader.evaluator))
+    Loader.add_constructor(
+        "!include", construct_include_context(Loader.path_dict, Loader.include_cache)
+    )
+    return Loader
+
+
+class ExpressionEvaluator:
+    """Evaluate expressions with a shared asteval interpreter.
+
+    Creating an interpreter builds its symbol table, which takes much longer than evaluating a
+    typical expression. The evaluator therefore creates a single interpreter and restores its
+    symbol table before each expression. Results of expressions that do not depend on any
+    variables are cached if they are immutable.
+
+    Attributes:
+        cache: Result and assigned variables of cached expressions.
+    """
+
+    CACHEABLE_TYPES = (bool, int, float, complex, str, type(None))
+
+    def __init__(self) -> None:
+        self.interpreter: Interpreter | None = None
+        self.symbols: dict[str, Any] = {}
+        self.cache: dict[str, tuple[Any, dict[str, Any]]] = {}
+
+    def evaluate(self, expression: str, variables: dict[str, Any]) -> Any:  # noqa: ANN401
+        """Evaluate an expression.
+
+        Args:
+            expression: The expression, which may consist of multiple statements.
+            variables: Variables that can be used in the expression. Variables that are
+                assigned in the expression are added.
+
+        Returns:
+            Any: The value of the last statement of the expression.
+        """
+        if not variables and expression in self.cache:
+            result, assigned = self.cache[expression]
+            variables.update(assigned)
+            return result
+
+        interpreter = self.reset(variables)
+        cacheable = not variables
+        result = interpreter(expression)
+        variables.update(
+            (name, value)
+            for name, value in interpreter.symtable.items()
+            if name not in self.symbols or self.symbols[name] is not value
+        )
+
+        if (
+            cacheable
+            and not interpreter.error
+            and all(
+                isinstance(value, self.CACHEABLE_TYPES) for value in [result, *variables.values()]
+            )
+        ):
+            self.cache[expression] = (result, dict(variables))
+        return result
+
+    def evaluate_batch(
+        self, expressions: list[str], variables: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Evaluate expressions for many sets of variables, e.g., for the variants of a question.
+
+        Each expression is only parsed once and then evaluated for each set of variables.
+        Variables that are assigned in an expression can be used in later expressions of the
+        same set.
+
+        Args:
+            expressions: The expressions.
+            variables: The sets of variables.
+
+        Returns:
+            list[dict[str, Any]]: The value of each expression for each set of variables.
+
+        Raises:
+            ParsingError: If an expression cannot be parsed or evaluated.
+        """
+        interpreter = self.reset({})
+        nodes = {}
+        for expression in expressions:
+            try:
+                nodes[expression] = interpreter.parse(expression)
+            except SyntaxError as e:
+                raise ParsingError(f"Cannot parse expression '{expression}'.") from e
+
+        results: list[dict[str, Any]] = []
+        for values in variables:
+            interpreter = self.reset(values)
+            results.append({})
+            for expression, node in nodes.items():
+                interpreter.error, interpreter.error_msg = [], None
+                try:
+                    results[-1][expression] = interpreter.run(node, expr=expression)
+                except Exception as e:
+                    message = interpreter.error[-1].get_error()[1] if interpreter.error else e
+                    raise ParsingError(
+                        f"Evaluating an expression with {values} failed: {message}"
+                    ) from e
+        return results
+
+    def reset(self, variables: dict[str, Any]) -> Interpreter:
+        """Restore the initial symbol table of the interpreter and add variables to it."""
+        if self.interpreter is None:
+            self.interpreter = Interpreter()
+            self.symbols = dict(self.interpreter.symtable)
+        symtable = self.interpreter.symtable
+        symtable.clear()
+        symtable.update(self.symbols)
+        symtable.update(variables)
+        return self.interpreter
+
+
+def eval_context(
+    allow_eval: bool, evaluator: ExpressionEvaluator | None = None
+) -> Callable[[QuestionLoader, yaml.ScalarNode], Any]:
     """Create a custom constructor for evaluating math expressions directly in the yaml parser.
 
     Args:
         allow_eval: Allow evaluation of expressions.
+        evaluator: Evaluator for the expressions (default: a new evaluator).
 
     Returns:
         function: Custom constructor for evaluating math expressions.
     """
+    evaluator = evaluator or ExpressionEvaluator()
 
-    def eval_constructor(loader: yaml.SafeLoader, node: yaml.ScalarNode) -> Any:  # noqa: ANN401
+    def eval_constructor(loader: QuestionLoader, node: yaml.ScalarNode) -> Any:  # noqa: ANN401
         value = loader.construct_scalar(node)
         if not allow_eval:
-            logger.error(
-                "Explicit evaluation is not allowed but used {}. "
-                "Check the question first! Then set `--allow-eval` to enable evaluation.",
-                node.start_mark,
+            raise ParsingError(
+                f"Explicit evaluation is not allowed but used {str(node.start_mark).strip()}. "
+                "Check the question first! Then set `--allow-eval` to enable evaluation."
             )
-            raise ParsingError()
-
-        aeval = Interpreter()
 
-        result = aeval(value)
+        with profiler.stage("eval"):
+            result = evaluator.evaluate(value, loader.variables)
 
         logger.info("Evaluated expression: {} -> {}", value, result)
 
@@ -42,27 +279,36 @@ def eval_context(allow_eval: bool) -> Callable[[yaml.SafeLoader, yaml.ScalarNode
 
 def construct_include_context(
     path_dict: dict[str, Path],
-) -> Callable[[yaml.SafeLoader, yaml.ScalarNode], Any]:
+    cache: IncludeCache | None = None,
+) -> Callable[[QuestionLoader, yaml.ScalarNode], Any]:
     """Create a custom constructor for including files in the yaml parser.
 
     Args:
-        path_dict: Dictionary containing the base path for file inclusion.
+        path_dict: Dictionary containing the base path for file inclusion and, optionally, the
+            path of the file that is parsed.
+        cache: Cache for the content of included files (default no caching).
 
     Returns:
         function: Custom constructor for including files.
     """
 
-    def construct_include(loader: yaml.SafeLoader, node: yaml.ScalarNode) -> Any:  # noqa: ANN401
+    def construct_include(loader: QuestionLoader, node: yaml.ScalarNode) -> Any:  # noqa: ANN401
         """Include file referenced at node."""
         include_path = Path(loader.construct_scalar(node))
         filename = (
             include_path if include_path.is_absolute() else path_dict["base_path"] / include_path
         )
+        dependency_tracker.record(filename)
+
+        def read() -> Any:  # noqa: ANN401
+            with filename.open("r") as file:
+                if filename.suffix in [".yaml", ".yml", ".yaml.j2", ".yml.j2"]:
+                    return yaml.load(file, type(loader))  # noqa: S506 - A safe loader
 
-        with filename.open("r") as file:
-            if filename.suffix in [".yaml", ".yml", ".yaml.j2", ".yml.j2"]:
-                return yaml.load(file, yaml.SafeLoader)
+                return file.read()
 
-            return file.read()
+        if cache is None:
+            return read()
+        return cache.load(filename.resolve(), path_dict.get("path"), read)
 
     return construct_include
@@ -1,9 +1,49 @@
+import contextlib
+import json
+import subprocess
 import sys
+from base64 import b64decode
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
 
 import pytest
+import yaml
+from jinja2 import Environment, PackageLoader, select_autoescape
 
-from moodle_tools.make_questions import main
+from moodle_tools.make_questions import load_questions, main
+from moodle_tools.questions.coderunner_sql import CoderunnerDDLQuestion, CoderunnerSQLQuestion
+from moodle_tools.utils import ParsingError
+
+if TYPE_CHECKING:
+    from moodle_tools.questions.coderunner import Testcase
+
+
+SEPARATOR = "#<ab@17943918#@>#\n"
+
+
+def run_test_logic(question: CoderunnerSQLQuestion, sandbox: Path) -> list[str]:
+    """Render the question's combinator template like CodeRunner and run it in a sandbox."""
+    env = Environment(autoescape=False)  # noqa: S701
+    env.filters["e"] = lambda value, _: str(value).replace("\\", "\\\\").replace('"', '\\"')
+    script = env.from_string(question.test_logic).render(
+        STUDENT_ANSWER=question.answer,
+        QUESTION={
+            "memlimitmb": question.resource_limits.memory_limit,
+            "parameters": json.loads(question.template_params),
+        },
+        TESTCASES=[
+            {"testcode": tc["code"], "extra": tc["description"], "stdin": tc["additional_info"]}
+            for tc in question.testcases
+        ],
+    )
+    for file in question.files:
+        (sandbox / file["name"]).write_bytes(b64decode(file["encoding"]))
+    (sandbox / "testlogic.py").write_text(script, encoding="utf-8")
+
+    output = subprocess.run(
+        [sys.executable, "testlogic.py"], cwd=sandbox, capture_output=True, check=True, text=True
+    ).stdout
+    return output.split(SEPARATOR)
 
 
 class TestCoderunnerQuestionSQL:
@@ -177,3 +217,166 @@ class TestCoderunnerQuestionSQL:
         with output_file_path.open("r", encoding="utf-8") as f:
             generated_xml = f.read().strip()
         assert reference_xml == generated_xml
+
+    def test_inmemory_database_isolation(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.chdir(tmp_path)
+
+        question = CoderunnerDDLQuestion(
+            question="Question text",
+            title="In-memory DDL",
+            answer="CREATE TABLE t (id INTEGER PRIMARY KEY);",
+            testcases=cast(
+                "list[Testcase]",
+                [
+                    {"code": "CREATE TEMP TABLE scratch (a INTEGER); INSERT INTO t VALUES (1);"},
+                    {"code": "CREATE TEMP TABLE scratch (a INTEGER); SELECT count(*) FROM t;"},
+                ],
+            ),
+            database_path=":memory:",
+            markdown=False,
+            table_styling=False,
+        )
+        question.cleanup()
+
+        assert "Error" not in question.testcases[1]["result"]
+        assert "│            0 │" in question.testcases[1]["result"]
+        assert question.files == []
+        assert question.inmemory_connection is None
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize(
+        ("yaml_file", "connection_mode"),
+        [
+            ("coderunner-dql-w_connection.yaml", "per_testcase"),
+            ("coderunner-dql-w_connection.yaml", "per_run"),
+            ("coderunner-ddl.yaml", "per_testcase"),
+        ],
+    )
+    def test_test_logic_reproduces_expected_results(
+        self, yaml_file: str, connection_mode: str, tmp_path: Path
+    ) -> None:
+        with contextlib.chdir("examples"):
+            documents = list(yaml.safe_load_all(Path(yaml_file).read_text(encoding="utf-8")))
+            for document in documents:
+                document["connection_mode"] = connection_mode
+            questions = list(load_questions(iter(documents), strict_validation=False))
+
+        for i, question in enumerate(questions):
+            assert isinstance(question, CoderunnerSQLQuestion)
+            sandbox = tmp_path / str(i)
+            sandbox.mkdir()
+
+            results = run_test_logic(question, sandbox)
+
+            assert [result.strip() for result in results] == [
+                testcase["result"].strip() for testcase in question.testcases
+            ]
+
+    def test_resource_limits(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.chdir(tmp_path)
+        documents: list[dict[str, Any]] = [
+            {"defaults": {"resource_limits": {"memory_limit": 2000, "threads": 4}}},
+            {
+                "type": "sql_ddl",
+                "question": "Question text",
+                "title": "Resource limits",
+                "answer": "CREATE TABLE t (id INTEGER);",
+                "testcases": [{"code": "SELECT count(*) FROM t;"}],
+                "database_path": ":memory:",
+                "resource_limits": {"cpu_time_limit": 10, "sandbox_params": {"disklimit": 5}},
+            },
+        ]
+
+        question = next(load_questions(iter(documents), strict_validation=False))
+        question.cleanup()
+        env = Environment(
+            loader=PackageLoader("moodle_tools.questions"), autoescape=select_autoescape()
+        )
+        xml = question.to_xml(env)
+
+        assert "<cputimelimitsecs>10</cputimelimitsecs>" in xml
+        assert "<memlimitmb>2000</memlimitmb>" in xml
+        assert '<sandboxparams><![CDATA[{"numprocs": 100, "disklimit": 5}]]>' in xml
+        assert '<templateparamsevald>{"threads": 4}</templateparamsevald>' in xml
+
+    @pytest.mark.parametrize(
+        "resource_limits",
+        [{"memory_limit": 50}, {"cpu_time_limit": 0}, {"threads": 0}, {"num_procs": -1}],
+    )
+    def test_invalid_resource_limits(
+        self, resource_limits: dict[str, int], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.chdir(tmp_path)
+        with pytest.raises(ParsingError):
+            CoderunnerDDLQuestion(
+                question="Question text",
+                title="Invalid limits",
+                answer="CREATE TABLE t (id INTEGER);",
+                testcases=cast("list[Testcase]", [{"code": "SELECT count(*) FROM t;"}]),
+                database_path=":memory:",
+                resource_limits=resource_limits,
+                markdown=False,
+                table_styling=False,
+            )
+
+    @pytest.mark.parametrize(
+        ("resource_limits", "message"),
+        [
+            ({"cpu_time_limit": 2.5}, 'wrong value type for field "cpu_time_limit"'),
+            ({"memory": 2000}, 'can not match "memory"'),
+        ],
+    )
+    def test_malformed_resource_limits(
+        self,
+        resource_limits: dict[str, Any],
+        message: str,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.chdir(tmp_path)
+        with pytest.raises(ParsingError, match=f"question 'Malformed limits': .*{message}"):
+            CoderunnerDDLQuestion(
+                question="Question text",
+                title="Malformed limits",
+                answer="CREATE TABLE t (id INTEGER);",
+                testcases=cast("list[Testcase]", [{"code": "SELECT count(*) FROM t;"}]),
+                database_path=":memory:",
+                resource_limits=resource_limits,
+                markdown=False,
+                table_styling=False,
+            )
+
+    def test_ddl_per_run_unsupported(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.chdir(tmp_path)
+        with pytest.raises(ParsingError, match="only supported by DQL questions"):
+            CoderunnerDDLQuestion(
+                question="Question text",
+                title="Per run",
+                answer="CREATE TABLE t (id INTEGER);",
+                testcases=cast("list[Testcase]", [{"code": "SELECT count(*) FROM t;"}]),
+                database_path=":memory:",
+                connection_mode="per_run",
+                markdown=False,
+                table_styling=False,
+            )
+
+    def test_database_exceeds_memory_limit(self) -> None:
+        with contextlib.chdir("examples"):
+            documents = list(
+                yaml.safe_load_all(
+                    Path("coderunner-dql-w_connection.yaml").read_text(encoding="utf-8")
+                )
+            )
+            documents[0]["resource_limits"] = {"memory_limit": 51}
+            question = next(load_questions(iter(documents), strict_validation=False))
+
+        assert any("memory limit" in error for error in question.validate())
+
+    def test_defaults_document_must_be_exclusive(self) -> None:
+        documents = [{"defaults": {"type": "sql_ddl"}, "title": "Not allowed"}]
+        with pytest.raises(ParsingError):
+            next(load_questions(iter(documents)))
@@ -1,9 +1,14 @@
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, cast
 
 import pytest
 
 from moodle_tools.make_questions import main
+from moodle_tools.questions.coderunner_streaming import CoderunnerStreamingQuestion, compile_code
+
+if TYPE_CHECKING:
+    from moodle_tools.questions.coderunner import Testcase
 
 
 class TestCoderunnerQuestionStreaming:
@@ -74,3 +79,109 @@ class TestCoderunnerQuestionStreaming:
         with output_file_path.open("r", encoding="utf-8") as f:
             generated_xml = f.read().strip()
         assert reference_xml == generated_xml
+
+    def test_testcases_run_in_isolated_namespaces(self) -> None:
+        question = CoderunnerStreamingQuestion(
+            question="Question text",
+            title="Namespace isolation",
+            answer="def scale(x):\n    return x * factor",
+            testcases=cast(
+                "list[Testcase]",
+                [
+                    {"code": "factor = 2\nprint(scale(21))"},
+                    {"code": "print('factor' in globals())"},
+                ],
+            ),
+            input_stream="examples/assets/autobahn.csv",
+            markdown=False,
+            table_styling=False,
+        )
+
+        assert [testcase["result"] for testcase in question.testcases] == ["42\n", "False\n"]
+        assert compile_code(question.answer) is compile_code(question.answer)
+
+    @pytest.mark.parametrize("input_stream_mode", ["tempdir", "cwd"])
+    def test_input_stream_modes(
+        self, input_stream_mode: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        input_stream = Path("examples/assets/autobahn.csv").absolute()
+        monkeypatch.chdir(tmp_path)
+
+        question = CoderunnerStreamingQuestion(
+            question="Question text",
+            title="Input stream modes",
+            answer="import csv\nfrom pathlib import Path\n\ndef pipeline(input_stream):\n"
+            "    return input_stream",
+            testcases=cast(
+                "list[Testcase]",
+                [
+                    {"code": "print(len(open('autobahn.csv').readlines()) > 0)"},
+                    {"code": "print(TimedStream().from_csv('autobahn.csv', 0, 2) is not None)"},
+                    {"code": "print(len(Path('./autobahn.csv').read_text()) > 0)"},
+                    {"code": "print(len(list(csv.reader(Path('autobahn.csv').open()))) > 0)"},
+                    {
+                        "code": "from isda_streaming.data_stream import DataStream as Stream\n"
+                        "print(Stream().from_csv('./autobahn.csv', 0, 0) is not None)"
+                    },
+                ],
+            ),
+            input_stream=input_stream,
+            input_stream_mode=input_stream_mode,
+            markdown=False,
+            table_styling=False,
+        )
+        question.cleanup()
+
+        assert [testcase["result"] for testcase in question.testcases] == ["True\n"] * 5
+        assert list(tmp_path.iterdir()) == []
+        assert question.stream_dir is None
+
+    def test_tempdir_isolates_working_directory(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        input_stream = Path("examples/assets/autobahn.csv").absolute()
+        monkeypatch.chdir(tmp_path)
+
+        question = CoderunnerStreamingQuestion(
+            question="Question text",
+            title="Working directory",
+            answer="import os\nfrom pathlib import Path\ncwd = os.getcwd()",
+            testcases=cast(
+                "list[Testcase]",
+                [
+                    {"code": "print(sorted(os.listdir(cwd)))"},
+                    {"code": "Path('output.txt').touch()\nprint(Path('output.txt').exists())"},
+                ],
+            ),
+            input_stream=input_stream,
+            input_stream_mode="tempdir",
+            markdown=False,
+            table_styling=False,
+        )
+        stream_dir = question.stream_dir
+        question.cleanup()
+
+        assert [testcase["result"] for testcase in question.testcases] == [
+            "['autobahn.csv']\n",
+            "True\n",
+        ]
+        assert stream_dir is not None
+        assert not Path(stream_dir.name).exists()
+        assert Path.cwd() == tmp_path
+        assert list(tmp_path.iterdir()) == []
+
+    def test_tempdir_reports_errors(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        input_stream = Path("examples/assets/autobahn.csv").absolute()
+        monkeypatch.chdir(tmp_path)
+
+        with pytest.raises(RuntimeError, match="ZeroDivisionError: division by zero"):
+            CoderunnerStreamingQuestion(
+                question="Question text",
+                title="Error",
+                answer="def pipeline(input_stream):\n    return input_stream",
+                testcases=cast("list[Testcase]", [{"code": "print(1 / 0)"}]),
+                input_stream=input_stream,
+                input_stream_mode="tempdir",
+                markdown=False,
+                table_styling=False,
+            )
@@ -0,0 +1,112 @@
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from moodle_tools import ParsingError
+from moodle_tools.enums import EditorType
+from moodle_tools.make_questions import load_questions
+from moodle_tools.questions.essay import TextResponse
+from moodle_tools.questions.schema import check_document, compile_check, get_schemas
+
+
+class TestCompileCheck:
+    @pytest.mark.parametrize(
+        ("annotation", "value", "expected"),
+        [
+            (str, "text", True),
+            (str, 42, True),
+            (str, None, False),
+            (str, ["text"], False),
+            (int, 3, True),
+            (int, True, False),
+            (float, 3, True),
+            (float, "3", False),
+            (bool, False, True),
+            (str | None, None, True),
+            (list[str], ["text", {"answer": "text"}], True),
+            (list[str], "text", False),
+            (dict[str, Any] | None, {"key": "value"}, True),
+            (dict[str, Any] | None, ["value"], False),
+            (TextResponse | None, {"required": True}, True),
+            (EditorType, "editor", True),
+            (EditorType, "EDITOR", True),
+            (EditorType, "rich_text", False),
+        ],
+    )
+    def test_check(self, annotation: object, value: object, expected: bool) -> None:
+        assert compile_check(annotation)(value) is expected
+
+
+class TestCheckDocument:
+    def test_schemas_of_all_types(self) -> None:
+        schemas = get_schemas()
+        assert schemas["numerical"].required == {"question", "title", "answers"}
+        assert "database_path" in schemas["sql_dql"].required
+        assert all(schema.flags for schema in schemas.values())
+
+    def test_valid(self) -> None:
+        document = {
+            "type": "true_false",
+            "title": "Title",
+            "question": "Question",
+            "correct_answer": True,
+            "markdown": True,
+        }
+        assert check_document(document) == ([], [])
+
+    def test_errors(self) -> None:
+        document = {
+            "type": "multiple_choice",
+            "title": "Title",
+            "answers": "A",
+            "shuffle_answers": "sometimes",
+            "comment": "Not a field",
+        }
+        errors, warnings = check_document(document)
+        assert errors == [
+            "Missing field 'question' of type str.",
+            "Field 'answers' must be of type list[str], got str: 'A'",
+            "Field 'shuffle_answers' must be of type bool, got str: 'sometimes'",
+        ]
+        assert warnings == ["Unknown field 'comment' is ignored."]
+
+    def test_unsupported_type(self) -> None:
+        assert check_document({"type": "unknown", "title": "Title"}) == (
+            ["Unsupported Question Type: unknown."],
+            [],
+        )
+
+    def test_internal_copy(self) -> None:
+        document = {
+            "type": "true_false",
+            "title": "Title",
+            "question": "Question",
+            "correct_answer": True,
+            "internal_copy": True,
+        }
+        assert check_document(document) == ([], [])
+
+    def test_load_questions_checks_schema(self) -> None:
+        document = {"type": "numerical", "title": "Title", "question": "Question"}
+        with pytest.raises(ParsingError, match="Missing field 'answers'"):
+            list(load_questions(iter([document]), check_schema=True))
+
+    def test_build_does_not_check_schema(self) -> None:
+        # Banks that built before the schemas were introduced keep building without warnings
+        document = {
+            "type": "true_false",
+            "title": "Title",
+            "question": "Question",
+            "correct_answer": True,
+            "grade": "2",
+            "unknown": "value",
+        }
+        messages: list[str] = []
+        handler = logger.add(messages.append, level="WARNING")
+        try:
+            questions = list(load_questions(iter([document]), strict_validation=False))
+        finally:
+            logger.remove(handler)
+        assert [question.title for question in questions] == ["Title"]
+        assert messages == []
@@ -1,8 +1,13 @@
 import sys
+from unittest.mock import patch
 
 import pytest
+import yaml
+from asteval import Interpreter  # type: ignore
 
 from moodle_tools.make_questions import main
+from moodle_tools.utils import ParsingError
+from moodle_tools.yaml_constructors import create_loader
 
 
 class TestAllowEval:
@@ -34,3 +39,47 @@ class TestAllowEval:
         assert "Explicit evaluation is not allowed but used" in captured.err
         assert pwe.type is SystemExit
         assert pwe.value.code == 1
+
+    def test_loaders_are_independent(self) -> None:
+        allowing_loader = create_loader(allow_eval=True)
+        forbidding_loader = create_loader(allow_eval=False)
+
+        assert yaml.load("!eval 2 + 2", allowing_loader) == 4  # noqa: S506
+        with pytest.raises(ParsingError):
+            yaml.load("!eval 2 + 2", forbidding_loader)  # noqa: S506
+        assert "!eval" not in yaml.SafeLoader.yaml_constructors
+        assert "!include" not in yaml.SafeLoader.yaml_constructors
+
+    def test_variables_are_shared_within_a_document(self) -> None:
+        loader = create_loader(allow_eval=True)
+        documents = list(
+            yaml.load_all(
+                "a: !eval x = 6; x\nb: !eval x * 7\n---\nc: !eval \"'x' in dir()\"\n", loader
+            )
+        )
+        assert documents == [{"a": 6, "b": 42}, {"c": False}]
+
+    def test_variables_are_bound_in_document_order(self) -> None:
+        loader = create_loader(allow_eval=True)
+        documents = list(
+            yaml.load_all(
+                "before: !eval x = 1; x\n"
+                "answers:\n  - answer: !eval x = 2; x\n"
+                "feedback: !eval x * 10\n"
+                "items: [!eval x + 1]\n",
+                loader,
+            )
+        )
+        assert documents == [
+            {"before": 1, "answers": [{"answer": 2}], "feedback": 20, "items": [3]}
+        ]
+
+    def test_expressions_are_cached(self) -> None:
+        loader = create_loader(allow_eval=True)
+        with patch("moodle_tools.yaml_constructors.Interpreter", wraps=Interpreter) as mock:
+            documents = list(
+                yaml.load_all("a: !eval 2 + 2\n---\na: !eval 2 + 2\nb: !eval y = 1; y\n", loader)
+            )
+
+        assert documents == [{"a": 4}, {"a": 4, "b": 1}]
+        assert mock.call_count == 1
@@ -0,0 +1,43 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks import analyze_results, make_questions, responses
+
+
+class TestBenchmarks:
+    def test_make_questions(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        output = tmp_path / "results.json"
+        arguments = ["--size", "1", "--rows", "10", "-r", "1", "--threshold", "1000"]
+        sys.argv = ["make_questions", *arguments, "-o", str(output)]
+        make_questions.main()
+        sys.argv = ["make_questions", *arguments, "--compare", str(output)]
+        make_questions.main()
+
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert results["params"]["size"] == 1
+        assert "generate_moodle_questions[all]" in capsys.readouterr().out
+
+    def test_analyze_results(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        output = tmp_path / "results.json"
+        arguments = ["-n", "10", "-r", "1", "--lang", "en", "--threshold", "1000"]
+        sys.argv = ["analyze_results", *arguments, "-o", str(output)]
+        analyze_results.main()
+        sys.argv = ["analyze_results", *arguments, "--compare", str(output)]
+        analyze_results.main()
+
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert results["params"]["rounds"] == 1
+        assert "analyze_questions[en-10]" in capsys.readouterr().out
+
+    def test_responses(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        output = tmp_path / "responses.csv"
+        sys.argv = ["responses", "-n", "10", "-o", str(output)]
+        responses.main()
+
+        with output.open(encoding="utf-8-sig", newline="") as file:
+            assert len(list(csv.reader(file))) == 11
+        assert capsys.readouterr().err.startswith("analyze-results ")
@@ -0,0 +1,168 @@
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from moodle_tools.dedup import Fingerprint, deduplicate, find_duplicates, normalize_text
+from moodle_tools.make_questions import load_moodle_questions, load_questions, main
+from moodle_tools.questions.question import Question
+
+TEXT = (
+    "Which of the following statements about relational databases is correct? Consider "
+    "primary keys, foreign keys, and the normal forms that were discussed in the lecture "
+    "before answering the question."
+)
+
+
+def make_question(question: str, **fields: Any) -> Question:  # noqa: ANN401
+    document = {
+        "type": "multiple_choice",
+        "title": "Question",
+        "question": question,
+        "answers": [
+            {"answer": "Keys are unique", "points": 100, "feedback": "Correct"},
+            {"answer": "Keys are optional", "points": 0, "feedback": "Wrong"},
+        ],
+    }
+    return next(load_questions(iter([document | fields]), strict_validation=False))
+
+
+class TestFingerprint:
+    def test_normalize_text(self) -> None:
+        assert normalize_text("<p>What  is\n<b>2 &lt; 3</b>?</p>") == "what is 2 < 3 ?"
+
+    def test_images_are_compared(self) -> None:
+        first = normalize_text('<img alt="A" src="data:image/png;base64,AAAA" />')
+        second = normalize_text('<img alt="A" src="data:image/png;base64,BBBB" />')
+        assert first.startswith("image:")
+        assert first != second
+
+    def test_ignores_title_category_and_feedback(self) -> None:
+        first = make_question(TEXT)
+        second = make_question(
+            f"**{TEXT.upper()}**",
+            title="Other",
+            category="other",
+            answers=[
+                {"answer": "Keys are unique", "points": 100, "feedback": "Yes"},
+                {"answer": "Keys are optional", "points": 0},
+            ],
+        )
+        assert Fingerprint.from_question(first) == Fingerprint.from_question(second)
+
+    def test_answers_are_compared(self) -> None:
+        first = Fingerprint.from_question(make_question(TEXT))
+        second = Fingerprint.from_question(
+            make_question(
+                TEXT,
+                answers=[
+                    {"answer": "Keys are unique", "points": 0},
+                    {"answer": "Keys are optional", "points": 100},
+                ],
+            )
+        )
+        assert first.sha256 != second.sha256
+        assert first.similarity(second) > 0.7
+
+
+class TestFindDuplicates:
+    def test_exact_and_near_duplicates(self) -> None:
+        questions = [
+            make_question(TEXT, title="Original"),
+            make_question(TEXT.replace("correct", "true"), title="Near"),
+            make_question("What is a primary key?", title="Different"),
+            make_question(f"<p>{TEXT}</p>", title="Exact"),
+        ]
+        duplicates = find_duplicates(questions)
+        assert [
+            (duplicate.question.title, duplicate.original.title, duplicate.exact)
+            for duplicate in duplicates
+        ] == [("Near", "Original", False), ("Exact", "Original", True)]
+        assert 0.8 <= duplicates[0].similarity < 1.0
+        assert duplicates[1].similarity == 1.0
+
+    def test_threshold(self) -> None:
+        questions = [make_question(TEXT), make_question(TEXT.replace("correct", "true"))]
+        assert not find_duplicates(questions, threshold=1.0)
+        assert len(find_duplicates(questions, threshold=0.5)) == 1
+
+    @pytest.mark.parametrize("threshold", [0.0, -0.5, 1.5])
+    def test_invalid_threshold(self, threshold: float) -> None:
+        questions = [make_question(TEXT), make_question("What is a primary key?")]
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            find_duplicates(questions, threshold=threshold)
+
+    def test_question_types_are_not_mixed(self) -> None:
+        essay = next(
+            load_questions(
+                iter(
+                    [
+                        {
+                            "type": "essay",
+                            "title": "Essay",
+                            "response_format": "plain",
+                            "question": TEXT,
+                        }
+                    ]
+                ),
+                strict_validation=False,
+            )
+        )
+        assert not find_duplicates([make_question(TEXT), essay], threshold=0.1)
+
+    def test_questions_of_the_same_document(self) -> None:
+        questions = [make_question(TEXT), make_question(TEXT), make_question(TEXT)]
+        locations = dict(zip(questions, ["a.yaml:1.1", "a.yaml:1.2", "b.yaml:1"], strict=True))
+        duplicates = find_duplicates(questions, locations=locations)
+        assert [(duplicate.question, duplicate.original) for duplicate in duplicates] == [
+            (questions[2], questions[0])
+        ]
+
+    def test_internal_copies_are_not_duplicates(self, tmp_path: Path) -> None:
+        (tmp_path / "quiz.yaml").write_text(
+            "type: essay\ntitle: Essay\nresponse_format: plain\ncategory: a\ninternal_copy: true\n"
+            f"question: {TEXT}\n",
+            encoding="utf-8",
+        )
+        questions = load_moodle_questions(
+            paths=iter([tmp_path / "quiz.yaml"]), skip_validation=True, dedup="drop"
+        )
+        assert len(questions) == 2
+
+    def test_drop(self) -> None:
+        questions = [make_question(TEXT), make_question("What is a key?"), make_question(TEXT)]
+        assert deduplicate(questions, "report") == questions
+        assert deduplicate(questions, "drop") == questions[:2]
+
+
+class TestDedupArguments:
+    @pytest.mark.parametrize(("mode", "expected"), [("report", 2), ("drop", 1)])
+    def test_dedup(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str], mode: str, expected: int
+    ) -> None:
+        for name in ["a", "b"]:
+            (tmp_path / f"{name}.yaml").write_text(
+                f"type: essay\ntitle: Essay {name}\nresponse_format: plain\nquestion: {TEXT}\n",
+                encoding="utf-8",
+            )
+        sys.argv = ["make-questions", "-i", str(tmp_path), "-s", "--dedup", mode]
+        main()
+        output = capsys.readouterr().out
+        assert output.count('<question type="essay">') == expected
+        assert f"Question 'Essay b' ({tmp_path / 'b.yaml'}:1) is a duplicate of" in output
+
+    @pytest.mark.parametrize("threshold", ["0", "-1", "1.5", "high"])
+    def test_invalid_threshold(self, threshold: str, capsys: pytest.CaptureFixture[str]) -> None:
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/true-false.yaml",
+            "--dedup",
+            "report",
+            "--dedup-threshold",
+            threshold,
+        ]
+        with pytest.raises(SystemExit):
+            main()
+        assert "--dedup-threshold" in capsys.readouterr().err
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from moodle_tools.discovery import IgnorePattern, discover_files
+
+
+class TestIgnorePattern:
+    @pytest.mark.parametrize(
+        ("pattern", "path", "is_dir", "expected"),
+        [
+            ("*.draft.yaml", "week1/quiz.draft.yaml", False, True),
+            ("*.draft.yaml", "week1/quiz.yaml", False, False),
+            ("/quiz.yaml", "quiz.yaml", False, True),
+            ("/quiz.yaml", "week1/quiz.yaml", False, False),
+            ("week*/quiz.yaml", "week1/quiz.yaml", False, True),
+            ("week*/quiz.yaml", "old/week1/quiz.yaml", False, False),
+            ("**/solutions", "old/week1/solutions", True, True),
+            ("assets/", "week1/assets", True, True),
+            ("assets/", "week1/assets", False, False),
+            ("quiz[0-9].yaml", "quiz1.yaml", False, True),
+            ("quiz[!0-9].yaml", "quiz1.yaml", False, False),
+        ],
+    )
+    def test_match(self, pattern: str, path: str, is_dir: bool, expected: bool) -> None:
+        ignore_pattern = IgnorePattern.from_line(pattern, Path("base"))
+        assert ignore_pattern is not None
+        assert ignore_pattern.match(Path("base") / path, is_dir) is expected
+
+    @pytest.mark.parametrize("line", ["", "   ", "# comment"])
+    def test_blank_lines_and_comments(self, line: str) -> None:
+        assert IgnorePattern.from_line(line, Path("base")) is None
+
+
+class TestDiscoverFiles:
+    @pytest.fixture
+    def tree(self, tmp_path: Path) -> Path:
+        files = [
+            "b.yaml",
+            "a.yml",
+            "image.png",
+            ".hidden.yaml",
+            ".git/config.yaml",
+            "node_modules/package/config.yaml",
+            "assets/data.yaml",
+            "week2/quiz.yaml",
+            "week2/quiz.draft.yaml",
+            "week2/keep.draft.yaml",
+            "week1/quiz.yaml",
+            "week1/solutions/quiz.yaml",
+        ]
+        for file in files:
+            (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / file).touch()
+        (tmp_path / ".moodletoolsignore").write_text(
+            "# Resources\nassets/\n*.draft.yaml\n", encoding="utf-8"
+        )
+        (tmp_path / "week2" / ".moodletoolsignore").write_text(
+            "!keep.draft.yaml\n", encoding="utf-8"
+        )
+        (tmp_path / "week1" / ".moodletoolsignore").write_text("solutions\n", encoding="utf-8")
+        return tmp_path
+
+    def test_discover_files(self, tree: Path) -> None:
+        files = discover_files(tree)
+        assert [file.relative_to(tree).as_posix() for file in files] == [
+            "a.yml",
+            "b.yaml",
+            "week1/quiz.yaml",
+            "week2/keep.draft.yaml",
+            "week2/quiz.yaml",
+        ]
+
+    def test_single_worker(self, tree: Path) -> None:
+        assert discover_files(tree, max_workers=1) == discover_files(tree)
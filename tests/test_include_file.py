@@ -1,8 +1,14 @@
+import os
 import sys
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
 
 import pytest
+import yaml
 
 from moodle_tools.make_questions import main
+from moodle_tools.yaml_constructors import QuestionLoader, create_loader
 
 
 class TestIncludeFile:
@@ -26,3 +32,54 @@ class TestIncludeFile:
         assert "subquestion_pi.yaml" not in captured.out
         assert "question_pi.txt" not in captured.out
         assert captured.err == ""
+
+
+class TestIncludeCache:
+    @pytest.fixture
+    def files(self, tmp_path: Path) -> Path:
+        (tmp_path / "question.yaml").write_text(
+            "first: !include snippet.yaml\nsecond: !include snippet.yaml\n", encoding="utf-8"
+        )
+        (tmp_path / "snippet.yaml").write_text(
+            "feedback: !include feedback.txt\npoints: 100\n", encoding="utf-8"
+        )
+        (tmp_path / "feedback.txt").write_text("Well done", encoding="utf-8")
+        return tmp_path
+
+    def load(self, loader: type[QuestionLoader], path: Path) -> Any:  # noqa: ANN401
+        loader.path_dict["base_path"] = path.parent
+        loader.path_dict["path"] = path.resolve()
+        return yaml.load(path.read_text(encoding="utf-8"), loader)  # noqa: S506
+
+    def test_included_files_are_parsed_once(self, files: Path) -> None:
+        loader = create_loader(allow_eval=False)
+        with patch.object(Path, "open", side_effect=Path.open, autospec=True) as open_mock:
+            document = self.load(loader, files / "question.yaml")
+
+        assert document["first"] == {"feedback": "Well done", "points": 100}
+        assert document["first"] == document["second"]
+        assert document["first"] is not document["second"]
+        opened = [call.args[0].name for call in open_mock.call_args_list]
+        assert opened.count("snippet.yaml") == 1
+        assert opened.count("feedback.txt") == 1
+
+    def test_include_graph(self, files: Path) -> None:
+        loader = create_loader(allow_eval=False)
+        self.load(loader, files / "question.yaml")
+
+        root = files.resolve()
+        assert loader.include_cache.graph[root / "question.yaml"] == {root / "snippet.yaml"}
+        assert loader.include_cache.dependencies(root / "question.yaml") == {
+            root / "snippet.yaml",
+            root / "feedback.txt",
+        }
+
+    def test_modified_nested_include_is_reloaded(self, files: Path) -> None:
+        loader = create_loader(allow_eval=False)
+        self.load(loader, files / "question.yaml")
+
+        mtime = (files / "feedback.txt").stat().st_mtime_ns + 10**9
+        (files / "feedback.txt").write_text("Changed", encoding="utf-8")
+        os.utime(files / "feedback.txt", ns=(mtime, mtime))
+
+        assert self.load(loader, files / "question.yaml")["first"]["feedback"] == "Changed"
@@ -0,0 +1,234 @@
+import shutil
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from moodle_tools.index import IndexEntry, QuestionIndex, question_recorder
+from moodle_tools.index import main as query_index
+from moodle_tools.make_questions import main
+
+QUESTION = """\
+type: true_false
+title: {title}
+category: {category}
+question: {question}
+correct_answer: true
+"""
+
+
+@pytest.fixture
+def bank(tmp_path: Path) -> Iterator[Path]:
+    shutil.copy("tests/resources/TestInlineImages/image1.png", tmp_path)
+    (tmp_path / "text.txt").write_text("Is this true?", encoding="utf-8")
+    (tmp_path / "quiz.yaml").write_text(
+        QUESTION.format(title="Included", category="sql/queries", question="!include text.txt")
+        + "---\n"
+        + QUESTION.format(title="Image", category="sql", question="'![Image](image1.png)'"),
+        encoding="utf-8",
+    )
+    (tmp_path / "other.yaml").write_text(
+        QUESTION.format(title="Included", category="sql/queries", question="Is this true?")
+        + "---\n"
+        + QUESTION.format(title="Other", category="sqlite", question="Is this true?"),
+        encoding="utf-8",
+    )
+    yield tmp_path
+    question_recorder.disable()
+
+
+def build(*arguments: str) -> None:
+    sys.argv = ["make-questions", "-s", *arguments]
+    main()
+
+
+class TestQuestionIndex:
+    def test_index_questions(self, bank: Path) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+
+        with QuestionIndex(bank / "index.db") as index:
+            questions = index.find()
+            assert [(entry.title, entry.file, entry.document) for entry in questions] == [
+                ("Included", str(bank / "other.yaml"), "1"),
+                ("Other", str(bank / "other.yaml"), "2"),
+                ("Included", str(bank / "quiz.yaml"), "1"),
+                ("Image", str(bank / "quiz.yaml"), "2"),
+            ]
+            assert questions[2].type == "true_false"
+            assert questions[2].category == "sql/queries"
+            assert questions[2].duration > 0
+            # Included files are attributed to all questions of the file
+            assert questions[2].dependencies == [str(bank / "text.txt")]
+            assert questions[3].dependencies == [
+                str(bank / "image1.png"),
+                str(bank / "text.txt"),
+            ]
+            assert [entry.title for entry in index.dependents(bank / "image1.png")] == ["Image"]
+
+    def test_find(self, bank: Path) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+
+        with QuestionIndex(bank / "index.db") as index:
+            assert [entry.title for entry in index.find(category="sql")] == [
+                "Included",
+                "Included",
+                "Image",
+            ]
+            assert [entry.title for entry in index.find(file=bank / "other.yaml")] == [
+                "Included",
+                "Other",
+            ]
+            assert len(index.find(title="Included", question_type="true_false")) == 2
+            assert not index.find(question_type="numerical")
+            sha256 = index.find(title="Other")[0].sha256
+            assert [entry.title for entry in index.find(sha256=sha256)] == ["Other"]
+
+    def test_duplicates(self, bank: Path) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+
+        with QuestionIndex(bank / "index.db") as index:
+            duplicates = index.duplicates()
+        assert [
+            [(entry.title, Path(entry.file).name) for entry in group] for group in duplicates
+        ] == [[("Included", "other.yaml"), ("Included", "quiz.yaml")]]
+
+    def test_rebuild_replaces_questions_of_rebuilt_files(self, bank: Path) -> None:
+        arguments = ["-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db")]
+        build("-i", str(bank), *arguments)
+        (bank / "other.yaml").write_text(
+            QUESTION.format(title="New", category="sql", question="Is this new?"),
+            encoding="utf-8",
+        )
+        build("-i", str(bank / "other.yaml"), *arguments)
+
+        with QuestionIndex(bank / "index.db") as index:
+            assert [entry.title for entry in index.find()] == ["New", "Included", "Image"]
+            assert index.duplicates() == []
+            dependencies = index.connection.execute("SELECT COUNT(*) FROM dependencies")
+            assert dependencies.fetchone()[0] == 3
+
+    def test_filtered_rebuild_keeps_other_questions(self, bank: Path) -> None:
+        arguments = ["-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db")]
+        build("-i", str(bank), *arguments)
+        (bank / "other.yaml").write_text(
+            QUESTION.format(title="Included", category="sql/queries", question="Changed?")
+            + "---\n"
+            + QUESTION.format(title="Other", category="sqlite", question="Is this true?"),
+            encoding="utf-8",
+        )
+        (bank / "quiz.yaml").write_text(
+            QUESTION.format(title="Included", category="sql/queries", question="Changed?"),
+            encoding="utf-8",
+        )
+        build("-i", str(bank), *arguments, "--filter-category", "sql/queries")
+
+        with QuestionIndex(bank / "index.db") as index:
+            assert [(entry.title, Path(entry.file).name) for entry in index.find()] == [
+                ("Included", "other.yaml"),
+                ("Other", "other.yaml"),
+                ("Included", "quiz.yaml"),
+            ]
+            assert [group[0].title for group in index.duplicates()] == ["Included"]
+
+    def test_relative_input(self, bank: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.chdir(bank.parent)
+        build("-i", f"{bank.name}/quiz.yaml", "-o", "quiz.xml", "--index", "index.db")
+
+        with QuestionIndex(bank.parent / "index.db") as index:
+            assert {entry.file for entry in index.find()} == {str(bank / "quiz.yaml")}
+
+    def test_since_index(self, bank: Path) -> None:
+        build(
+            "-i",
+            str(bank / "quiz.yaml"),
+            "-o",
+            str(bank / "quiz.xml"),
+            "--index",
+            str(bank / "index.db"),
+        )
+        build(
+            "-i",
+            str(bank),
+            "-o",
+            str(bank / "delta.xml"),
+            "--manifest",
+            "--since",
+            str(bank / "index.db"),
+        )
+        xml = (bank / "delta.xml").read_text(encoding="utf-8")
+        assert xml.count('<question type="truefalse">') == 1
+        assert "Other" in xml
+
+    def test_update(self) -> None:
+        entry = IndexEntry("Title", "essay", None, "/bank/quiz.yaml", "1", "0" * 64, 0.5, ["/a"])
+        with QuestionIndex(":memory:") as index:
+            assert index.update(["/bank/quiz.yaml"], [entry, entry]) == 2
+            assert index.find(file="/bank/quiz.yaml") == [entry, entry]
+            assert index.hashes() == {"0" * 64}
+            assert index.update(["/bank/quiz.yaml"], []) == 0
+            assert index.find() == []
+            index.update(["/bank/quiz.yaml"], [entry])
+            assert index.update(["/bank/quiz.yaml"], [], [("/bank/quiz.yaml", "1")]) == 0
+            assert index.find() == [entry]
+
+    def test_query(self, bank: Path) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+
+        with QuestionIndex(bank / "index.db") as index:
+            assert [entry.title for entry in index.query(categories=["sql", "sql/queries"])] == [
+                "Included",
+                "Included",
+                "Image",
+            ]
+            assert [entry.title for entry in index.query(titles=["Other", "Image"])] == [
+                "Other",
+                "Image",
+            ]
+            assert [entry.title for entry in index.query(uses=bank / "text.txt")] == [
+                "Included",
+                "Image",
+            ]
+            assert [
+                entry.title for entry in index.query(uses=bank / "text.txt", titles=["Image"])
+            ] == ["Image"]
+            assert index.query(uses=bank / "text.txt", types=["essay"]) == []
+
+
+class TestQueryIndex:
+    def query(self, *arguments: str) -> None:
+        sys.argv = ["query-index", *arguments]
+        query_index()
+
+    def test_uses(self, bank: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+        capsys.readouterr()
+
+        self.query(str(bank / "index.db"), "--uses", str(bank / "image1.png"))
+        assert capsys.readouterr().out == f"{bank / 'quiz.yaml'}:2\tImage\ttrue_false\tsql\n"
+
+    def test_filters(self, bank: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+        capsys.readouterr()
+
+        self.query(str(bank / "index.db"), "--filter-category", "sqlite", "-f", "Other", "New")
+        assert capsys.readouterr().out == f"{bank / 'other.yaml'}:2\tOther\ttrue_false\tsqlite\n"
+
+    def test_duplicates(self, bank: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        build("-i", str(bank), "-o", str(bank / "quiz.xml"), "--index", str(bank / "index.db"))
+        capsys.readouterr()
+
+        self.query(str(bank / "index.db"), "--duplicates")
+        assert capsys.readouterr().out.splitlines() == [
+            f"{bank / 'other.yaml'}:1\tIncluded\ttrue_false\tsql/queries",
+            f"{bank / 'quiz.yaml'}:1\tIncluded\ttrue_false\tsql/queries",
+        ]
+
+    def test_duplicates_cannot_be_filtered(self, tmp_path: Path) -> None:
+        with pytest.raises(SystemExit):
+            self.query(str(tmp_path / "index.db"), "--duplicates", "--uses", "eshop.db")
+
+    def test_missing_index(self, tmp_path: Path) -> None:
+        with pytest.raises(SystemExit):
+            self.query(str(tmp_path / "index.db"))
+        assert not (tmp_path / "index.db").exists()
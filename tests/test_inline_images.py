@@ -3,6 +3,7 @@ import sys
 import pytest
 
 from moodle_tools.make_questions import main
+from moodle_tools.utils import inline_images
 
 
 class TestInlineImages:
@@ -55,3 +56,9 @@ class TestInlineImages:
         assert captured.err == ""
         assert """<div style="background-image: url('data:image/png;base64,iVBO""" in captured.out
         assert """'); width: 1vh; height: 20%">""" in captured.out
+
+    def test_check_images_without_embedding(self) -> None:
+        text = '<img alt="Image" src="image1.png" />'
+        assert inline_images(text, embed=False) == text
+        with pytest.raises(FileNotFoundError, match=r"missing\.png"):
+            inline_images('<img alt="Image" src="missing.png" />', embed=False)
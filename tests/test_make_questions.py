@@ -1,8 +1,17 @@
+import json
 import sys
+from pathlib import Path
 
 import pytest
 
-from moodle_tools.make_questions import iterate_inputs, main
+from moodle_tools.make_questions import (
+    QuestionFilter,
+    check_questions,
+    iterate_inputs,
+    load_questions,
+    main,
+    validate_moodle_questions,
+)
 
 
 class TestMakeQuestionArguments:
@@ -39,6 +48,30 @@ class TestMakeQuestionArguments:
         assert "Question title (3)" not in captured.out
         assert "Question title (0)" not in captured.out
 
+    def test_log_json(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        log = tmp_path / "log.jsonl"
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/multiple-choice.yaml",
+            "-s",
+            "--log-level",
+            "DEBUG",
+            "--log-json",
+            str(log),
+        ]
+        main()
+        capsys.readouterr()
+
+        records = [json.loads(line)["record"] for line in log.read_text().splitlines()]
+        loaded = [record["extra"] for record in records if "duration" in record["extra"]]
+        assert [extra["question"] for extra in loaded[:2]] == [
+            "examples/multiple-choice.yaml:1",
+            "examples/multiple-choice.yaml:2",
+        ]
+        assert loaded[0]["title"] == "Question title"
+        assert all(extra["duration"] >= 0 for extra in loaded)
+
 
 class TestIterateInputs:
     """Test class for handling input files and folders."""
@@ -170,3 +203,224 @@ class TestFilterQuestions:
         captured = capsys.readouterr()
         assert "Question title (1)" not in captured.out
         assert "Question title (2)" in captured.out
+
+    def test_filter_type_and_file(self, capsys: pytest.CaptureFixture[str]) -> None:
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/numerical.yaml",
+            "examples/multiple-choice.yaml",
+            "examples/true-false.yaml",
+            "-s",
+            "--filter-type",
+            "numerical",
+            "true_false",
+            "--filter-file",
+            "*num*.yaml",
+            "multiple-*.yaml",
+        ]
+        main()
+        captured = capsys.readouterr()
+        assert "Numerical question" in captured.out
+        assert "Simple numerical" in captured.out
+        assert "Question title" not in captured.out
+
+    def test_filter_category_no_match(self, capsys: pytest.CaptureFixture[str]) -> None:
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/numerical.yaml",
+            "-s",
+            "--filter-category",
+            "unknown",
+        ]
+
+        with pytest.raises(SystemExit) as pwe:
+            main()
+
+        captured = capsys.readouterr()
+        assert "Filter returned 0 questions. Exiting." in captured.out
+        assert pwe.value.code == 1
+
+    def test_unselected_documents_are_not_constructed(self) -> None:
+        documents = [
+            {"type": "unsupported", "title": "Broken", "question": "?"},
+            {
+                "type": "true_false",
+                "category": "quiz/week1",
+                "title": "Selected",
+                "question": "Is this selected?",
+                "correct_answer": True,
+            },
+        ]
+        question_filter = QuestionFilter(categories=["quiz/"], types=["true_false"])
+        questions = list(
+            load_questions(
+                iter(documents), strict_validation=False, question_filter=question_filter
+            )
+        )
+        assert [question.title for question in questions] == ["Selected"]
+
+    def test_filter_internal_copy(self) -> None:
+        document = {
+            "type": "true_false",
+            "category": "quiz",
+            "title": "Copied",
+            "question": "Is this copied?",
+            "correct_answer": True,
+            "internal_copy": True,
+        }
+        question_filter = QuestionFilter(categories=["quiz/internal"])
+        questions = list(
+            load_questions(
+                iter([document]), strict_validation=False, question_filter=question_filter
+            )
+        )
+        assert [question.category for question in questions] == ["quiz/internal"]
+
+
+class TestCheck:
+    @pytest.fixture
+    def bank(self, tmp_path: Path) -> Path:
+        (tmp_path / "valid.yaml").write_text(
+            "type: true_false\ntitle: Valid\nquestion: Question\ncorrect_answer: true\n",
+            encoding="utf-8",
+        )
+        (tmp_path / "invalid.yaml").write_text(
+            "type: numerical\ntitle: Invalid\nquestion: Question\n---\n"
+            "type: true_false\ntitle: Broken\nquestion: [Question]\ncorrect_answer: true\n",
+            encoding="utf-8",
+        )
+        (tmp_path / "malformed.yaml").write_text("type: [true_false\n", encoding="utf-8")
+        return tmp_path
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_check_questions(self, bank: Path, jobs: int) -> None:
+        results = check_questions(iter(sorted(bank.glob("*.yaml"))), max_workers=jobs)
+        assert [result.path.name for result in results] == [
+            "invalid.yaml",
+            "malformed.yaml",
+            "valid.yaml",
+        ]
+        assert [result.questions for result in results] == [2, 0, 1]
+        assert results[0].errors == [
+            (
+                f"{bank / 'invalid.yaml'}:1: Missing field 'answers' of type "
+                "list[str] | list[dict[str, Any]]."
+            ),
+            (
+                f"{bank / 'invalid.yaml'}:2: Field 'question' must be of type str, got list: "
+                "['Question']"
+            ),
+        ]
+        assert len(results[1].errors) == 1
+        assert results[2].errors == []
+
+    def test_check_filter(self, bank: Path) -> None:
+        results = check_questions(
+            iter(sorted(bank.glob("*.yaml"))),
+            question_filter=QuestionFilter(titles=["Broken"], files=["invalid.yaml"]),
+        )
+        assert len(results) == 1
+        assert results[0].questions == 1
+
+    def test_check_cli(self, bank: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        sys.argv = ["make-questions", "-i", str(bank), "--check"]
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+        assert exit_info.value.code == 1
+        captured = capsys.readouterr()
+        assert "Missing field 'answers'" in captured.err
+        assert "Checked 3 questions in 3 files: 3 errors, 0 warnings." in captured.out
+        assert "<quiz>" not in captured.out
+
+        sys.argv = ["make-questions", "-i", "examples/true-false.yaml", "--check"]
+        main()
+        assert "0 errors" in capsys.readouterr().out
+
+
+class TestValidateOnly:
+    @pytest.fixture
+    def bank(self, tmp_path: Path) -> Path:
+        (tmp_path / "questions.yaml").write_text(
+            "type: true_false\ntitle: Valid\nquestion: Question\ncorrect_answer: true\n"
+            "general_feedback: Feedback\nincorrect_feedback: Feedback\n"
+            "---\n"
+            "type: true_false\ntitle: No feedback\nquestion: Question\ncorrect_answer: true\n"
+            "---\n"
+            "type: true_false\ntitle: No image\n"
+            'question: <img alt="Image" src="missing.png" />\ncorrect_answer: true\n',
+            encoding="utf-8",
+        )
+        (tmp_path / "malformed.yaml").write_text("type: [true_false\n", encoding="utf-8")
+        return tmp_path
+
+    def test_validate_only(self, bank: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        sys.argv = [
+            "make-questions",
+            "-i",
+            str(bank),
+            "--validate-only",
+            "-o",
+            str(bank / "report.json"),
+        ]
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+        assert exit_info.value.code == 1
+
+        report = json.loads((bank / "report.json").read_text(encoding="utf-8"))
+        assert report["questions"] == 4
+        assert report["passed"] == 1
+        assert report["failed"] == 3
+        failures = {failure["title"]: failure for failure in report["failures"]}
+        assert failures["No feedback"]["location"] == f"{bank / 'questions.yaml'}:2"
+        assert failures["No feedback"]["type"] == "true_false"
+        assert failures["No feedback"]["errors"] == [
+            "No general feedback provided.",
+            "No feedback for wrong answer provided.",
+        ]
+        assert failures["No image"]["errors"] == ["Image not found: missing.png"]
+        assert failures[None]["location"] == str(bank / "malformed.yaml")
+        assert "<quiz>" not in capsys.readouterr().out
+
+    def test_failing_query(self, tmp_path: Path) -> None:
+        (tmp_path / "sql.yaml").write_text(
+            "type: sql_dql\ntitle: Failing query\nquestion: Question\n"
+            "database_path: ':memory:'\nanswer: SELEC * FROM nothing;\n"
+            "testcases:\n  - code: ''\n"
+            "---\n"
+            "type: true_false\ntitle: Valid\nquestion: Question\ncorrect_answer: true\n"
+            "general_feedback: Feedback\nincorrect_feedback: Feedback\n",
+            encoding="utf-8",
+        )
+        report = validate_moodle_questions(paths=iter([tmp_path / "sql.yaml"]))
+
+        assert [question["title"] for question in report.questions] == ["Failing query", "Valid"]
+        failure = report.failures[0]
+        assert failure["location"] == f"{tmp_path / 'sql.yaml'}:1"
+        assert failure["type"] == "sql_dql"
+        assert "syntax error" in failure["errors"][0]
+
+    def test_schema_errors(self, tmp_path: Path) -> None:
+        (tmp_path / "schema.yaml").write_text(
+            "type: true_false\ntitle: Wrong type\nquestion: Question\ncorrect_answer: true\n"
+            "general_feedback: Feedback\nincorrect_feedback: Feedback\ngrade: '2'\n",
+            encoding="utf-8",
+        )
+        report = validate_moodle_questions(paths=iter([tmp_path / "schema.yaml"]))
+
+        assert len(report.failures) == 1
+        assert "Field 'grade' must be of type float" in report.failures[0]["errors"][0]
+
+    def test_images_are_not_embedded(self) -> None:
+        report = validate_moodle_questions(
+            paths=iter([Path("tests/resources/TestInlineImages/file1.yml")])
+        )
+        assert report.questions == [
+            {
+                "location": "tests/resources/TestInlineImages/file1.yml:1",
+                "title": "Dummy question",
+                "type": "numerical",
+                "errors": [],
+            }
+        ]
@@ -0,0 +1,393 @@
+import dataclasses
+import gzip
+import json
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from moodle_tools.make_questions import (
+    create_environment,
+    load_questions,
+    main,
+    render_questions,
+    stream_moodle_questions,
+    write_moodle_question_chunks,
+    write_moodle_questions,
+)
+from moodle_tools.output import (
+    RenderedQuestion,
+    content_hash,
+    open_output,
+    read_manifest_hashes,
+    render_quiz,
+    split_name,
+)
+from moodle_tools.questions.question import Question
+from moodle_tools.utils import ParsingError
+
+
+def make_questions(categories: list[str]) -> list[Question]:
+    documents = [
+        {
+            "type": "true_false",
+            "title": f"Question {i}",
+            "category": category,
+            "question": "Question",
+            "correct_answer": True,
+        }
+        for i, category in enumerate(categories, start=1)
+    ]
+    return list(load_questions(iter(documents), strict_validation=False))
+
+
+def read_manifest(output: Path) -> list[dict[str, Any]]:
+    manifest: dict[str, list[dict[str, Any]]] = json.loads(
+        output.with_name("quiz.manifest.json").read_text(encoding="utf-8")
+    )
+    return manifest["chunks"]
+
+
+class TestChunkedOutput:
+    def test_split_by_count(self, tmp_path: Path) -> None:
+        output = tmp_path / "quiz.xml"
+        questions = make_questions(["a"] * 5)
+        chunks = write_moodle_question_chunks(questions, output, max_questions=2)
+        assert [chunk.file for chunk in chunks] == ["quiz-001.xml", "quiz-002.xml", "quiz-003.xml"]
+        assert [len(chunk.questions) for chunk in chunks] == [2, 2, 1]
+        assert read_manifest(output)[2]["questions"] == [
+            {
+                "title": "Question 5",
+                "category": "a",
+                "type": "truefalse",
+                "sha256": content_hash(questions[4].to_xml(create_environment())),
+            }
+        ]
+        assert not output.exists()
+
+    def test_split_by_category(self, tmp_path: Path) -> None:
+        output = tmp_path / "quiz.xml"
+        chunks = write_moodle_question_chunks(
+            make_questions(["a", "b", "a", "c/d", "b"]), output, by_category=True
+        )
+        assert [[question["title"] for question in chunk.questions] for chunk in chunks] == [
+            ["Question 1", "Question 3"],
+            ["Question 2", "Question 5"],
+            ["Question 4"],
+        ]
+        xml = (tmp_path / "quiz-002.xml").read_text(encoding="utf-8")
+        assert xml.count("<text>$module$/b</text>") == 2
+
+    def test_split_by_size(self, tmp_path: Path) -> None:
+        output = tmp_path / "quiz.xml"
+        questions = make_questions(["a"] * 6)
+        single = render_quiz(create_environment(), [""]) + "\n"
+        max_bytes = 3 * (len(questions[0].to_xml(create_environment())) + 5) + len(single)
+
+        chunks = write_moodle_question_chunks(questions, output, max_bytes=max_bytes)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            size = (tmp_path / chunk.file).stat().st_size
+            assert size == chunk.size
+            assert size <= max_bytes
+        assert sum(len(chunk.questions) for chunk in chunks) == 6
+
+    def test_chunks_match_single_file(self, tmp_path: Path) -> None:
+        questions = make_questions(["a", "b", "c"])
+        env = create_environment()
+        write_moodle_question_chunks(questions, tmp_path / "quiz.xml", max_questions=1)
+        for i, question in enumerate(questions, start=1):
+            xml = (tmp_path / f"quiz-{i:03d}.xml").read_text(encoding="utf-8")
+            assert xml == render_quiz(env, [question.to_xml(env)]) + "\n"
+
+    def test_split_cli(self, tmp_path: Path) -> None:
+        output = tmp_path / "quiz.xml"
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/true-false.yaml",
+            "examples/numerical.yaml",
+            "-s",
+            "-o",
+            str(output),
+            "--split-count",
+            "2",
+        ]
+        main()
+        chunks = read_manifest(output)
+        assert all(len(chunk["questions"]) <= 2 for chunk in chunks)
+        assert all((tmp_path / chunk["file"]).exists() for chunk in chunks)
+        assert not output.exists()
+
+    def test_split_keeps_output_file_if_loading_fails(self, tmp_path: Path) -> None:
+        (tmp_path / "invalid.yaml").write_text("type: true_false\ntitle: [\n", encoding="utf-8")
+        output = tmp_path / "quiz.xml"
+        output.write_text("previous", encoding="utf-8")
+        sys.argv = [
+            "make-questions",
+            "-i",
+            str(tmp_path / "invalid.yaml"),
+            "-o",
+            str(output),
+            "--split-count",
+            "2",
+        ]
+        with pytest.raises(SystemExit):
+            main()
+        assert output.read_text(encoding="utf-8") == "previous"
+        assert not list(tmp_path.glob("quiz-*.xml"))
+
+    def test_split_requires_output_file(self) -> None:
+        sys.argv = ["make-questions", "-i", "examples/true-false.yaml", "--split-count", "2"]
+        with pytest.raises(SystemExit):
+            main()
+
+
+class TestCompressedOutput:
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("quiz.xml", ("quiz", ".xml")),
+            ("quiz.xml.gz", ("quiz", ".xml.gz")),
+            ("quiz.v2.xml.zst", ("quiz.v2", ".xml.zst")),
+        ],
+    )
+    def test_split_name(self, name: str, expected: tuple[str, str]) -> None:
+        assert split_name(Path(name)) == expected
+
+    def test_plain_output_matches_render_quiz(self, tmp_path: Path) -> None:
+        questions = make_questions(["a", "b"])
+        env = create_environment()
+        chunk = write_moodle_questions(questions, tmp_path / "quiz.xml", manifest=True)
+
+        xml = render_quiz(env, [question.to_xml(env) for question in questions]) + "\n"
+        assert (tmp_path / "quiz.xml").read_text(encoding="utf-8") == xml
+        assert chunk.size == len(xml.encode("utf-8"))
+        assert chunk.sha256 == content_hash(xml)
+        assert read_manifest(tmp_path / "quiz.xml") == [
+            {
+                "file": "quiz.xml",
+                "size": chunk.size,
+                "sha256": chunk.sha256,
+                "questions": chunk.questions,
+            }
+        ]
+
+    def test_gzip_is_reproducible(self, tmp_path: Path) -> None:
+        questions = make_questions(["a", "b"])
+        write_moodle_questions(questions, tmp_path / "quiz.xml")
+        write_moodle_questions(questions, tmp_path / "quiz.xml.gz")
+        first = (tmp_path / "quiz.xml.gz").read_bytes()
+        write_moodle_questions(questions, tmp_path / "quiz.xml.gz")
+
+        assert (tmp_path / "quiz.xml.gz").read_bytes() == first
+        assert gzip.decompress(first) == (tmp_path / "quiz.xml").read_bytes()
+
+    def test_compressed_chunks(self, tmp_path: Path) -> None:
+        chunks = write_moodle_question_chunks(
+            make_questions(["a", "b"]), tmp_path / "quiz.xml.gz", by_category=True
+        )
+        assert [chunk.file for chunk in chunks] == ["quiz-001.xml.gz", "quiz-002.xml.gz"]
+        xml = gzip.decompress((tmp_path / "quiz-001.xml.gz").read_bytes()).decode("utf-8")
+        assert content_hash(xml) == chunks[0].sha256
+        assert (tmp_path / "quiz.manifest.json").exists()
+
+    def test_zstandard_not_installed(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        monkeypatch.setattr("moodle_tools.output.zstandard", None)
+        output = tmp_path / "quiz.xml.zst"
+        sys.argv = ["make-questions", "-i", "examples/true-false.yaml", "-o", str(output)]
+        with pytest.raises(SystemExit):
+            main()
+        assert "requires the zstandard package" in capsys.readouterr().err
+
+
+class TestAtomicOutput:
+    @pytest.mark.parametrize("name", ["quiz.xml", "quiz.xml.gz"])
+    def test_failed_write_keeps_previous_file(self, tmp_path: Path, name: str) -> None:
+        output = tmp_path / name
+        output.write_bytes(b"previous")
+
+        def write() -> None:
+            with open_output(output) as file:
+                file.write("<quiz>")
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            write()
+        assert output.read_bytes() == b"previous"
+        assert list(tmp_path.iterdir()) == [output]
+
+    def test_failed_build_keeps_previous_file(self, tmp_path: Path) -> None:
+        questions = tmp_path / "questions.yaml"
+        questions.write_text(
+            "type: true_false\ntitle: Valid\nquestion: Question\ncorrect_answer: true\n"
+            "---\ntype: true_false\ntitle: [\n",
+            encoding="utf-8",
+        )
+        output = tmp_path / "quiz.xml"
+        output.write_text("previous", encoding="utf-8")
+        sys.argv = ["make-questions", "-i", str(questions), "-s", "-o", str(output)]
+        with pytest.raises(SystemExit):
+            main()
+        assert output.read_text(encoding="utf-8") == "previous"
+        assert sorted(tmp_path.iterdir()) == [questions, output]
+
+    def test_dash_writes_to_stdout(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        questions = Path("examples/true-false.yaml").absolute()
+        monkeypatch.chdir(tmp_path)
+        sys.argv = ["make-questions", "-i", str(questions), "-s", "-o", "-"]
+        main()
+        assert "<quiz>" in capsys.readouterr().out
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_chunk_keeps_previous_chunk(self, tmp_path: Path) -> None:
+        env = create_environment()
+        questions = make_questions(["a", "b"])
+
+        def failing() -> Iterator[Question]:
+            yield from questions
+            raise ParsingError("Invalid question")
+
+        (tmp_path / "quiz-002.xml").write_text("previous", encoding="utf-8")
+        with pytest.raises(ParsingError):
+            write_moodle_question_chunks(failing(), tmp_path / "quiz.xml", max_questions=1)
+        assert (tmp_path / "quiz-001.xml").read_text(encoding="utf-8") == (
+            render_quiz(env, [questions[0].to_xml(env)]) + "\n"
+        )
+        assert (tmp_path / "quiz-002.xml").read_text(encoding="utf-8") == "previous"
+        assert not list(tmp_path.glob(".*"))
+
+
+class TestDeltaOutput:
+    def test_only_changed_questions(self, tmp_path: Path) -> None:
+        write_moodle_questions(
+            make_questions(["a", "b", "c"]), tmp_path / "quiz.xml", manifest=True
+        )
+        previous = read_manifest_hashes([tmp_path / "quiz.manifest.json"])
+
+        questions = make_questions(["a", "d", "c", "e"])
+        chunk = write_moodle_questions(questions, tmp_path / "delta.xml", previous_hashes=previous)
+        assert [question["title"] for question in chunk.questions] == ["Question 2", "Question 4"]
+        env = create_environment()
+        xml = (tmp_path / "delta.xml").read_text(encoding="utf-8")
+        assert xml == render_quiz(env, [questions[1].to_xml(env), questions[3].to_xml(env)]) + "\n"
+        assert "<text>$module$/d</text>" in xml
+
+    def test_unchanged_build_is_empty(self, tmp_path: Path) -> None:
+        questions = make_questions(["a", "b"])
+        write_moodle_question_chunks(questions, tmp_path / "quiz.xml", max_questions=1)
+        previous = read_manifest_hashes([tmp_path / "quiz.manifest.json"])
+        chunk = write_moodle_questions(questions, tmp_path / "delta.xml", previous_hashes=previous)
+        assert chunk.questions == []
+        assert chunk.sha256 == content_hash(render_quiz(create_environment(), []) + "\n")
+
+    def test_since_cli(self, tmp_path: Path) -> None:
+        (tmp_path / "old.manifest.json").write_text(
+            json.dumps({"chunks": [{"questions": [{"sha256": "0" * 64}]}]}), encoding="utf-8"
+        )
+        arguments = ["make-questions", "-i", "examples/true-false.yaml", "-s"]
+        sys.argv = [*arguments, "-o", str(tmp_path / "quiz.xml"), "--manifest"]
+        main()
+        sys.argv = [
+            *arguments,
+            "-o",
+            str(tmp_path / "delta.xml"),
+            "--manifest",
+            "--since",
+            str(tmp_path / "old.manifest.json"),
+            str(tmp_path / "quiz.manifest.json"),
+        ]
+        main()
+        assert read_manifest(tmp_path / "quiz.xml")[0]["questions"]
+        assert json.loads((tmp_path / "delta.manifest.json").read_text(encoding="utf-8")) == {
+            "chunks": [
+                {
+                    "file": "delta.xml",
+                    "size": (tmp_path / "delta.xml").stat().st_size,
+                    "sha256": content_hash((tmp_path / "delta.xml").read_text(encoding="utf-8")),
+                    "questions": [],
+                }
+            ]
+        }
+
+    @pytest.mark.parametrize("content", ["not json", '{"files": []}', '{"chunks": [{}]}'])
+    def test_invalid_manifest(self, tmp_path: Path, content: str) -> None:
+        (tmp_path / "quiz.manifest.json").write_text(content, encoding="utf-8")
+        with pytest.raises(ParsingError, match="Cannot read the hashes"):
+            read_manifest_hashes([tmp_path / "quiz.manifest.json"])
+
+    def test_missing_manifest(self, tmp_path: Path) -> None:
+        with pytest.raises(ParsingError, match="Cannot read the hashes"):
+            read_manifest_hashes([tmp_path / "quiz.manifest.json"])
+
+
+class TestRenderAndRelease:
+    def test_rendered_question_is_compact_and_immutable(self) -> None:
+        question = make_questions(["a"])[0]
+        rendered = next(render_questions([question], create_environment()))
+        assert rendered == RenderedQuestion("Question 1", "a", "truefalse", rendered.xml)
+        assert not hasattr(rendered, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            rendered.xml = ""  # type: ignore[misc]
+
+    def test_release_after_rendering(self, tmp_path: Path) -> None:
+        write_moodle_questions(make_questions(["a", "b"]), tmp_path / "kept.xml")
+        questions = make_questions(["a", "b"])
+        write_moodle_questions(questions, tmp_path / "released.xml", release=True)
+
+        assert [vars(question) for question in questions] == [
+            {"title": "Question 1", "category": "a"},
+            {"title": "Question 2", "category": "b"},
+        ]
+        assert (tmp_path / "released.xml").read_bytes() == (tmp_path / "kept.xml").read_bytes()
+
+    def test_release_chunks(self, tmp_path: Path) -> None:
+        questions = make_questions(["a", "b", "a"])
+        chunks = write_moodle_question_chunks(
+            questions, tmp_path / "quiz.xml", by_category=True, release=True
+        )
+        assert [len(chunk.questions) for chunk in chunks] == [2, 1]
+        assert all(vars(question).keys() == {"title", "category"} for question in questions)
+
+    def test_questions_are_loaded_while_rendering(self, tmp_path: Path) -> None:
+        files = [tmp_path / "a.yaml", tmp_path / "b.yaml"]
+        for path in files:
+            path.write_text(
+                f"type: true_false\ntitle: {path.stem}\nquestion: Q\ncorrect_answer: true\n",
+                encoding="utf-8",
+            )
+        loaded: list[Path] = []
+
+        def paths() -> Iterator[Path]:
+            for path in files:
+                loaded.append(path)
+                yield path
+
+        rendered = render_questions(
+            stream_moodle_questions(paths=paths(), skip_validation=True),
+            create_environment(),
+            release=True,
+        )
+        assert next(rendered).title == "a"
+        assert loaded == files[:1]
+        assert [question.title for question in rendered] == ["b"]
+        assert loaded == files
+
+    @pytest.mark.parametrize(
+        "options", [{"dedup": "report"}, {"question_filter": ["a"]}], ids=["dedup", "filter"]
+    )
+    def test_questions_are_loaded_at_once(self, tmp_path: Path, options: dict[str, Any]) -> None:
+        (tmp_path / "a.yaml").write_text(
+            "type: true_false\ntitle: a\nquestion: Q\ncorrect_answer: true\n", encoding="utf-8"
+        )
+        questions = stream_moodle_questions(
+            paths=iter([tmp_path / "a.yaml"]), skip_validation=True, **options
+        )
+        assert isinstance(questions, list)
+        assert [question.title for question in questions] == ["a"]
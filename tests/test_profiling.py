@@ -0,0 +1,123 @@
+import json
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from moodle_tools.make_questions import main
+from moodle_tools.profiling import Profiler, profiler
+
+
+class FakeClock:
+    """A performance counter that only advances when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(time, "perf_counter", clock)
+    return clock
+
+
+class TestProfiler:
+    @pytest.fixture
+    def enabled_profiler(self, clock: FakeClock) -> Iterator[Profiler]:
+        profiler = Profiler()
+        profiler.enable()
+        yield profiler
+        profiler.disable()
+
+    def test_disabled_profiler_records_nothing(self) -> None:
+        profiler = Profiler()
+        with profiler.question("file.yaml:1"), profiler.stage("markdown"):
+            pass
+        assert list(profiler.iterate("yaml", [1, 2])) == [1, 2]
+        assert not profiler.stages
+        assert not profiler.questions
+
+    def test_nested_stages_record_own_time(
+        self, enabled_profiler: Profiler, clock: FakeClock
+    ) -> None:
+        with enabled_profiler.stage("question"):
+            clock.advance(1.0)
+            with enabled_profiler.stage("markdown"):
+                clock.advance(2.0)
+                with enabled_profiler.stage("jinja"):
+                    clock.advance(4.0)
+            clock.advance(0.5)
+
+        summary = enabled_profiler.to_dict()
+        assert summary["stages"] == {
+            "jinja": {"calls": 1, "seconds": 4.0},
+            "markdown": {"calls": 1, "seconds": 2.0},
+            "question": {"calls": 1, "seconds": 1.5},
+        }
+        assert summary["seconds"] == 7.5
+
+    def test_time_is_attributed_to_questions(
+        self, enabled_profiler: Profiler, clock: FakeClock
+    ) -> None:
+        def parse() -> Iterator[str]:
+            for document in ["first", "second"]:
+                clock.advance(0.5)
+                yield document
+
+        for i, _ in enumerate(enabled_profiler.iterate("yaml", parse()), start=1):
+            with enabled_profiler.question(f"file.yaml:{i}", f"Question {i}"):
+                with enabled_profiler.stage("markdown"):
+                    clock.advance(float(i))
+                enabled_profiler.bind(self)
+
+        summary = enabled_profiler.to_dict(top=1)
+        assert enabled_profiler.location(self) == "file.yaml:2"
+        assert enabled_profiler.stages["yaml"].calls == 3
+        assert enabled_profiler.stages["yaml"].seconds == 1.0
+        assert dict(enabled_profiler.questions) == {
+            "file.yaml:1": {"yaml": 0.5, "markdown": 1.0},
+            "file.yaml:2": {"yaml": 0.5, "markdown": 2.0},
+        }
+        assert summary["questions"] == [
+            {
+                "location": "file.yaml:2",
+                "title": "Question 2",
+                "seconds": 2.5,
+                "stages": {"yaml": 0.5, "markdown": 2.0},
+            }
+        ]
+        assert "file.yaml:2  Question 2 (mostly markdown)" in enabled_profiler.report(top=1)
+
+
+class TestProfileArguments:
+    def test_profile_json(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        output = tmp_path / "profile.json"
+        sys.argv = [
+            "make-questions",
+            "-i",
+            "examples/coderunner-dql-w_connection.yaml",
+            "-s",
+            "--profile",
+            "--profile-json",
+            str(output),
+        ]
+        try:
+            main()
+        finally:
+            profiler.disable()
+
+        captured = capsys.readouterr()
+        profile = json.loads(output.read_text(encoding="utf-8"))
+        assert {"yaml", "duckdb", "format_code", "markdown", "jinja"} <= set(profile["stages"])
+        assert profile["questions"][0]["location"].endswith("coderunner-dql-w_connection.yaml:1")
+        assert "Slowest 1 questions:" in captured.err
+        assert "<quiz>" in captured.out
@@ -1,3 +1,4 @@
+import re
 from textwrap import dedent
 
 from moodle_tools import utils
@@ -204,6 +205,15 @@ class TestUtils:
 
         assert utils.format_tables(eval_text).strip() == expected_text.strip()
 
+    def test_substitute_placeholders(self) -> None:
+        text = '[["a"]] and [["b"]], then [["a"]] and [["unknown"]]'
+        result, unresolved = utils.substitute_placeholders(
+            text, re.compile(r"""\[\[\"([^\"]*)\"\]\]"""), {"a": '[["b"]]', "b": "[[1]]"}
+        )
+        # Replacements are not substituted again
+        assert result == '[["b"]] and [[1]], then [["b"]] and [["unknown"]]'
+        assert unresolved == ['[["unknown"]]']
+
     def test_inline_image(self) -> None:
         # TODO: Implement it
         assert True
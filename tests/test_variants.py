@@ -0,0 +1,91 @@
+import pytest
+
+from moodle_tools.make_questions import load_questions
+from moodle_tools.utils import ParsingError
+from moodle_tools.variants import expand_variants, parameter_values
+from moodle_tools.yaml_constructors import ExpressionEvaluator
+
+
+def numerical_document() -> dict:
+    return {
+        "type": "numerical",
+        "title": "Product of {{ a }} and {{ b }}",
+        "question": "What is {{ a }} times {{ b }}?",
+        "variants": {"a": [2, 3], "b": {"start": 1, "stop": 3}},
+        "answers": [{"answer": "{{ a * b }}", "feedback": "{{a}} times {{b}} is {{ a * b }}."}],
+    }
+
+
+class TestParameterValues:
+    @pytest.mark.parametrize(
+        ("spec", "expected"),
+        [
+            ([1, "x", 2.5], [1, "x", 2.5]),
+            ({"start": 1, "stop": 4}, [1, 2, 3]),
+            ({"start": 10, "stop": 0, "step": -5}, [10, 5]),
+            ({"start": 0, "stop": 0.5, "step": 0.1}, [0, 0.1, 0.2, 0.3, 0.4]),
+        ],
+    )
+    def test_values(self, spec: object, expected: list) -> None:
+        assert parameter_values("a", spec) == expected
+
+    @pytest.mark.parametrize(
+        "spec", [[], 3, {"start": 1}, {"start": 1, "stop": 3, "step": 0}, {"stop": 3, "by": 1}]
+    )
+    def test_invalid(self, spec: object) -> None:
+        with pytest.raises(ParsingError, match="Invalid values of variant parameter 'a'"):
+            parameter_values("a", spec)
+
+
+class TestExpandVariants:
+    def test_expand(self) -> None:
+        documents = expand_variants(numerical_document(), ExpressionEvaluator())
+        assert [document["title"] for document in documents] == [
+            "Product of 2 and 1",
+            "Product of 2 and 2",
+            "Product of 3 and 1",
+            "Product of 3 and 2",
+        ]
+        assert documents[3]["question"] == "What is 3 times 2?"
+        assert documents[3]["answers"] == [{"answer": 6, "feedback": "3 times 2 is 6."}]
+        assert all("variants" not in document for document in documents)
+
+    def test_number_titles_without_expression(self) -> None:
+        document = numerical_document() | {"title": "Product"}
+        documents = expand_variants(document, ExpressionEvaluator())
+        assert documents[0]["title"] == "Product (variant 1)"
+        assert documents[3]["title"] == "Product (variant 4)"
+
+    def test_expressions_are_parsed_once(self) -> None:
+        evaluator = ExpressionEvaluator()
+        interpreter = evaluator.reset({})
+        calls = []
+        parse = interpreter.parse
+
+        def counting_parse(text: str) -> object:
+            calls.append(text)
+            return parse(text)
+
+        interpreter.parse = counting_parse
+        expand_variants(numerical_document(), evaluator)
+        assert sorted(calls) == ["a", "a * b", "b"]
+
+    def test_eval_not_allowed(self) -> None:
+        with pytest.raises(ParsingError, match="evaluation is not allowed"):
+            expand_variants(numerical_document(), None)
+
+    def test_invalid_expression(self) -> None:
+        document = numerical_document() | {"question": "What is {{ a + c }}?"}
+        with pytest.raises(ParsingError, match="Evaluating an expression with"):
+            expand_variants(document, ExpressionEvaluator())
+
+    def test_load_questions(self) -> None:
+        questions = list(
+            load_questions(
+                iter([numerical_document()]),
+                strict_validation=False,
+                evaluator=ExpressionEvaluator(),
+            )
+        )
+        assert len(questions) == 4
+        assert questions[2].title == "Product of 3 and 1"
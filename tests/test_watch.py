@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from moodle_tools.dependencies import DependencyTracker
+from moodle_tools.make_questions import QuestionWatcher
+
+QUESTION = """---
+type: true_false
+title: {title}
+question: !include {include}
+correct_answer: true
+"""
+
+
+def touch(path: Path, content: str) -> None:
+    """Rewrite a file and move its modification time forward."""
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+class TestDependencyTracker:
+    def test_record_without_tracking(self) -> None:
+        tracker = DependencyTracker()
+        tracker.record("file.txt")
+        assert tracker.files is None
+
+    def test_nested_tracking(self) -> None:
+        tracker = DependencyTracker()
+        with tracker.track() as outer:
+            tracker.record("outer.txt")
+            with tracker.track() as inner:
+                tracker.record("inner.txt")
+        assert inner == {Path("inner.txt").absolute()}
+        assert outer == {Path("outer.txt").absolute(), Path("inner.txt").absolute()}
+
+
+class TestQuestionWatcher:
+    @pytest.fixture
+    def bank(self, tmp_path: Path) -> Path:
+        (tmp_path / "questions").mkdir()
+        (tmp_path / "questions" / "first.txt").write_text("First text", encoding="utf-8")
+        (tmp_path / "questions" / "second.txt").write_text("Second text", encoding="utf-8")
+        (tmp_path / "questions" / "first.yaml").write_text(
+            QUESTION.format(title="First", include="first.txt"), encoding="utf-8"
+        )
+        (tmp_path / "questions" / "second.yaml").write_text(
+            QUESTION.format(title="Second", include="second.txt"), encoding="utf-8"
+        )
+        return tmp_path
+
+    def test_rebuild_changed_files(self, bank: Path) -> None:
+        output = bank / "questions.xml"
+        watcher = QuestionWatcher([str(bank / "questions")], output, skip_validation=True)
+
+        assert watcher.update()
+        assert "First text" in output.read_text(encoding="utf-8")
+        assert "Second text" in output.read_text(encoding="utf-8")
+        assert not watcher.update()
+
+        second = watcher.files[bank / "questions" / "second.yaml"]
+        touch(bank / "questions" / "first.txt", "Changed text")
+        assert watcher.update()
+        assert "Changed text" in output.read_text(encoding="utf-8")
+        assert "First text" not in output.read_text(encoding="utf-8")
+        assert watcher.files[bank / "questions" / "second.yaml"] is second
+
+    def test_added_and_removed_files(self, bank: Path) -> None:
+        output = bank / "questions.xml"
+        watcher = QuestionWatcher([str(bank / "questions")], output, skip_validation=True)
+        watcher.update()
+
+        (bank / "questions" / "second.yaml").unlink()
+        (bank / "questions" / "third.yaml").write_text(
+            QUESTION.format(title="Third", include="second.txt"), encoding="utf-8"
+        )
+        assert watcher.update()
+        xml = output.read_text(encoding="utf-8")
+        assert "<text>Third</text>" in xml
+        assert "<text>Second</text>" not in xml
+
+    def test_keep_watching_after_errors(self, bank: Path) -> None:
+        output = bank / "questions.xml"
+        watcher = QuestionWatcher([str(bank / "questions")], output, skip_validation=True)
+
+        (bank / "questions" / "first.txt").unlink()
+        assert watcher.update()
+        assert "Second text" in output.read_text(encoding="utf-8")
+        assert "<text>First</text>" not in output.read_text(encoding="utf-8")
+
+        touch(bank / "questions" / "first.txt", "Restored text")
+        assert watcher.update()
+        assert "Restored text" in output.read_text(encoding="utf-8")